@@ -0,0 +1,158 @@
+# agents/file_organizer/category_cache.py
+# Cache persistente (SQLite) das categorias atribuídas pela IA, com despejo LRU.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional
+
+from agents.file_organizer.records import ItemRecord
+from hivemind_core.telemetry import cache_lookups
+from hivemind_core.resources import process_resource
+
+CATEGORY_CACHE_PATH = Path(os.getenv("FILE_ORGANIZER_CATEGORY_CACHE", ".hivemind_cache/category_cache.sqlite3"))
+CATEGORY_CACHE_MAX_ENTRIES = int(os.getenv("FILE_ORGANIZER_CATEGORY_CACHE_SIZE", "200000"))
+
+# Itens que a IA não soube categorizar não são guardados: ganham nova chance na próxima execução.
+_UNCACHED_CATEGORIES = {"_a_revisar"}
+
+
+def normalize_goal(user_goal: str) -> str:
+    return ' '.join((user_goal or "").split()).casefold()
+
+
+def item_signature(item: ItemRecord) -> str:
+    """Assinatura normalizada de um item: nome, tipo, extensão e amostra do conteúdo.
+
+    O caminho completo não entra, então o mesmo arquivo em outra pasta (ou um item
+    repetido no dia seguinte) reaproveita a categoria.
+    """
+    name = item.name
+    item_type = item.type
+    extension = ''.join(Path(name).suffixes).lower() if item_type == "file" else ""
+    samples = sorted(item.sample_contents or ())
+    payload = json.dumps([name.casefold(), item_type, extension, samples], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CategoryCache:
+    """Mapeia (assinatura do item, objetivo normalizado) -> categoria, limitado a `max_entries`."""
+
+    def __init__(self, path: Path = CATEGORY_CACHE_PATH, max_entries: int = CATEGORY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS category_cache ("
+                " goal TEXT NOT NULL, signature TEXT NOT NULL, category TEXT NOT NULL,"
+                " last_used INTEGER NOT NULL, PRIMARY KEY (goal, signature))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_category_cache_lru ON category_cache (last_used)")
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, items: List[ItemRecord], user_goal: str) -> Tuple[Dict[str, str], List[ItemRecord]]:
+        """Retorna (mapa caminho -> categoria dos acertos, itens que precisam ir para a IA)."""
+        if not items:
+            return {}, []
+        goal = normalize_goal(user_goal)
+        signatures = [item_signature(item) for item in items]
+        found: Dict[str, str] = {}
+        with self._lock:
+            conn = self._connection()
+            unique = list(set(signatures))
+            # Consulta em lotes para respeitar o limite de parâmetros do SQLite.
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT signature, category FROM category_cache WHERE goal = ? AND signature IN ({placeholders})",
+                    [goal, *batch]
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time_ns()
+                conn.executemany(
+                    "UPDATE category_cache SET last_used = ? WHERE goal = ? AND signature = ?",
+                    [(now, goal, sig) for sig in found]
+                )
+                conn.commit()
+
+        hits, misses = {}, []
+        for item, sig in zip(items, signatures):
+            if sig in found:
+                hits[item.path] = found[sig]
+            else:
+                misses.append(item)
+        self.hits += len(hits)
+        self.misses += len(misses)
+        cache_lookups.inc(len(hits), cache="category", result="hit")
+        cache_lookups.inc(len(misses), cache="category", result="miss")
+        return hits, misses
+
+    def store(self, items: List[ItemRecord], categorization_map: Dict[str, str], user_goal: str):
+        goal = normalize_goal(user_goal)
+        now = time.time_ns()
+        rows = [
+            (goal, item_signature(item), categorization_map[item.path], now)
+            for item in items
+            if categorization_map.get(item.path) not in (None, *_UNCACHED_CATEGORIES)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT INTO category_cache (goal, signature, category, last_used) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (goal, signature) DO UPDATE SET category = excluded.category, last_used = excluded.last_used",
+                rows
+            )
+            excess = conn.execute("SELECT COUNT(*) FROM category_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM category_cache WHERE rowid IN"
+                    " (SELECT rowid FROM category_cache ORDER BY last_used ASC LIMIT ?)",
+                    (excess,)
+                )
+            conn.commit()
+
+    def invalidate(self, user_goal: Optional[str] = None) -> int:
+        """Remove as entradas de um objetivo (ou todas, se `user_goal` for None). Retorna quantas saíram."""
+        with self._lock:
+            conn = self._connection()
+            if user_goal is None:
+                cursor = conn.execute("DELETE FROM category_cache")
+            else:
+                cursor = conn.execute("DELETE FROM category_cache WHERE goal = ?", (normalize_goal(user_goal),))
+            conn.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM category_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+
+# Cache compartilhado pelo processo do hub.
+category_cache = process_resource(f"{__name__}.category_cache", CategoryCache)
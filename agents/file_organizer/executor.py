@@ -0,0 +1,410 @@
+# agents/file_organizer/executor.py
+# Executor de planos: renomeações diretas no mesmo filesystem, cópias concorrentes entre
+# dispositivos e um journal append-only para retomar ou desfazer execuções parciais.
+
+import os
+import json
+import errno
+import time
+import uuid
+import shutil
+import asyncio
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Any, Optional, Callable, Awaitable
+
+JOURNAL_DIR = Path(os.getenv("FILE_ORGANIZER_JOURNAL_DIR", ".hivemind_cache/journals"))
+MAX_COPY_WORKERS = int(os.getenv("FILE_ORGANIZER_COPY_WORKERS", "8"))
+RENAME_BATCH_SIZE = 500
+# O journal é sincronizado com o disco a cada N registros (e sempre ao final).
+_FSYNC_EVERY = 1000
+# "abort": nada é movido se houver colisões; "skip": os itens em conflito são pulados.
+ON_CONFLICT_MODES = ("abort", "skip")
+
+ProgressCallback = Callable[[int, int, str], Awaitable[None]]
+
+
+class JournalError(Exception):
+    """Journal ausente, corrompido ou em estado incompatível com a operação."""
+
+
+class Journal:
+    """Journal append-only em JSON Lines; cada linha é um registro independente."""
+
+    def __init__(self, journal_id: str, directory: Path = JOURNAL_DIR):
+        self.journal_id = journal_id
+        self.path = directory / f"{journal_id}.jsonl"
+        self._file = None
+        self._lock = threading.Lock()
+        self._unsynced = 0
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= _FSYNC_EVERY:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+
+    def read(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            raise JournalError(f"Journal '{self.journal_id}' não encontrado.")
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Uma última linha truncada (queda no meio da escrita) é ignorada.
+                    break
+        return records
+
+
+def resolve_operations(plan: Dict[str, Any]) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Converte os passos do plano em (pastas a criar, movimentos origem -> destino final)."""
+    folders, moves = [], []
+    for step in plan.get("steps", []):
+        action = step.get("action")
+        if action == "CREATE_FOLDER":
+            folders.append(step["path"])
+        elif action == "MOVE_FILE":
+            moves.append((step["from"], step["to"]))
+        elif action == "MOVE_FOLDER":
+            # O destino de uma pasta é a pasta da categoria: ela é movida para DENTRO dela.
+            moves.append((step["from"], os.path.join(step["to"], os.path.basename(step["from"].rstrip("/\\")))))
+    return folders, moves
+
+
+def find_conflicts(moves: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+    """Detecta, antes de mover qualquer coisa, origens ausentes e colisões de nome."""
+    conflicts = []
+    seen_destinations: Dict[str, str] = {}
+    for src, dst in moves:
+        if not os.path.lexists(src):
+            conflicts.append({"from": src, "to": dst, "reason": "origem não existe"})
+        elif os.path.lexists(dst):
+            conflicts.append({"from": src, "to": dst, "reason": "destino já existe"})
+        elif dst.startswith(src.rstrip(os.sep) + os.sep):
+            conflicts.append({"from": src, "to": dst, "reason": "destino dentro da própria origem"})
+        elif dst in seen_destinations:
+            conflicts.append({"from": src, "to": dst, "reason": f"mesmo destino que '{seen_destinations[dst]}'"})
+        else:
+            seen_destinations[dst] = src
+    return conflicts
+
+
+def _same_device(src: str, dst: str) -> bool:
+    try:
+        return os.lstat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev
+    except OSError:
+        return False
+
+
+def _remove_path(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+
+def _copy_path(src: str, dst: str):
+    if os.path.islink(src):
+        os.symlink(os.readlink(src), dst)
+    elif os.path.isdir(src):
+        shutil.copytree(src, dst, symlinks=True)
+    else:
+        shutil.copy2(src, dst)
+
+
+class PlanExecutor:
+    """Aplica (ou retoma) um plano registrando cada operação no journal."""
+
+    def __init__(self, journal: Journal, folders: List[str], moves: List[Tuple[str, str]],
+                 max_workers: int = MAX_COPY_WORKERS, progress: Optional[ProgressCallback] = None):
+        self.journal = journal
+        self.folders = folders
+        self.moves = moves
+        self.max_workers = max(1, max_workers)
+        self.progress = progress
+        self.done = 0
+        self.renamed = 0
+        self.copied = 0
+        self.created_folders = 0
+        self.failures: List[Dict[str, str]] = []
+        self._counters_lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._counters_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.done += 1
+
+    async def _report(self, message: str = ""):
+        if self.progress is not None:
+            await self.progress(self.done, len(self.moves), message)
+
+    def _create_folders(self, existing_created: set):
+        # Todas as pastas de destino (inclusive as implícitas pelos movimentos) numa única passada.
+        wanted = sorted(set(self.folders) | {os.path.dirname(dst) for _, dst in self.moves})
+        for folder in wanted:
+            missing = []
+            current = folder
+            while current and not os.path.isdir(current):
+                missing.append(current)
+                parent = os.path.dirname(current)
+                if parent == current:
+                    break
+                current = parent
+            for path in reversed(missing):
+                os.makedirs(path, exist_ok=True)
+                if path not in existing_created:
+                    self.journal.append({"op": "mkdir", "path": path})
+                    self.created_folders += 1
+
+    def _fail(self, index: int, error: Exception, record: bool = True):
+        src, dst = self.moves[index]
+        if record:
+            self.journal.append({"op": "move", "i": index, "state": "failed", "error": str(error)})
+        with self._counters_lock:
+            self.failures.append({"from": src, "to": dst, "error": str(error)})
+
+    def _rename_batch(self, batch: List[int]):
+        for index in batch:
+            src, dst = self.moves[index]
+            try:
+                os.rename(src, dst)
+            except OSError as e:
+                if e.errno == errno.EXDEV:
+                    # Ex: bind mounts com o mesmo st_dev; cai para o caminho de cópia.
+                    self._copy_one(index)
+                else:
+                    # EACCES, ENOSPC etc.: copiar falharia igual (ou pior, pela metade).
+                    self._fail(index, e)
+                continue
+            self.journal.append({"op": "move", "i": index, "state": "done", "mode": "rename"})
+            self._count("renamed")
+
+    def _copy_one(self, index: int):
+        src, dst = self.moves[index]
+        self.journal.append({"op": "move", "i": index, "state": "start", "mode": "copy"})
+        # Copia e só depois apaga a origem (em vez de shutil.move), para distinguir uma cópia
+        # pela metade, que pode ser descartada, de uma origem que não pôde ser removida.
+        try:
+            _copy_path(src, dst)
+        except Exception as e:
+            try:
+                _remove_path(dst)
+            except OSError:
+                # O destino parcial ficou no disco: o registro "start" deixa o descarte
+                # para resume_plan/rollback_plan.
+                self._fail(index, e, record=False)
+                return
+            self._fail(index, e)
+            return
+        try:
+            _remove_path(src)
+        except OSError as e:
+            # A cópia está completa; o que restou da origem não é desfeito nem recopiado.
+            self.journal.append({"op": "move", "i": index, "state": "done", "mode": "copy", "error": str(e)})
+            self._fail(index, e, record=False)
+            return
+        self.journal.append({"op": "move", "i": index, "state": "done", "mode": "copy"})
+        self._count("copied")
+
+    async def run(self, pending: List[int], existing_created: set) -> Dict[str, Any]:
+        started = time.perf_counter()
+        await asyncio.to_thread(self._create_folders, existing_created)
+        await self._report(f"{self.created_folders} pastas criadas.")
+
+        # Decide de antemão o que é renomeação no mesmo filesystem e o que exige cópia.
+        same_device = await asyncio.to_thread(lambda: [_same_device(*self.moves[i]) for i in pending])
+        renames = [i for i, same in zip(pending, same_device) if same]
+        copies = [i for i, same in zip(pending, same_device) if not same]
+
+        for start in range(0, len(renames), RENAME_BATCH_SIZE):
+            await asyncio.to_thread(self._rename_batch, renames[start:start + RENAME_BATCH_SIZE])
+            await self._report("Renomeando no mesmo filesystem...")
+
+        if copies:
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="plan-copy") as pool:
+                futures = [loop.run_in_executor(pool, self._copy_one, i) for i in copies]
+                for completed, future in enumerate(asyncio.as_completed(futures), start=1):
+                    await future
+                    if completed % 50 == 0 or completed == len(futures):
+                        await self._report("Copiando entre dispositivos...")
+
+        self.journal.append({"op": "commit" if not self.failures else "partial", "failed": len(self.failures)})
+        return {
+            "status": "completed" if not self.failures else "partial",
+            "journal_id": self.journal.journal_id,
+            "moved": self.done,
+            "renamed": self.renamed,
+            "copied": self.copied,
+            "created_folders": self.created_folders,
+            "failures": self.failures,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+async def execute_plan(plan: Dict[str, Any], max_workers: int = MAX_COPY_WORKERS, on_conflict: str = "abort",
+                       progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Executa um plano novo. Com on_conflict="abort", nada é movido se houver colisões."""
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise ValueError(f"on_conflict inválido: {on_conflict!r} (use {' ou '.join(repr(m) for m in ON_CONFLICT_MODES)}).")
+    folders, moves = resolve_operations(plan)
+    conflicts = await asyncio.to_thread(find_conflicts, moves)
+    if conflicts and on_conflict != "skip":
+        return {"status": "conflict", "conflicts": conflicts, "moved": 0}
+    if conflicts:
+        conflicting = {(c["from"], c["to"]) for c in conflicts}
+        moves = [m for m in moves if m not in conflicting]
+
+    journal = Journal(uuid.uuid4().hex)
+    journal.open()
+    try:
+        journal.append({
+            "op": "begin", "root_directory": plan.get("root_directory"),
+            "folders": folders, "moves": moves, "skipped_conflicts": len(conflicts),
+        })
+        executor = PlanExecutor(journal, folders, moves, max_workers, progress)
+        result = await executor.run(list(range(len(moves))), set())
+    finally:
+        journal.close()
+    result["skipped_conflicts"] = conflicts
+    return result
+
+
+def _replay(records: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[int, str], List[str]]:
+    if not records or records[0].get("op") != "begin":
+        raise JournalError("Journal sem registro inicial 'begin'.")
+    states: Dict[int, str] = {}
+    created: List[str] = []
+    for record in records[1:]:
+        if record.get("op") == "move":
+            states[record["i"]] = record["state"]
+        elif record.get("op") == "mkdir":
+            created.append(record["path"])
+        elif record.get("op") == "rollback_move":
+            states[record["i"]] = "rolled_back"
+    return records[0], states, created
+
+
+async def resume_plan(journal_id: str, max_workers: int = MAX_COPY_WORKERS, on_conflict: str = "abort",
+                      progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Retoma um plano aplicado parcialmente a partir do seu journal.
+
+    Os movimentos pendentes passam de novo pela detecção de conflitos: um arquivo que surgiu
+    no destino depois da execução original não é sobrescrito.
+    """
+    if on_conflict not in ON_CONFLICT_MODES:
+        raise ValueError(f"on_conflict inválido: {on_conflict!r} (use {' ou '.join(repr(m) for m in ON_CONFLICT_MODES)}).")
+    journal = Journal(journal_id)
+    records = await asyncio.to_thread(journal.read)
+    begin, states, created = _replay(records)
+    if any(r.get("op") == "rolled_back" for r in records):
+        raise JournalError(f"O plano '{journal_id}' foi desfeito e não pode ser retomado.")
+    moves = [tuple(m) for m in begin["moves"]]
+
+    def _reconcile() -> List[int]:
+        pending = []
+        for index, (src, dst) in enumerate(moves):
+            state = states.get(index)
+            if state == "done":
+                continue
+            if not os.path.lexists(src) and os.path.lexists(dst):
+                # A operação terminou, mas o registro não chegou ao journal.
+                journal.append({"op": "move", "i": index, "state": "done", "mode": "reconciled"})
+                continue
+            if state == "start" and os.path.lexists(src) and os.path.lexists(dst):
+                # Cópia interrompida: o destino não existia no preflight, então é parcial.
+                _remove_path(dst)
+            pending.append(index)
+        return pending
+
+    journal.open()
+    try:
+        journal.append({"op": "resume"})
+        pending = await asyncio.to_thread(_reconcile)
+        already_moved = len(moves) - len(pending)
+        conflicts = await asyncio.to_thread(find_conflicts, [moves[i] for i in pending])
+        if conflicts and on_conflict != "skip":
+            return {"status": "conflict", "conflicts": conflicts, "moved": already_moved,
+                    "journal_id": journal_id, "resumed": True}
+        if conflicts:
+            conflicting = {(c["from"], c["to"]) for c in conflicts}
+            pending = [i for i in pending if moves[i] not in conflicting]
+        executor = PlanExecutor(journal, begin["folders"], moves, max_workers, progress)
+        executor.done = already_moved
+        result = await executor.run(pending, set(created))
+    finally:
+        journal.close()
+    result["skipped_conflicts"] = conflicts
+    result["resumed"] = True
+    return result
+
+
+async def rollback_plan(journal_id: str, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Desfaz um plano: devolve os itens movidos e remove as pastas criadas (se vazias)."""
+    journal = Journal(journal_id)
+    records = await asyncio.to_thread(journal.read)
+    begin, states, created = _replay(records)
+    moves = [tuple(m) for m in begin["moves"]]
+    to_undo = [i for i in range(len(moves)) if states.get(i) in ("done", "start")]
+
+    def _undo() -> Dict[str, Any]:
+        restored, discarded, failures = 0, 0, []
+        for index in reversed(to_undo):
+            src, dst = moves[index]
+            if states[index] == "start" and os.path.lexists(src) and os.path.lexists(dst):
+                # Cópia interrompida: como em resume_plan, o destino é parcial e a origem está intacta.
+                try:
+                    _remove_path(dst)
+                except OSError as e:
+                    failures.append({"from": dst, "to": src, "error": str(e)})
+                    continue
+                journal.append({"op": "rollback_move", "i": index, "mode": "discarded"})
+                discarded += 1
+                continue
+            if not os.path.lexists(dst) or os.path.lexists(src):
+                continue
+            try:
+                os.makedirs(os.path.dirname(src), exist_ok=True)
+                shutil.move(dst, src)
+            except Exception as e:
+                failures.append({"from": dst, "to": src, "error": str(e)})
+                continue
+            journal.append({"op": "rollback_move", "i": index})
+            restored += 1
+        removed_folders = 0
+        for path in reversed(created):
+            try:
+                os.rmdir(path)
+                removed_folders += 1
+            except OSError:
+                pass
+        journal.append({"op": "rolled_back", "restored": restored, "discarded": discarded, "failed": len(failures)})
+        return {"restored": restored, "discarded_partial": discarded, "removed_folders": removed_folders, "failures": failures}
+
+    journal.open()
+    try:
+        result = await asyncio.to_thread(_undo)
+    finally:
+        journal.close()
+    if progress is not None:
+        await progress(result["restored"], len(to_undo), "Plano desfeito.")
+    return {"status": "rolled_back" if not result["failures"] else "partial", "journal_id": journal_id, **result}
@@ -0,0 +1,317 @@
+# agents/file_organizer/extraction.py
+# Etapa opcional de extração de conteúdo (tipo real, texto da 1ª página de PDFs, OCR), em um pool de processos.
+
+import os
+import json
+import sqlite3
+import asyncio
+import threading
+import importlib.util
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Any, Optional
+
+from agents.file_organizer.records import ItemRecord
+from hivemind_core.telemetry import cache_lookups
+from hivemind_core.resources import process_resource
+
+# Desligada por padrão: abrir os arquivos sem regra em um pool de processos tem custo (1 ativa).
+EXTRACTION_ENABLED = os.getenv("FILE_ORGANIZER_EXTRACTION", "0") == "1"
+FEATURE_CACHE_PATH = Path(os.getenv("FILE_ORGANIZER_FEATURE_CACHE", ".hivemind_cache/feature_cache.sqlite3"))
+EXTRACT_WORKERS = int(os.getenv("FILE_ORGANIZER_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Bytes lidos do início de cada arquivo para identificar o tipo e extrair texto puro.
+EXTRACT_MAX_BYTES = int(os.getenv("FILE_ORGANIZER_EXTRACT_MAX_BYTES", str(64 * 1024)))
+# PDFs e imagens maiores que isso não são abertos (só o tipo é identificado).
+EXTRACT_MAX_FILE_BYTES = int(os.getenv("FILE_ORGANIZER_EXTRACT_MAX_FILE_BYTES", str(50 * 1024 * 1024)))
+EXCERPT_CHARS = int(os.getenv("FILE_ORGANIZER_EXCERPT_CHARS", "500"))
+OCR_MAX_SIDE = int(os.getenv("FILE_ORGANIZER_OCR_MAX_SIDE", "1024"))
+OCR_TIMEOUT_SECONDS = float(os.getenv("FILE_ORGANIZER_OCR_TIMEOUT", "10"))
+# Arquivos enviados juntos a um processo do pool, para diluir o custo de IPC.
+EXTRACT_BATCH = 16
+
+# Assinaturas usadas quando o magika não está instalado; os rótulos seguem os do magika.
+_SIGNATURES: List[Tuple[bytes, int, str]] = [
+    (b"%PDF-", 0, "pdf"),
+    (b"\x89PNG\r\n\x1a\n", 0, "png"),
+    (b"\xff\xd8\xff", 0, "jpeg"),
+    (b"GIF87a", 0, "gif"),
+    (b"GIF89a", 0, "gif"),
+    (b"II*\x00", 0, "tiff"),
+    (b"MM\x00*", 0, "tiff"),
+    (b"WEBP", 8, "webp"),
+    (b"ftyp", 4, "mp4"),
+    (b"\x1a\x45\xdf\xa3", 0, "mkv"),
+    (b"AVI ", 8, "avi"),
+    (b"Rar!\x1a\x07", 0, "rar"),
+    (b"7z\xbc\xaf\x27\x1c", 0, "7zip"),
+    (b"ustar", 257, "tar"),
+    (b"\x7fELF", 0, "elf"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", 0, "doc"),
+    (b"{\\rtf", 0, "rtf"),
+]
+# Assinaturas curtas demais para valer sozinhas ("BM", "MZ", gzip) passam por `_validated_signature`,
+# que confere os campos do cabeçalho: um texto começando com "BMW" ou "MZ" não vira imagem/executável.
+_BMP_DIB_SIZES = {12, 40, 52, 56, 64, 108, 124}
+# Arquivos ZIP de Office: o tipo real sai do primeiro membro.
+_ZIP_MEMBERS = [(b"word/", "docx"), (b"xl/", "xlsx"), (b"ppt/", "pptx"), (b"mimetypeapplication/vnd.oasis.opendocument.text", "odt")]
+
+_IMAGE_TYPES = {"png", "jpeg", "gif", "bmp", "tiff", "webp"}
+_TEXT_TYPES = {"txt", "markdown", "csv", "json", "xml", "html", "python", "javascript", "yaml", "ini", "shell"}
+
+
+def backend_signature() -> str:
+    """Quais bibliotecas de extração estão disponíveis; instalar uma invalida o cache de features."""
+    available = [name for name in ("magika", "fitz", "PIL", "pytesseract") if importlib.util.find_spec(name)]
+    return "v1:" + ",".join(available)
+
+
+# --- Código executado nos processos do pool ---
+
+_magika = None
+_ocr_available = True
+
+
+def _validated_signature(head: bytes) -> Optional[str]:
+    if head.startswith(b"BM") and len(head) >= 18:
+        pixel_offset = int.from_bytes(head[10:14], "little")
+        dib_size = int.from_bytes(head[14:18], "little")
+        if head[6:10] == b"\0\0\0\0" and dib_size in _BMP_DIB_SIZES and 14 + dib_size <= pixel_offset:
+            return "bmp"
+    if head.startswith(b"MZ") and len(head) >= 64:
+        pe_offset = int.from_bytes(head[0x3C:0x40], "little")
+        if head[pe_offset:pe_offset + 4] == b"PE\0\0":
+            return "pebin"
+    # gzip: método deflate (8) e bits reservados das flags zerados.
+    if head[:3] == b"\x1f\x8b\x08" and len(head) >= 10 and not head[3] & 0xE0:
+        return "gzip"
+    return None
+
+
+def _sniff_signature(head: bytes) -> str:
+    validated = _validated_signature(head)
+    if validated:
+        return validated
+    for signature, offset, label in _SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return label
+    if head.startswith(b"PK\x03\x04"):
+        for marker, label in _ZIP_MEMBERS:
+            if marker in head[30:30 + 256]:
+                return label
+        return "zip"
+    if head and b"\x00" not in head[:1024]:
+        try:
+            head[:1024].decode("utf-8")
+            return "txt"
+        except UnicodeDecodeError:
+            pass
+    return "unknown"
+
+
+def _sniff(head: bytes) -> Tuple[str, str]:
+    """(tipo de conteúdo, fonte da identificação)."""
+    global _magika
+    if _magika is None:
+        try:
+            from magika import Magika
+            _magika = Magika()
+        except Exception:
+            _magika = False
+    if _magika:
+        try:
+            result = _magika.identify_bytes(head)
+            output = getattr(result, "output", None) or getattr(result.prediction, "output", None)
+            label = getattr(output, "label", None) or getattr(output, "ct_label", None)
+            if label:
+                return str(label), "magika"
+        except Exception:
+            pass
+    return _sniff_signature(head), "signature"
+
+
+def _pdf_excerpt(path: str, max_chars: int) -> Optional[str]:
+    try:
+        import fitz
+    except ImportError:
+        return None
+    with fitz.open(path) as document:
+        if document.page_count == 0:
+            return None
+        return document.load_page(0).get_text()[:max_chars]
+
+
+def _ocr_excerpt(path: str, max_chars: int, max_side: int, timeout: float) -> Optional[str]:
+    global _ocr_available
+    if not _ocr_available:
+        return None
+    try:
+        import pytesseract
+        from PIL import Image
+    except ImportError:
+        _ocr_available = False
+        return None
+    with Image.open(path) as image:
+        # `draft` decodifica JPEGs já reduzidos; `thumbnail` garante o limite para os demais formatos.
+        image.draft("L", (max_side, max_side))
+        image.thumbnail((max_side, max_side))
+        try:
+            text = pytesseract.image_to_string(image.convert("L"), timeout=timeout)
+        except pytesseract.TesseractNotFoundError:
+            _ocr_available = False
+            return None
+    return text[:max_chars]
+
+
+def extract_features(path: str, size: int, max_bytes: int = EXTRACT_MAX_BYTES, max_file_bytes: int = EXTRACT_MAX_FILE_BYTES,
+                     excerpt_chars: int = EXCERPT_CHARS, ocr_max_side: int = OCR_MAX_SIDE,
+                     ocr_timeout: float = OCR_TIMEOUT_SECONDS) -> Dict[str, Any]:
+    """Features de um arquivo: `content_type`, `detected_by` e, quando possível, `excerpt` (texto)."""
+    features: Dict[str, Any] = {}
+    try:
+        with open(path, "rb") as f:
+            head = f.read(max_bytes)
+        content_type, detected_by = _sniff(head)
+        features.update(content_type=content_type, detected_by=detected_by)
+        excerpt = None
+        if content_type in _TEXT_TYPES:
+            excerpt = head.decode("utf-8", errors="ignore")[:excerpt_chars]
+        elif size <= max_file_bytes and content_type == "pdf":
+            excerpt = _pdf_excerpt(path, excerpt_chars)
+        elif size <= max_file_bytes and content_type in _IMAGE_TYPES:
+            excerpt = _ocr_excerpt(path, excerpt_chars, ocr_max_side, ocr_timeout)
+        if excerpt and excerpt.strip():
+            features["excerpt"] = ' '.join(excerpt.split())
+    except Exception as e:
+        features["error"] = f"{type(e).__name__}: {e}"
+    return features
+
+
+def extract_batch(files: List[Tuple[str, int]], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [extract_features(path, size, **options) for path, size in files]
+
+
+# --- Lado do hub ---
+
+class FeatureExtractor:
+    """Extrai features em um ProcessPoolExecutor e guarda o resultado por (caminho, tamanho, mtime).
+
+    O pool usa `spawn`: os processos não herdam as threads do hub (watchdog, ChromaDB) e
+    carregam só este módulo. O magika e o OCR ficam fora do GIL e do event loop.
+    """
+
+    def __init__(self, cache_path: Path = FEATURE_CACHE_PATH, workers: int = EXTRACT_WORKERS,
+                 enabled: bool = EXTRACTION_ENABLED):
+        self.cache_path = cache_path
+        self.workers = max(1, workers)
+        self.enabled = enabled
+        self.backend = backend_signature()
+        self.options = {
+            "max_bytes": EXTRACT_MAX_BYTES, "max_file_bytes": EXTRACT_MAX_FILE_BYTES,
+            "excerpt_chars": EXCERPT_CHARS, "ocr_max_side": OCR_MAX_SIDE, "ocr_timeout": OCR_TIMEOUT_SECONDS,
+        }
+        self.hits = 0
+        self.misses = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS features ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime REAL NOT NULL,"
+                " backend TEXT NOT NULL, features TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def lookup(self, items: List[ItemRecord]) -> Tuple[Dict[str, Dict[str, Any]], List[ItemRecord]]:
+        """Retorna (features em cache por caminho, itens a extrair)."""
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            conn = self._connection()
+            paths = [item.path for item in items]
+            rows = {}
+            for start in range(0, len(paths), 500):
+                batch = paths[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.update((path, (size, mtime, backend, data)) for path, size, mtime, backend, data in conn.execute(
+                    f"SELECT path, size, mtime, backend, features FROM features WHERE path IN ({placeholders})", batch
+                ))
+        misses = []
+        for item in items:
+            row = rows.get(item.path)
+            if row and row[0] == item.size and row[1] == item.mtime and row[2] == self.backend:
+                found[item.path] = json.loads(row[3])
+            else:
+                misses.append(item)
+        self.hits += len(found)
+        self.misses += len(misses)
+        cache_lookups.inc(len(found), cache="features", result="hit")
+        cache_lookups.inc(len(misses), cache="features", result="miss")
+        return found, misses
+
+    def store(self, results: List[Tuple[ItemRecord, Dict[str, Any]]]):
+        rows = [(item.path, item.size, item.mtime, self.backend, json.dumps(features, ensure_ascii=False))
+                for item, features in results if "error" not in features]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO features (path, size, mtime, backend, features) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            conn.commit()
+
+    async def extract(self, items: List[ItemRecord]) -> Dict[str, Dict[str, Any]]:
+        """Features dos arquivos de `items` (pastas são ignoradas): do cache ou extraídas no pool."""
+        files = [item for item in items if item.type == "file"]
+        if not (self.enabled and files):
+            return {}
+        features, misses = await asyncio.to_thread(self.lookup, files)
+        if not misses:
+            return features
+        loop = asyncio.get_running_loop()
+        pool = self._executor()
+        batches = [misses[i:i + EXTRACT_BATCH] for i in range(0, len(misses), EXTRACT_BATCH)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, extract_batch, [(item.path, item.size) for item in batch], self.options)
+            for batch in batches
+        ))
+        extracted = [(item, result) for batch, batch_results in zip(batches, results) for item, result in zip(batch, batch_results)]
+        await asyncio.to_thread(self.store, extracted)
+        features.update((item.path, result) for item, result in extracted)
+        return features
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM features").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend,
+            "workers": self.workers,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Extrator compartilhado pelo processo do hub.
+feature_extractor = process_resource(f"{__name__}.feature_extractor", FeatureExtractor)
@@ -3,200 +3,511 @@
 import os
 import json
 import uuid
+import asyncio
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Tuple, Any
-import google.generativeai as genai
+from typing import Dict, List, Tuple, Any, Callable, Awaitable
 from fastmcp import FastMCP, Context
 
-# --- Regras de categorização rápida permanecem, são muito eficientes. ---
-RULES = {
-    "Imagens": {"extensions": [".jpg", ".jpeg", ".png", ".gif", ".svg", ".bmp", ".tiff"]},
-    "Documentos": {"extensions": [".pdf", ".docx", ".doc", ".txt", ".md", ".odt"]},
-    "Vídeos": {"extensions": [".mp4", ".mov", ".avi", ".mkv"]},
-    "Instaladores": {"extensions": [".exe", ".msi", ".dmg"]},
-    "Arquivos Compactados": {"extensions": [".zip", ".rar", ".7z", ".tar.gz", ".gz"]}
-}
-
-def _apply_rules(items: List[Dict]) -> Tuple[Dict[str, str], List[Dict]]:
-    categorized_by_rules = {}
-    remaining_items = []
-    for item in items:
-        if item.get("type") == "file":
-            path = Path(item['path'])
-            ext = ''.join(path.suffixes).lower()
-            categorized = False
-            for category, rule in RULES.items():
-                if ext in rule.get("extensions", []):
-                    categorized_by_rules[item['path']] = category
-                    categorized = True
-                    break
-            if not categorized:
-                remaining_items.append(item)
-        else:
-            remaining_items.append(item)
-    return categorized_by_rules, remaining_items
+from agents.file_organizer.records import ItemRecord, as_records
+from agents.file_organizer.scanner import scan_directory
+from agents.file_organizer.rules import rule_engine
+from agents.file_organizer import executor
+from agents.file_organizer.category_cache import category_cache
+from agents.file_organizer.extraction import feature_extractor
+from agents.file_organizer.watcher import live_index
+from hivemind_core.streams import stream_broker, MessageStream
+from hivemind_core.dispatch import call_tool
+from hivemind_core.prompt_manager import prompt_manager, estimate_tokens
+from hivemind_core.model_backend import model_backend
+from hivemind_core.telemetry import span, cache_lookups
+
+def _apply_rules(items: List[ItemRecord]) -> Tuple[Dict[str, str], List[ItemRecord]]:
+    """Categoriza pelo motor de regras compilado; o restante segue para o cache/IA."""
+    return rule_engine.classify_batch(items)
+
+async def _apply_content_rules(items: List[ItemRecord], ctx: Context) -> Tuple[Dict[str, str], List[ItemRecord]]:
+    """Extrai features de conteúdo (pool de processos, com cache) e aplica as regras de conteúdo."""
+    if not (feature_extractor.enabled and items):
+        return {}, items
+    try:
+        features = await feature_extractor.extract(items)
+    except Exception as e:
+        await ctx.log(f"Extração de conteúdo indisponível, seguindo sem ela: {e}", level="warning")
+        return {}, items
+    return rule_engine.classify_by_content(items, features)
 
 # --- Configuração do Agente ---
 mcp = FastMCP(name="FileOrganizerAgent")
 
-async def _get_item_details(item_path: Path, ctx: Context) -> Dict[str, Any]:
-    details = {"path": str(item_path)}
+async def _scan(directory_path: str, recursive: bool, ctx: Context) -> Tuple[List[ItemRecord], Dict[str, int]]:
+    """Executa o scanner incremental fora do event loop e registra as estatísticas do índice.
+
+    Se o diretório estiver sob uma raiz observada, lê o snapshot do índice vivo sem tocar o disco.
+    """
+    await asyncio.to_thread(live_index.watch_from_env)
+    snapshot = await asyncio.to_thread(live_index.snapshot, directory_path, recursive)
+    if snapshot is not None:
+        await ctx.log(f"Usando índice vivo (versão {live_index.version}): {len(snapshot)} itens, sem escaneamento.", level="info")
+        return snapshot, {"source": "watch", "cached": len(snapshot), "restat": 0, "version": live_index.version}
     try:
-        if item_path.is_dir():
-            details["type"] = "folder"
-            peek_contents = [p.name for p in item_path.iterdir() if not p.name.startswith('.')]
-            details["sample_contents"] = peek_contents[:10]
-        elif item_path.is_file():
-            details["type"] = "file"
+        items, stats = await asyncio.to_thread(scan_directory, directory_path, recursive)
     except Exception as e:
-        await ctx.log(f"Não foi possível acessar {item_path}: {e}", level="warning")
-        details["type"] = "inaccessible"
-    return details
+        await ctx.log(f"Erro ao escanear diretório: {e}", level="error")
+        return [], {}
+    stats_dict = stats.as_dict()
+    cache_lookups.inc(stats.dirs_cached, cache="scan_index", result="hit")
+    cache_lookups.inc(stats.dirs_read, cache="scan_index", result="miss")
+    await ctx.log(
+        f"Escaneamento concluído. {len(items)} itens detalhados "
+        f"({stats.cached} do índice, {stats.restat} re-stat'ados).",
+        level="info"
+    )
+    return items, stats_dict
 
 @mcp.tool
-async def _scan_and_detail_root_level(directory_path: str, ctx: Context) -> list[dict]:
-    await ctx.log(f"Iniciando escaneamento superficial em: {directory_path}", level="info")
-    root = Path(directory_path).expanduser().resolve()
-    detailed_items = []
+async def _scan_and_detail_root_level(directory_path: str, ctx: Context, recursive: bool = False) -> list[dict]:
+    modo = "recursivo" if recursive else "superficial"
+    await ctx.log(f"Iniciando escaneamento {modo} em: {directory_path}", level="info")
+    items, _ = await _scan(directory_path, recursive, ctx)
+    return [item.to_dict() for item in items]
+
+@mcp.tool
+async def watch_directory(directory_path: str, ctx: Context) -> dict:
+    """Passa a observar um diretório: planos futuros nele usam o índice vivo em vez de reescanear."""
     try:
-        for item_path in root.iterdir():
-            if item_path.name.startswith('.'):
-                continue
-            details = await _get_item_details(item_path, ctx)
-            detailed_items.append(details)
+        result = await asyncio.to_thread(live_index.watch, directory_path)
     except Exception as e:
-        await ctx.log(f"Erro ao escanear diretório: {e}", level="error")
-        return []
-    await ctx.log(f"Escaneamento superficial concluído. {len(detailed_items)} itens detalhados.", level="info")
-    return detailed_items
+        await ctx.log(f"Não foi possível observar '{directory_path}': {e}", level="error")
+        return {"status": "error", "message": str(e)}
+    await ctx.log(f"Observando '{result['root']}' ({result['directories']} pastas indexadas).", level="info")
+    return {"status": "watching", **result}
 
 @mcp.tool
-async def _categorize_with_llm(user_goal: str, items_to_categorize: list, ctx: Context) -> Dict[str, str]:
-    if not items_to_categorize:
-        return {}
-    await ctx.log(f"Iniciando categorização com IA para {len(items_to_categorize)} itens...", level="info")
-    prompt = f"""
-    Você é um especialista em organização de arquivos. Sua tarefa é categorizar a seguinte lista de itens com base no objetivo do usuário e nas pistas fornecidas.
-    **Objetivo do Usuário:** "{user_goal}"
-    **Itens para Categorizar:**
-    ```json
-    {json.dumps(items_to_categorize, indent=2)}
-    ```
-    **Instruções:**
-    1. Analise cada item no JSON. Para "folder", use `sample_contents`. Para "file", use o nome/extensão.
-    2. Crie nomes de categoria lógicos (ex: "Projetos Python", "Documentos Fiscais", "Fotos de Viagem").
-    3. Se um item não tiver categoria clara, atribua a categoria "_a_revisar".
-    4. Sua resposta deve ser **APENAS** um único objeto JSON onde a chave é o caminho completo do item (`path`) e o valor é a string da categoria de destino.
-    **Exemplo de Saída JSON:**
-    ```json
-    {{
-      "/path/to/downloads/my-node-project": "Projetos Web",
-      "/path/to/downloads/relatorio.pdf": "Documentos",
-      "/path/to/downloads/fotos_ferias": "Fotos de Viagem"
-    }}
-    ```
-    """
+async def unwatch_directory(directory_path: str, ctx: Context) -> dict:
+    """Deixa de observar um diretório registrado com watch_directory."""
+    removed = await asyncio.to_thread(live_index.unwatch, directory_path)
+    return {"status": "unwatched" if removed else "not_watched", "watched_roots": live_index.watched_roots()}
+
+# --- Categorização com IA em blocos ---
+LLM_MODEL_NAME = 'gemini-1.5-flash'
+LLM_CHUNK_MAX_ITEMS = int(os.getenv("FILE_ORGANIZER_LLM_CHUNK_ITEMS", "150"))
+# Orçamento de tokens estimados das linhas de itens de um bloco (ver `hivemind_core.prompt_manager.estimate_tokens`).
+LLM_CHUNK_MAX_TOKENS = int(os.getenv("FILE_ORGANIZER_LLM_CHUNK_TOKENS", "6000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("FILE_ORGANIZER_LLM_CONCURRENCY", "4"))
+LLM_MAX_ATTEMPTS = int(os.getenv("FILE_ORGANIZER_LLM_ATTEMPTS", "3"))
+
+CATEGORIZATION_PROMPT = "file-categorizer"
+
+def _common_root(items: List[ItemRecord]) -> str:
+    """Pasta comum a todos os itens; os caminhos no prompt são relativos a ela."""
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = await model.generate_content_async(prompt)
-        json_str = response.text.strip()
-        if json_str.startswith('```json'):
-            json_str = json_str[7:-3].strip()
-        categorization_map = json.loads(json_str)
-        await ctx.log(f"Categorização com IA concluída. {len(categorization_map)} itens categorizados.", level="info")
-        return categorization_map
-    except Exception as e:
+        return os.path.commonpath([os.path.dirname(item.path.rstrip("/\\")) for item in items])
+    except ValueError:
+        # Caminhos em unidades diferentes ou misturando absolutos e relativos.
+        return ""
+
+def _item_row(index: int, item: ItemRecord, root: str) -> str:
+    """Linha compacta `índice|tipo|caminho relativo|amostra` do prompt de categorização."""
+    path = item.path.rstrip("/\\")
+    relative = os.path.relpath(path, root) if root else path
+    row = f"{index}|{'f' if item.type == 'file' else 'd'}|{relative}"
+    if item.sample_contents:
+        row += "|" + ",".join(item.sample_contents)
+    return row
+
+def _chunk_items(items: List[ItemRecord], max_items: int = LLM_CHUNK_MAX_ITEMS, max_tokens: int = LLM_CHUNK_MAX_TOKENS) -> List[List[ItemRecord]]:
+    """Divide os itens em blocos limitados por quantidade e pelos tokens estimados das suas linhas no prompt."""
+    root = _common_root(items)
+    chunks, current, current_tokens = [], [], 0
+    for item in items:
+        item_tokens = estimate_tokens(_item_row(len(current), item, root)) + 1
+        if current and (len(current) >= max_items or current_tokens + item_tokens > max_tokens):
+            chunks.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += item_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _build_categorization_prompt(user_goal: str, items: List[ItemRecord], known_categories: List[str]) -> str:
+    """Prompt compacto: raiz comum removida, um item por linha identificado pelo índice no bloco."""
+    root = _common_root(items)
+    categories_hint = ""
+    if known_categories:
+        categories_hint = (
+            "Categorias já usadas em outros lotes (reutilize-as quando fizer sentido, com a mesma grafia): "
+            f"{json.dumps(known_categories, ensure_ascii=False, separators=(',', ':'))}\n"
+        )
+    prompt = prompt_manager.format_prompt(
+        CATEGORIZATION_PROMPT,
+        user_goal=user_goal,
+        root_directory=root or "(caminhos absolutos)",
+        items_table="\n".join(_item_row(index, item, root) for index, item in enumerate(items)),
+        categories_hint=categories_hint,
+    )
+    if prompt is None:
+        raise RuntimeError(f"Prompt '{CATEGORIZATION_PROMPT}' não encontrado em {prompt_manager.base_path}.")
+    return prompt
+
+def _parse_categorization(response_text: str) -> Dict[str, Any]:
+    """Extrai o objeto JSON da resposta, tolerando blocos de código markdown."""
+    json_str = response_text.strip()
+    if json_str.startswith('```'):
+        json_str = json_str.split('\n', 1)[1] if '\n' in json_str else json_str[3:]
+        if json_str.rstrip().endswith('```'):
+            json_str = json_str.rstrip()[:-3]
+    parsed = json.loads(json_str)
+    if not isinstance(parsed, dict):
+        raise ValueError(f"Esperado um objeto JSON, recebido {type(parsed).__name__}.")
+    return parsed
+
+def _map_categorization(parsed: Dict[str, Any], chunk: List[ItemRecord]) -> Tuple[Dict[str, str], int]:
+    """Converte a resposta (categoria -> índices) em caminho -> categoria. Retorna também quantos índices eram inválidos.
+
+    Também aceita o formato índice -> categoria, caso o modelo o use.
+    """
+    result: Dict[str, str] = {}
+    invalid = 0
+
+    def assign(index: Any, category: Any):
+        nonlocal invalid
+        try:
+            position = int(index)
+        except (TypeError, ValueError):
+            invalid += 1
+            return
+        if 0 <= position < len(chunk):
+            result[chunk[position].path] = str(category)
+        else:
+            invalid += 1
+
+    for key, value in parsed.items():
+        if isinstance(value, list):
+            for index in value:
+                assign(index, key)
+        else:
+            assign(key, value)
+    return result, invalid
+
+async def _categorize_chunk(
+    user_goal: str, chunk: List[ItemRecord], chunk_number: int, known_categories: set,
+    semaphore: asyncio.Semaphore, ctx: Context
+) -> Dict[str, str] | None:
+    """Categoriza um bloco. Retorna None se a chamada falhar ou o JSON não puder ser lido."""
+    async with semaphore:
+        prompt = _build_categorization_prompt(user_goal, chunk, sorted(known_categories))
+        await ctx.log(f"Lote {chunk_number}: {len(chunk)} itens, ~{estimate_tokens(prompt)} tokens de entrada.", level="debug")
         response_text = "N/A"
-        if 'response' in locals() and hasattr(response, 'text'):
-            response_text = response.text
-        # LOG DE ERRO MELHORADO:
-        await ctx.log(f"!!!!!! ERRO CRÍTICO AO CATEGORIZAR COM IA !!!!!!", level="error")
-        await ctx.log(f"Erro: {e}", level="error")
-        await ctx.log(f"Resposta recebida da API que causou o erro: {response_text}", level="error")
+        try:
+            response_text = await model_backend.generate(LLM_MODEL_NAME, prompt)
+            parsed = _parse_categorization(response_text)
+        except Exception as e:
+            await ctx.log(f"Falha ao categorizar o lote {chunk_number} ({len(chunk)} itens): {e}", level="error")
+            await ctx.log(f"Resposta recebida da API para o lote {chunk_number}: {response_text[:500]}", level="debug")
+            return None
+
+    result, invalid = _map_categorization(parsed, chunk)
+    problems = []
+    if len(result) < len(chunk):
+        problems.append(f"{len(chunk) - len(result)} itens sem categoria na resposta")
+    if invalid:
+        problems.append(f"{invalid} índices inválidos ignorados")
+    if problems:
+        await ctx.log(f"Lote {chunk_number}: {'; '.join(problems)}.", level="warning")
+    known_categories.update(c for c in result.values() if c != "_a_revisar")
+    return result
+
+async def _categorize_items(
+    user_goal: str, items_to_categorize: List[ItemRecord], ctx: Context,
+    max_concurrency: int = LLM_MAX_CONCURRENCY,
+    on_chunk: Callable[[List[ItemRecord], Dict[str, str]], Awaitable[None]] | None = None
+) -> Dict[str, str]:
+    """Categoriza os itens em blocos concorrentes, repetindo apenas os blocos que falharem.
+
+    O primeiro bloco roda sozinho para semear as categorias; os seguintes recebem
+    as categorias já criadas para manter os nomes consistentes entre blocos.
+    Se `on_chunk` for informado, é chamado com (itens, resultado) assim que cada bloco termina.
+    """
+    if not items_to_categorize:
         return {}
+    chunks = _chunk_items(items_to_categorize)
+    await ctx.log(
+        f"Iniciando categorização com IA para {len(items_to_categorize)} itens "
+        f"em {len(chunks)} lotes (até {max_concurrency} simultâneos)...",
+        level="info"
+    )
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    known_categories: set = set()
+    categorization_map: Dict[str, str] = {}
+    pending = list(enumerate(chunks, start=1))
+
+    async def run_chunk(number: int, chunk: List[ItemRecord]) -> bool:
+        result = await _categorize_chunk(user_goal, chunk, number, known_categories, semaphore, ctx)
+        if result is None:
+            return False
+        categorization_map.update(result)
+        if on_chunk is not None:
+            await on_chunk(chunk, result)
+        return True
+
+    for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
+        if attempt > 1:
+            await ctx.log(f"Repetindo {len(pending)} lotes que falharam (tentativa {attempt}/{LLM_MAX_ATTEMPTS})...", level="warning")
+            await asyncio.sleep(0.5 * (attempt - 1))
+        failed = []
+        if not known_categories and len(pending) > 1:
+            number, chunk = pending[0]
+            if not await run_chunk(number, chunk):
+                failed.append((number, chunk))
+            batch = pending[1:]
+        else:
+            batch = pending
+        results = await asyncio.gather(*(run_chunk(number, chunk) for number, chunk in batch))
+        failed.extend(entry for entry, ok in zip(batch, results) if not ok)
+        pending = failed
+        if not pending:
+            break
+
+    if pending:
+        lost = sum(len(chunk) for _, chunk in pending)
+        await ctx.log(f"!!!!!! {len(pending)} lotes ({lost} itens) não puderam ser categorizados pela IA !!!!!!", level="error")
+    await ctx.log(f"Categorização com IA concluída. {len(categorization_map)} itens categorizados.", level="info")
+    return categorization_map
 
-# --- A CORREÇÃO PRINCIPAL ESTÁ AQUI ---
 @mcp.tool
-async def _build_plan(root_directory: str, categorization_map: Dict[str, str], ctx: Context) -> Dict:
-    """Constrói um plano de ações (CREATE, MOVE) a partir de um mapa de categorização."""
-    await ctx.log("Construindo plano de execução a partir das categorias...", level="info")
+async def _categorize_with_llm(user_goal: str, items_to_categorize: list, ctx: Context, max_concurrency: int = LLM_MAX_CONCURRENCY) -> Dict[str, str]:
+    """Categoriza os itens com a IA em blocos concorrentes (ver `_categorize_items`)."""
+    return await _categorize_items(user_goal, as_records(items_to_categorize), ctx, max_concurrency)
+
+@mcp.tool
+async def get_categorization_cache_stats(ctx: Context) -> dict:
+    """Retorna acertos, faltas e tamanho do cache de categorização."""
+    return await asyncio.to_thread(category_cache.stats)
+
+@mcp.tool
+async def get_extraction_stats(ctx: Context) -> dict:
+    """Estatísticas da etapa de extração de conteúdo e do seu cache de features."""
+    return await asyncio.to_thread(feature_extractor.stats)
+
+@mcp.tool
+async def invalidate_categorization_cache(ctx: Context, user_goal: str | None = None) -> dict:
+    """Remove do cache as categorias de um objetivo (ou todas, se nenhum objetivo for informado)."""
+    removed = await asyncio.to_thread(category_cache.invalidate, user_goal)
+    await ctx.log(f"Cache de categorização: {removed} entradas removidas.", level="info")
+    return {"status": "success", "removed": removed}
+
+def _safe_category_name(category: str) -> str:
+    return category.replace("/", "-").replace("\\", "-").strip()
+
+def _move_step(item: ItemRecord, dest_folder: Path) -> Dict | None:
+    if item.type == "folder":
+        # O destino de uma pasta é a pasta da categoria PAI.
+        # O executor moverá a pasta original para DENTRO dela.
+        return {"action": "MOVE_FOLDER", "from": item.path, "to": str(dest_folder)}
+    if item.type == "file":
+        # O destino de um arquivo é o caminho completo DENTRO da pasta de categoria.
+        return {"action": "MOVE_FILE", "from": item.path, "to": str(dest_folder / item.name)}
+    return None
+
+def _plan_from_categories(root_directory: str, categorization_map: Dict[str, str], items_by_path: Dict[str, ItemRecord]) -> Dict:
+    """Monta o plano só com os metadados do scan, sem nenhum acesso ao filesystem.
+
+    Chaves do mapa que não correspondem a um item escaneado (ex: caminhos inventados
+    ou alterados pela IA) não viram passos: são listadas em `unmatched_paths`.
+    """
     steps = []
     root_dir = Path(root_directory)
     destination_categories = set(cat for cat in categorization_map.values() if cat != "_a_revisar")
 
     # 1. Criar as pastas de destino
     for category in sorted(list(destination_categories)):
-        safe_category_name = category.replace("/", "-").replace("\\", "-").strip()
+        safe_category_name = _safe_category_name(category)
         if not safe_category_name: continue
         dest_path = root_dir / safe_category_name
         steps.append({"action": "CREATE_FOLDER", "path": str(dest_path)})
 
     # 2. Criar as ações de movimento
+    unmatched_paths = []
     for original_path_str, category in categorization_map.items():
         if category == "_a_revisar": continue
-        
-        original_path = Path(original_path_str)
-        safe_category_name = category.replace("/", "-").replace("\\", "-").strip()
-        dest_folder = root_dir / safe_category_name
-        
-        # LÓGICA CORRIGIDA:
-        if original_path.is_dir():
-            # O destino de uma pasta é a pasta da categoria PAI.
-            # O executor (ex: shutil.move) moverá a pasta original para DENTRO dela.
-            # ANTES (ERRADO): "to": str(dest_folder / original_path.name)
-            # AGORA (CORRETO): "to": str(dest_folder)
-            steps.append({
-                "action": "MOVE_FOLDER",
-                "from": str(original_path),
-                "to": str(dest_folder) 
-            })
-        elif original_path.is_file():
-            # O destino de um arquivo é o caminho completo DENTRO da pasta de categoria.
-            steps.append({
-                "action": "MOVE_FILE",
-                "from": str(original_path),
-                "to": str(dest_folder / original_path.name)
-            })
-
-    plan_object = {
+
+        item = items_by_path.get(original_path_str)
+        if item is None:
+            unmatched_paths.append(original_path_str)
+            continue
+        step = _move_step(item, root_dir / _safe_category_name(category))
+        if step is not None:
+            steps.append(step)
+
+    return {
         "objective": f"Plano para executar {len(steps)} ações em {len(destination_categories)} categorias.",
         "steps": steps,
-        "root_directory": root_directory
+        "root_directory": root_directory,
+        "unmatched_paths": unmatched_paths
     }
-    await ctx.log(f"Plano de execução construído com {len(steps)} passos.", level="info")
+
+PLAN_CHUNK_STEPS = int(os.getenv("FILE_ORGANIZER_PLAN_CHUNK_STEPS", "500"))
+
+class _StreamingPlanBuilder:
+    """Emite os passos do plano em blocos (`plan_chunk`) à medida que as categorias chegam.
+
+    Não guarda os passos já enviados, apenas contadores: a memória não cresce com o
+    tamanho do diretório. A pasta de uma categoria é criada no primeiro bloco em que
+    ela aparece, antes dos movimentos para dentro dela.
+    """
+
+    def __init__(self, root_directory: str, items_by_path: Dict[str, ItemRecord], stream: MessageStream,
+                 chunk_steps: int = PLAN_CHUNK_STEPS):
+        self.root_dir = Path(root_directory)
+        self.items_by_path = items_by_path
+        self.stream = stream
+        self.chunk_steps = max(1, chunk_steps)
+        self.categories: set = set()
+        self.unmatched_paths: List[str] = []
+        self.step_count = 0
+        self.chunks_sent = 0
+        self._buffer: List[Dict] = []
+
+    async def add(self, categorization_map: Dict[str, str], source: str):
+        for original_path_str, category in categorization_map.items():
+            if category == "_a_revisar": continue
+            item = self.items_by_path.get(original_path_str)
+            if item is None:
+                self.unmatched_paths.append(original_path_str)
+                continue
+            safe_category_name = _safe_category_name(category)
+            dest_folder = self.root_dir / safe_category_name
+            if category not in self.categories:
+                self.categories.add(category)
+                if safe_category_name:
+                    self._buffer.append({"action": "CREATE_FOLDER", "path": str(dest_folder)})
+            step = _move_step(item, dest_folder)
+            if step is not None:
+                self._buffer.append(step)
+            if len(self._buffer) >= self.chunk_steps:
+                await self.flush(source)
+        await self.flush(source)
+
+    async def flush(self, source: str):
+        if not self._buffer:
+            return
+        steps, self._buffer = self._buffer, []
+        self.step_count += len(steps)
+        self.chunks_sent += 1
+        # `send` aguarda enquanto o consumidor estiver atrasado (backpressure).
+        await self.stream.send({"type": "plan_chunk", "seq": self.chunks_sent, "source": source, "steps": steps})
+
+    def summary(self, root_directory: str) -> Dict:
+        return {
+            "objective": f"Plano para executar {self.step_count} ações em {len(self.categories)} categorias.",
+            "root_directory": root_directory,
+            "step_count": self.step_count,
+            "chunk_count": self.chunks_sent,
+            "categories": sorted(self.categories),
+            "unmatched_paths": self.unmatched_paths,
+            "streamed": True
+        }
+
+@mcp.tool
+async def _build_plan(root_directory: str, categorization_map: Dict[str, str], items: list, ctx: Context) -> Dict:
+    """Constrói um plano de ações (CREATE, MOVE) a partir de um mapa de categorização e dos itens escaneados."""
+    await ctx.log("Construindo plano de execução a partir das categorias...", level="info")
+    items_by_path = {item.path: item for item in as_records(items)}
+    plan_object = _plan_from_categories(root_directory, categorization_map, items_by_path)
+    if plan_object["unmatched_paths"]:
+        await ctx.log(
+            f"{len(plan_object['unmatched_paths'])} caminhos retornados pela categorização não correspondem "
+            f"a itens escaneados e foram ignorados: {plan_object['unmatched_paths'][:5]}",
+            level="warning"
+        )
+    await ctx.log(f"Plano de execução construído com {len(plan_object['steps'])} passos.", level="info")
     return plan_object
 
 @mcp.tool
-async def generate_organization_plan(directory_path: str, user_goal: str, ctx: Context) -> dict:
-    """Orquestra o processo completo e RÁPIDO de geração de um plano de organização."""
+async def generate_organization_plan(directory_path: str, user_goal: str, ctx: Context, recursive: bool = False, stream_id: str | None = None) -> dict:
+    """Orquestra o processo completo e RÁPIDO de geração de um plano de organização.
+
+    Com `stream_id` (um stream aberto em `hivemind_core.streams`), os passos são enviados
+    em blocos `plan_chunk` conforme ficam prontos — regras primeiro, depois cache e cada
+    lote da IA — e o retorno traz apenas o resumo do plano.
+    """
     await ctx.log(f"Iniciando geração de plano para: '{directory_path}'", level="info")
+    stream = stream_broker.get(stream_id)
+    if stream_id and stream is None:
+        await ctx.log(f"Stream '{stream_id}' não encontrado; o plano será retornado inteiro.", level="warning")
     
-    items_to_process = await _scan_and_detail_root_level.fn(directory_path=directory_path, ctx=ctx)
+    # Um span por etapa: o tempo de cada uma aparece em /traces e em hivemind_span_duration_seconds.
+    with span("plan.scan", recursive=recursive) as active:
+        items_to_process, scan_stats = await _scan(directory_path, recursive, ctx)
+        active.set_attribute("items", len(items_to_process))
     if not items_to_process:
         return {"status": "completed", "message": "Nenhum arquivo ou pasta encontrado na raiz do diretório.", "plan": None}
+
+    builder = None
+    if stream is not None:
+        builder = _StreamingPlanBuilder(directory_path, {item.path: item for item in items_to_process}, stream)
     
-    rule_map, items_for_llm = _apply_rules(items_to_process)
+    with span("plan.rules", items=len(items_to_process)):
+        rule_map, items_for_llm = _apply_rules(items_to_process)
     await ctx.log(f"{len(rule_map)} arquivos categorizados por regras.", level="info")
+    if builder:
+        await builder.add(rule_map, "rules")
+
+    with span("plan.content", items=len(items_for_llm)):
+        content_map, items_for_llm = await _apply_content_rules(items_for_llm, ctx)
+    if content_map:
+        await ctx.log(f"{len(content_map)} arquivos categorizados pelo conteúdo; {len(items_for_llm)} restantes.", level="info")
+        rule_map = {**rule_map, **content_map}
+        if builder:
+            await builder.add(content_map, "content")
+
+    with span("plan.cache", items=len(items_for_llm)):
+        cached_map, items_for_llm = await asyncio.to_thread(category_cache.lookup, items_for_llm, user_goal)
+    if cached_map:
+        await ctx.log(f"{len(cached_map)} itens categorizados pelo cache; {len(items_for_llm)} seguem para a IA.", level="info")
+        if builder:
+            await builder.add(cached_map, "cache")
+
+    async def on_llm_chunk(chunk: List[ItemRecord], result: Dict[str, str]):
+        # Cada lote vai para o cache assim que termina: uma falha nos lotes seguintes não perde o trabalho.
+        await asyncio.to_thread(category_cache.store, chunk, result, user_goal)
+        if builder:
+            await builder.add(result, "llm")
 
     llm_map = {}
     if items_for_llm:
-        llm_map = await _categorize_with_llm.fn(user_goal=user_goal, items_to_categorize=items_for_llm, ctx=ctx)
+        with span("plan.llm", items=len(items_for_llm)):
+            llm_map = await _categorize_items(user_goal, items_for_llm, ctx, on_chunk=on_llm_chunk)
     
-    full_categorization_map = {**rule_map, **llm_map}
-    if not full_categorization_map:
+    if not (rule_map or cached_map or llm_map):
         await ctx.log("O mapa de categorização final está vazio. Nenhum item foi categorizado por regras ou pela IA. Interrompendo.", level="error")
         return {"status": "error", "message": "Não foi possível categorizar nenhum item. Verifique os logs para erros da IA.", "plan": None}
 
-    plan = await _build_plan.fn(root_directory=directory_path, categorization_map=full_categorization_map, ctx=ctx)
+    if builder:
+        plan = builder.summary(directory_path)
+        step_count = plan["step_count"]
+        if plan["unmatched_paths"]:
+            await ctx.log(
+                f"{len(plan['unmatched_paths'])} caminhos retornados pela categorização não correspondem "
+                f"a itens escaneados e foram ignorados: {plan['unmatched_paths'][:5]}",
+                level="warning"
+            )
+        await ctx.log(f"Plano transmitido em {plan['chunk_count']} blocos com {step_count} passos.", level="info")
+    else:
+        full_categorization_map = {**rule_map, **cached_map, **llm_map}
+        with span("plan.build", items=len(items_to_process)):
+            plan = await _build_plan.fn(root_directory=directory_path, categorization_map=full_categorization_map, items=items_to_process, ctx=ctx)
+        step_count = len(plan.get('steps', []))
     
     try:
-        # CORREÇÃO: A chamada de uma ferramenta a partir de outra ferramenta usa `ctx.call_tool` diretamente.
-        # O atributo `.hub` não é mais necessário e a ferramenta `post_entry` espera os args aninhados.
-        await ctx.call_tool("post_entry", { "entry": {
+        # Chamada direta, no mesmo processo, à ferramenta `post_entry` do hub (args aninhados em "entry").
+        # No modo streaming, apenas o resumo do plano é registrado.
+        await call_tool(ctx, "post_entry", { "entry": {
             "entry_id": str(uuid.uuid4()), "agent_name": mcp.name,
             "entry_type": "ORGANIZATION_PLAN", "timestamp": datetime.utcnow().isoformat(),
-            "content": f"Plano gerado para '{Path(directory_path).name}'. Passos: {len(plan.get('steps', []))}",
+            "content": f"Plano gerado para '{Path(directory_path).name}'. Passos: {step_count}",
             "context": {"directory": directory_path, "goal": user_goal, "plan": plan},
             "tags": ["organization", "planning", "suggestion"], "utility_score": 0.0, "references_entry_id": None
         }})
@@ -204,7 +515,68 @@ async def generate_organization_plan(directory_path: str, user_goal: str, ctx: C
     except Exception as e:
          await ctx.log(f"Aviso: Falha ao registrar plano no Hive Mind: {e}", level="warning")
 
-    return {"status": "plan_generated", "plan": plan}
+    if builder:
+        return {"status": "plan_streamed", "plan": plan, "scan_stats": scan_stats}
+    return {"status": "plan_generated", "plan": plan, "scan_stats": scan_stats}
+
+def _progress_reporter(ctx: Context):
+    async def report(done: int, total: int, message: str):
+        await ctx.report_progress(done, total, message)
+    return report
+
+@mcp.tool
+async def execute_plan(plan: dict, ctx: Context, max_workers: int = executor.MAX_COPY_WORKERS, on_conflict: str = "abort") -> dict:
+    """Executa um plano gerado por generate_organization_plan, registrando tudo em um journal.
+
+    Renomeações no mesmo filesystem são feitas diretamente; cópias entre dispositivos rodam
+    em um pool de threads limitado. Colisões são detectadas antes de qualquer movimento:
+    com on_conflict="abort" (padrão) nada é movido, com "skip" os itens em conflito são pulados.
+    """
+    steps = plan.get("steps") or []
+    await ctx.log(f"Executando plano com {len(steps)} passos...", level="info")
+    try:
+        result = await executor.execute_plan(plan, max_workers, on_conflict, _progress_reporter(ctx))
+    except Exception as e:
+        await ctx.log(f"Erro ao executar plano: {e}", level="error")
+        return {"status": "error", "message": str(e)}
+    if result["status"] == "conflict":
+        await ctx.log(f"Execução abortada: {len(result['conflicts'])} conflitos detectados antes de mover.", level="error")
+    else:
+        await ctx.log(
+            f"Plano executado ({result['status']}): {result['renamed']} renomeados, {result['copied']} copiados, "
+            f"{len(result['failures'])} falhas. Journal: {result['journal_id']}",
+            level="info" if result["status"] == "completed" else "warning"
+        )
+    return result
+
+@mcp.tool
+async def resume_plan(journal_id: str, ctx: Context, max_workers: int = executor.MAX_COPY_WORKERS, on_conflict: str = "abort") -> dict:
+    """Retoma a execução de um plano aplicado parcialmente a partir do seu journal.
+
+    Os movimentos pendentes são verificados de novo: com on_conflict="abort" (padrão) nada é
+    movido se algum destino passou a existir, com "skip" esses itens são pulados.
+    """
+    try:
+        result = await executor.resume_plan(journal_id, max_workers, on_conflict, _progress_reporter(ctx))
+    except (executor.JournalError, ValueError) as e:
+        await ctx.log(str(e), level="error")
+        return {"status": "error", "message": str(e)}
+    if result["status"] == "conflict":
+        await ctx.log(f"Retomada abortada: {len(result['conflicts'])} conflitos nos movimentos pendentes.", level="error")
+    else:
+        await ctx.log(f"Plano retomado ({result['status']}): {result['moved']} itens no destino.", level="info")
+    return result
+
+@mcp.tool
+async def rollback_plan(journal_id: str, ctx: Context) -> dict:
+    """Desfaz um plano executado (total ou parcialmente) usando o seu journal."""
+    try:
+        result = await executor.rollback_plan(journal_id, _progress_reporter(ctx))
+    except executor.JournalError as e:
+        await ctx.log(str(e), level="error")
+        return {"status": "error", "message": str(e)}
+    await ctx.log(f"Plano desfeito: {result['restored']} itens devolvidos, {result['removed_folders']} pastas removidas.", level="info")
+    return result
 
 def get_agent_mcp():
     return mcp
\ No newline at end of file
@@ -0,0 +1,52 @@
+# agents/file_organizer/records.py
+# Registro tipado e compacto de um item escaneado, carregado do scan até o plano.
+
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Iterable
+
+
+@dataclass(frozen=True, slots=True)
+class ItemRecord:
+    """Metadados de um item coletados uma única vez pelo scanner.
+
+    É imutável para poder ser compartilhado entre snapshots do índice vivo e
+    entre as etapas (regras, cache, IA, plano) sem cópias nem novos stats.
+    """
+
+    path: str
+    type: str
+    size: int = 0
+    mtime: float = 0.0
+    inode: int = 0
+    sample_contents: Optional[tuple] = None
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path.rstrip("/\\"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Formato de dicionário usado na fronteira das ferramentas MCP."""
+        data = {"path": self.path, "type": self.type}
+        if self.type != "inaccessible":
+            data.update(size=self.size, mtime=self.mtime, inode=self.inode)
+        if self.sample_contents is not None:
+            data["sample_contents"] = list(self.sample_contents)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ItemRecord":
+        samples = data.get("sample_contents")
+        return cls(
+            path=data["path"],
+            type=data.get("type", "inaccessible"),
+            size=data.get("size", 0) or 0,
+            mtime=data.get("mtime", 0.0) or 0.0,
+            inode=data.get("inode", 0) or 0,
+            sample_contents=tuple(samples) if samples is not None else None,
+        )
+
+
+def as_records(items: Iterable[Any]) -> List[ItemRecord]:
+    """Aceita registros ou dicionários (chamadas externas às ferramentas) e devolve registros."""
+    return [item if isinstance(item, ItemRecord) else ItemRecord.from_dict(item) for item in items]
@@ -0,0 +1,358 @@
+# agents/file_organizer/rules.py
+# Motor de regras compilado: tabelas de extensão, padrões de nome e predicados de tamanho/data.
+
+import os
+import re
+import json
+import time
+import fnmatch
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Any, Optional, Iterable
+
+import numpy as np
+
+from agents.file_organizer.records import ItemRecord
+
+# --- Regras de categorização rápida embutidas. ---
+# `content_types` usa os rótulos do magika (ver `extraction.py`) e vale para arquivos sem extensão conhecida.
+RULES = {
+    "Imagens": {"extensions": [".jpg", ".jpeg", ".png", ".gif", ".svg", ".bmp", ".tiff"],
+                "content_types": ["jpeg", "png", "gif", "svg", "bmp", "tiff", "webp"]},
+    "Documentos": {"extensions": [".pdf", ".docx", ".doc", ".txt", ".md", ".odt"],
+                   "content_types": ["pdf", "docx", "doc", "odt", "rtf", "markdown"]},
+    "Vídeos": {"extensions": [".mp4", ".mov", ".avi", ".mkv"], "content_types": ["mp4", "mov", "avi", "mkv", "webm"]},
+    "Instaladores": {"extensions": [".exe", ".msi", ".dmg"], "content_types": ["pebin", "msi", "dmg"]},
+    "Arquivos Compactados": {"extensions": [".zip", ".rar", ".7z", ".tar.gz", ".gz"],
+                             "content_types": ["zip", "rar", "7zip", "gzip", "tar", "bzip"]}
+}
+
+# Arquivos (ou pastas com *.json) de regras do usuário, separados por os.pathsep.
+RULES_PATH_ENV = "FILE_ORGANIZER_RULES"
+DEFAULT_RULES_DIR = Path(__file__).parent / "rules.d"
+RELOAD_INTERVAL_SECONDS = 1.0
+
+_DAY_SECONDS = 86400.0
+_PREDICATE_KEYS = ("glob", "regex", "min_size", "max_size", "older_than_days", "newer_than_days", "text_regex")
+
+
+class RuleError(ValueError):
+    """Regra do usuário inválida."""
+
+
+class _CompiledRule:
+    """Regra com padrões de nome e/ou predicados; avaliada na ordem em que foi declarada.
+
+    Regras com `content_types` ou `text_regex` dependem das features extraídas do conteúdo
+    e só são avaliadas em `RuleEngine.classify_by_content`.
+    """
+
+    __slots__ = ("category", "item_type", "extensions", "globs", "regexes",
+                 "min_size", "max_size", "older_than", "newer_than", "content_types", "text_regexes", "source")
+
+    def __init__(self, spec: Dict[str, Any], source: str):
+        if not isinstance(spec, dict):
+            raise RuleError(f"Regra inválida em {source}: esperado um objeto, recebido {type(spec).__name__}.")
+        self.source = source
+        self.category = spec.get("category")
+        if not isinstance(self.category, str) or not self.category.strip():
+            raise RuleError(f"Regra sem 'category' em {source}: {spec}")
+        self.item_type = spec.get("type", "file")
+        extensions = _as_list(spec.get("extensions"))
+        if not all(isinstance(ext, str) for ext in extensions):
+            raise RuleError(f"'extensions' da regra '{self.category}' ({source}) deve conter apenas textos.")
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        try:
+            # fnmatch.translate termina em \Z, então `match` equivale a casar o nome inteiro.
+            self.globs = [re.compile(fnmatch.translate(g), re.IGNORECASE) for g in _as_list(spec.get("glob"))]
+            self.regexes = [re.compile(r, re.IGNORECASE) for r in _as_list(spec.get("regex"))]
+            self.text_regexes = [re.compile(r, re.IGNORECASE) for r in _as_list(spec.get("text_regex"))]
+        except re.error as e:
+            raise RuleError(f"Expressão inválida na regra '{self.category}' ({source}): {e}")
+        # Validados aqui: um valor como "10MB" só falharia depois, em cada lote do numpy.
+        self.min_size = self._number(spec, "min_size")
+        self.max_size = self._number(spec, "max_size")
+        self.older_than = self._number(spec, "older_than_days")
+        self.newer_than = self._number(spec, "newer_than_days")
+        self.content_types = frozenset(str(t).lower() for t in _as_list(spec.get("content_types")))
+        if not (self.extensions or self.globs or self.regexes or self.has_numeric_predicates or self.needs_content):
+            raise RuleError(f"Regra '{self.category}' ({source}) não tem nenhum critério.")
+
+    def _number(self, spec: Dict[str, Any], key: str) -> Optional[float]:
+        value = spec.get(key)
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RuleError(f"'{key}' da regra '{self.category}' ({self.source}) deve ser um número, recebido {value!r}.")
+        return float(value)
+
+    @property
+    def has_numeric_predicates(self) -> bool:
+        return any(v is not None for v in (self.min_size, self.max_size, self.older_than, self.newer_than))
+
+    @property
+    def needs_content(self) -> bool:
+        return bool(self.content_types or self.text_regexes)
+
+    def matches_content(self, features: Dict[str, Any]) -> bool:
+        if self.content_types and features.get("content_type") not in self.content_types:
+            return False
+        if self.text_regexes:
+            excerpt = features.get("excerpt") or ""
+            if not any(p.search(excerpt) for p in self.text_regexes):
+                return False
+        return True
+
+    def numeric_mask(self, sizes: np.ndarray, mtimes: np.ndarray, now: float) -> np.ndarray:
+        """Avalia os predicados de tamanho e data para o lote inteiro de uma vez."""
+        mask = np.ones(len(sizes), dtype=bool)
+        if self.min_size is not None:
+            mask &= sizes >= self.min_size
+        if self.max_size is not None:
+            mask &= (sizes >= 0) & (sizes <= self.max_size)
+        if self.older_than is not None:
+            mask &= (mtimes > 0) & (mtimes <= now - self.older_than * _DAY_SECONDS)
+        if self.newer_than is not None:
+            mask &= mtimes >= now - self.newer_than * _DAY_SECONDS
+        return mask
+
+    def matches_name(self, name: str, suffixes: Iterable[str]) -> bool:
+        if self.extensions and not any(s in self.extensions for s in suffixes):
+            return False
+        if (self.globs or self.regexes) and not (
+            any(p.match(name) for p in self.globs) or any(p.search(name) for p in self.regexes)
+        ):
+            return False
+        return True
+
+
+class RuleEngine:
+    """Compila as regras embutidas e as do usuário em tabelas de consulta.
+
+    Precedência: regras do usuário com padrões/predicados (na ordem dos arquivos),
+    depois a tabela de extensões (extensões do usuário sobrescrevem as embutidas).
+    Extensões compostas casam pelo sufixo mais longo (`.tar.gz` antes de `.gz`).
+    Para o que sobrar, `classify_by_content` aplica as regras de conteúdo e a tabela de
+    tipos de conteúdo sobre as features extraídas.
+    """
+
+    def __init__(self, builtin_rules: Dict[str, Dict] = RULES, rule_paths: Optional[List[Path]] = None,
+                 reload_interval: float = RELOAD_INTERVAL_SECONDS):
+        self.builtin_rules = builtin_rules
+        self.rule_paths = rule_paths if rule_paths is not None else _default_rule_paths()
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._signature: Tuple = ()
+        self._last_check = 0.0
+        # (regras com predicados, tabela de extensões, maior número de partes de um sufixo,
+        # tabela de tipos de conteúdo), trocado de uma vez na recarga.
+        self._compiled: Tuple[List[_CompiledRule], Dict[str, str], int, Dict[str, str]] = ([], {}, 1, {})
+        try:
+            self._compile(self._load_specs())
+        except (OSError, ValueError) as e:
+            print(f"AVISO: Regras do usuário inválidas, usando apenas as embutidas: {e}")
+            self._compile([(spec, "<embutidas>") for spec in _normalize_rule_file(self.builtin_rules)])
+
+    # --- Compilação e recarga ---
+
+    def _rule_files(self) -> List[Path]:
+        files = []
+        for path in self.rule_paths:
+            if path.is_dir():
+                files.extend(sorted(path.glob("*.json")))
+            elif path.is_file():
+                files.append(path)
+        return files
+
+    def _sources_signature(self) -> Tuple:
+        signature = []
+        for path in self._rule_files():
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            signature.append((str(path), st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _load_specs(self) -> List[Tuple[Dict[str, Any], str]]:
+        self._signature = self._sources_signature()
+        specs = []
+        for path_str, _, _ in self._signature:
+            with open(path_str, 'r', encoding='utf-8') as f:
+                specs.extend((spec, path_str) for spec in _normalize_rule_file(json.load(f)))
+        specs.extend((spec, "<embutidas>") for spec in _normalize_rule_file(self.builtin_rules))
+        return specs
+
+    def _compile(self, specs: List[Tuple[Dict[str, Any], str]]):
+        extension_table: Dict[str, str] = {}
+        content_table: Dict[str, str] = {}
+        rules: List[_CompiledRule] = []
+        for spec, source in specs:
+            rule = _CompiledRule(spec, source)
+            if (rule.item_type == "file" and (rule.extensions or rule.content_types)
+                    and not any(spec.get(k) is not None for k in _PREDICATE_KEYS)):
+                for ext in rule.extensions:
+                    extension_table.setdefault(ext, rule.category)
+                for content_type in rule.content_types:
+                    content_table.setdefault(content_type, rule.category)
+            else:
+                rules.append(rule)
+        max_suffix_parts = max([ext.count('.') for ext in extension_table] + [
+            ext.count('.') for rule in rules for ext in rule.extensions
+        ] + [1])
+        self._compiled = (rules, extension_table, max_suffix_parts, content_table)
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """Recompila se algum arquivo de regras mudou. Verifica no máximo a cada `reload_interval`."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return False
+        with self._lock:
+            self._last_check = now
+            if not force and self._sources_signature() == self._signature:
+                return False
+            try:
+                self._compile(self._load_specs())
+            except (OSError, ValueError) as e:
+                print(f"AVISO: Regras do usuário não recarregadas, mantendo as anteriores: {e}")
+                return False
+            rules, extension_table, _, _ = self._compiled
+            print(f"Regras de categorização recarregadas ({len(extension_table)} extensões, {len(rules)} regras).")
+            return True
+
+    # --- Classificação ---
+
+    @staticmethod
+    def _suffixes(name: str, max_parts: int) -> List[str]:
+        parts = name.split('.')
+        if len(parts) < 2:
+            return []
+        longest = min(len(parts) - 1, max_parts)
+        return ['.' + '.'.join(parts[-k:]) for k in range(longest, 0, -1)]
+
+    def classify(self, item: ItemRecord, now: Optional[float] = None) -> Optional[str]:
+        """Categoria de um único item, ou None se nenhuma regra se aplicar."""
+        categorized, _ = self.classify_batch([item], now=now)
+        return categorized.get(item.path)
+
+    def classify_batch(self, items: List[ItemRecord], now: Optional[float] = None) -> Tuple[Dict[str, str], List[ItemRecord]]:
+        """Classifica um lote inteiro. Retorna (mapa caminho -> categoria, itens restantes)."""
+        self.reload_if_changed()
+        now = time.time() if now is None else now
+        rules, extension_table, max_suffix_parts, _ = self._compiled
+        rules = [rule for rule in rules if not rule.needs_content]
+        masks = self._numeric_masks(rules, items, now)
+
+        categorized: Dict[str, str] = {}
+        remaining: List[ItemRecord] = []
+        # Lotes grandes repetem muito as mesmas extensões: memoriza a consulta à tabela.
+        extension_memo: Dict[str, Optional[str]] = {}
+        for i, item in enumerate(items):
+            item_type = item.type
+            name = item.name
+            lower_name = name.lower()
+            suffixes = self._suffixes(lower_name, max_suffix_parts) if item_type == "file" else []
+
+            category = None
+            for rule in rules:
+                if rule.item_type != item_type:
+                    continue
+                mask = masks.get(id(rule))
+                if mask is not None and not mask[i]:
+                    continue
+                if rule.matches_name(name, suffixes):
+                    category = rule.category
+                    break
+
+            if category is None and suffixes:
+                key = suffixes[0]
+                if key in extension_memo:
+                    category = extension_memo[key]
+                else:
+                    category = next((extension_table[s] for s in suffixes if s in extension_table), None)
+                    extension_memo[key] = category
+
+            if category is None:
+                remaining.append(item)
+            else:
+                categorized[item.path] = category
+        return categorized, remaining
+
+
+    @staticmethod
+    def _numeric_masks(rules: List[_CompiledRule], items: List[ItemRecord], now: float) -> Dict[int, List[bool]]:
+        masks = {}
+        if any(rule.has_numeric_predicates for rule in rules):
+            sizes = np.fromiter((item.size for item in items), dtype=np.float64, count=len(items))
+            mtimes = np.fromiter((item.mtime for item in items), dtype=np.float64, count=len(items))
+            for rule in rules:
+                if rule.has_numeric_predicates:
+                    masks[id(rule)] = rule.numeric_mask(sizes, mtimes, now).tolist()
+        return masks
+
+    def classify_by_content(self, items: List[ItemRecord], features: Dict[str, Dict[str, Any]],
+                            now: Optional[float] = None) -> Tuple[Dict[str, str], List[ItemRecord]]:
+        """Segunda passada, sobre as features de conteúdo (`extraction.py`) dos itens que as regras de nome não resolveram.
+
+        Regras de conteúdo do usuário primeiro, depois a tabela de tipos de conteúdo.
+        Itens sem features seguem adiante sem categoria.
+        """
+        self.reload_if_changed()
+        now = time.time() if now is None else now
+        rules, _, max_suffix_parts, content_table = self._compiled
+        rules = [rule for rule in rules if rule.needs_content]
+        masks = self._numeric_masks(rules, items, now)
+
+        categorized: Dict[str, str] = {}
+        remaining: List[ItemRecord] = []
+        for i, item in enumerate(items):
+            item_features = features.get(item.path)
+            category = None
+            if item_features:
+                suffixes = self._suffixes(item.name.lower(), max_suffix_parts) if item.type == "file" else []
+                for rule in rules:
+                    if rule.item_type != item.type:
+                        continue
+                    mask = masks.get(id(rule))
+                    if mask is not None and not mask[i]:
+                        continue
+                    if rule.matches_content(item_features) and rule.matches_name(item.name, suffixes):
+                        category = rule.category
+                        break
+                if category is None:
+                    category = content_table.get(item_features.get("content_type"))
+            if category is None:
+                remaining.append(item)
+            else:
+                categorized[item.path] = category
+        return categorized, remaining
+
+
+def _as_list(value) -> List:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _normalize_rule_file(data: Any) -> List[Dict[str, Any]]:
+    """Aceita {"rules": [...]}, uma lista de regras ou o formato de RULES ({categoria: {...}})."""
+    if isinstance(data, dict) and "rules" in data:
+        data = data["rules"]
+    if isinstance(data, dict):
+        if not all(isinstance(spec, dict) for spec in data.values()):
+            raise RuleError("Cada categoria do arquivo de regras deve mapear para um objeto.")
+        return [{"category": category, **spec} for category, spec in data.items()]
+    if isinstance(data, list):
+        return data
+    raise RuleError(f"Formato de arquivo de regras não reconhecido: {type(data).__name__}")
+
+
+def _default_rule_paths() -> List[Path]:
+    configured = os.getenv(RULES_PATH_ENV)
+    if configured:
+        return [Path(p).expanduser() for p in configured.split(os.pathsep) if p]
+    return [DEFAULT_RULES_DIR]
+
+
+# Motor compartilhado pelo processo do hub.
+rule_engine = RuleEngine()
@@ -0,0 +1,307 @@
+# agents/file_organizer/scanner.py
+# Scanner incremental baseado em os.scandir, com índice persistente por (device, inode, mtime).
+
+import os
+import json
+import stat
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple, Any, Optional
+
+from agents.file_organizer.records import ItemRecord
+from hivemind_core.resources import process_resource
+
+SCAN_INDEX_PATH = Path(os.getenv("FILE_ORGANIZER_SCAN_INDEX", ".hivemind_cache/scan_index.sqlite3"))
+SAMPLE_SIZE = 10
+
+# Diretórios modificados há menos tempo que isso não entram no índice: o mtime
+# pode não ter resolução suficiente para distinguir duas mudanças no mesmo "tick".
+_RACY_WINDOW_NS = 2_000_000_000
+
+# Cada entrada de um diretório é guardada de forma compacta:
+# [nome, tipo, tamanho, mtime_ns, inode, is_symlink]
+Entry = List[Any]
+
+
+class ScanStats:
+    """Contadores de um escaneamento: entradas servidas do índice vs. re-stat'adas."""
+
+    def __init__(self):
+        self.cached = 0
+        self.restat = 0
+        self.dirs_cached = 0
+        self.dirs_read = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "cached": self.cached,
+            "restat": self.restat,
+            "dirs_cached": self.dirs_cached,
+            "dirs_read": self.dirs_read,
+        }
+
+
+class ScanIndex:
+    """Índice persistente das listagens de diretório, validado por (st_dev, st_ino, st_mtime_ns).
+
+    O mtime de um diretório muda quando entradas são criadas, removidas ou renomeadas
+    nele, então uma listagem com a mesma chave pode ser reaproveitada sem novo stat.
+    Alterações no conteúdo de um arquivo não mudam o mtime da pasta: tamanho e mtime
+    dos arquivos refletem o momento em que a pasta foi lida pela última vez.
+
+    Fica em SQLite, uma linha por pasta: cada consulta lê só a pasta pedida e `save`
+    grava só as pastas alteradas desde a última gravação.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Alterações ainda não gravadas: pasta -> (chave, entradas), ou None para remoção.
+        self._dirty: Dict[str, Optional[Tuple[List[int], List[Entry]]]] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # A chave vai como texto: st_dev e st_ino podem passar do INTEGER de 64 bits com sinal.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_index ("
+                " dir TEXT PRIMARY KEY, key TEXT NOT NULL, entries TEXT NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, dir_path: str, key: List[int]) -> Optional[List[Entry]]:
+        with self._lock:
+            if dir_path in self._dirty:
+                record = self._dirty[dir_path]
+                return record[1] if record is not None and record[0] == key else None
+            row = self._connection().execute(
+                "SELECT key, entries FROM scan_index WHERE dir = ?", (dir_path,)
+            ).fetchone()
+        if row is None or json.loads(row[0]) != key:
+            return None
+        return json.loads(row[1])
+
+    def store(self, dir_path: str, key: List[int], entries: List[Entry]):
+        with self._lock:
+            self._dirty[dir_path] = (key, entries)
+
+    def _directories(self, root: str) -> set:
+        base = root.rstrip(os.sep)
+        prefix = base + os.sep
+        # Intervalo [prefix, base + próximo caractere depois do separador): usa a chave primária.
+        rows = self._connection().execute(
+            "SELECT dir FROM scan_index WHERE dir = ? OR (dir >= ? AND dir < ?)",
+            (root, prefix, base + chr(ord(os.sep) + 1)),
+        )
+        paths = {row[0] for row in rows}
+        for path, record in self._dirty.items():
+            if path == root or path.startswith(prefix):
+                if record is None:
+                    paths.discard(path)
+                else:
+                    paths.add(path)
+        return paths
+
+    def directories(self, root: str) -> List[str]:
+        """Pastas registradas no índice: `root` e as que estão abaixo dela."""
+        with self._lock:
+            return sorted(self._directories(root))
+
+    def forget_missing(self, root: str, visited: set, folders: set):
+        """Remove registros sob `root` que o último escaneamento mostrou não existirem mais.
+
+        `visited` são as pastas listadas e `folders` as pastas vistas nessas listagens. Descendo
+        de `root`, um registro é obsoleto se algum ancestral (ou ele mesmo) cujo pai foi listado
+        não aparece mais na listagem do pai. Abaixo de uma pasta existente que não foi listada
+        (escaneamento não recursivo ou limitado por profundidade) nada pode ser concluído e o
+        registro fica.
+        """
+        prefix = root.rstrip(os.sep) + os.sep
+
+        def is_stale(path: str) -> bool:
+            current = root
+            for part in path[len(prefix):].split(os.sep):
+                if current not in visited:
+                    return False
+                current = os.path.join(current, part)
+                if current not in folders:
+                    return True
+            return False
+
+        with self._lock:
+            for path in self._directories(root):
+                if path.startswith(prefix) and path not in visited and is_stale(path):
+                    self._dirty[path] = None
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            upserts = [
+                (path, json.dumps(record[0]), json.dumps(record[1], separators=(',', ':')))
+                for path, record in self._dirty.items() if record is not None
+            ]
+            deletes = [(path,) for path, record in self._dirty.items() if record is None]
+            conn = self._connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO scan_index (dir, key, entries) VALUES (?, ?, ?)", upserts)
+                conn.executemany("DELETE FROM scan_index WHERE dir = ?", deletes)
+            self._dirty.clear()
+
+
+def read_directory(dir_path: str, stats: ScanStats) -> List[Entry]:
+    """Lê um diretório com os.scandir, fazendo um único stat por entrada."""
+    entries = []
+    with os.scandir(dir_path) as it:
+        for dir_entry in it:
+            if dir_entry.name.startswith('.'):
+                continue
+            stats.restat += 1
+            try:
+                # Segue symlinks, como Path.is_dir()/is_file() faziam.
+                st = dir_entry.stat()
+                is_link = dir_entry.is_symlink()
+            except OSError:
+                entries.append([dir_entry.name, "inaccessible", 0, 0, 0, False])
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                entries.append([dir_entry.name, "folder", 0, st.st_mtime_ns, st.st_ino, is_link])
+            elif stat.S_ISREG(st.st_mode):
+                entries.append([dir_entry.name, "file", st.st_size, st.st_mtime_ns, st.st_ino, is_link])
+    return entries
+
+
+def peek_names(dir_path: str, limit: int = SAMPLE_SIZE) -> List[str]:
+    """Até `limit` nomes de uma pasta, sem stat e sem passar pelo índice (amostra de pastas da raiz)."""
+    names = []
+    with os.scandir(dir_path) as it:
+        for dir_entry in it:
+            if dir_entry.name.startswith('.'):
+                continue
+            names.append(dir_entry.name)
+            if len(names) >= limit:
+                break
+    return names
+
+
+def list_directory_cached(dir_path: str, index: ScanIndex, stats: ScanStats) -> List[Entry]:
+    """Retorna a listagem de um diretório, do índice quando a chave (dev, inode, mtime) bate."""
+    st = os.stat(dir_path)
+    key = [st.st_dev, st.st_ino, st.st_mtime_ns]
+    entries = index.lookup(dir_path, key)
+    if entries is not None:
+        stats.cached += len(entries)
+        stats.dirs_cached += 1
+        return entries
+
+    entries = read_directory(dir_path, stats)
+    stats.dirs_read += 1
+    if time.time_ns() - st.st_mtime_ns > _RACY_WINDOW_NS:
+        index.store(dir_path, key, entries)
+    return entries
+
+
+def _entry_to_item(parent: str, entry: Entry, kind: Optional[str] = None,
+                   sample_contents: Optional[tuple] = None) -> ItemRecord:
+    name, entry_kind, size, mtime_ns, inode, _ = entry
+    return ItemRecord(
+        path=os.path.join(parent, name), type=kind or entry_kind,
+        size=size, mtime=mtime_ns / 1e9, inode=inode, sample_contents=sample_contents,
+    )
+
+
+def collect_items(
+    root: str,
+    list_directory: Callable[[str], List[Entry]],
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    visited: Optional[set] = None,
+    folders: Optional[set] = None,
+    sample_names: Optional[Callable[[str], List[str]]] = None,
+) -> List[ItemRecord]:
+    """Monta os itens detalhados a partir de uma fonte de listagens (disco+índice ou índice vivo).
+
+    `list_directory` deve levantar OSError quando a pasta não puder ser listada. No modo não
+    recursivo, `sample_names` (se informado) fornece a amostra das subpastas no lugar de
+    uma listagem completa. `visited` recebe as pastas listadas e `folders` as subpastas vistas.
+    """
+    visited = visited if visited is not None else set()
+    folders = folders if folders is not None else set()
+    items = []
+    visited.add(root)
+    root_entries = list_directory(root)
+    folders.update(os.path.join(root, e[0]) for e in root_entries if e[1] == "folder")
+
+    if not recursive:
+        for entry in root_entries:
+            if entry[1] != "folder":
+                items.append(_entry_to_item(root, entry))
+                continue
+            folder_path = os.path.join(root, entry[0])
+            try:
+                if sample_names is not None:
+                    sample = sample_names(folder_path)[:SAMPLE_SIZE]
+                else:
+                    sample = [e[0] for e in list_directory(folder_path)[:SAMPLE_SIZE]]
+            except OSError:
+                items.append(_entry_to_item(root, entry, kind="inaccessible"))
+                continue
+            items.append(_entry_to_item(root, entry, sample_contents=tuple(sample)))
+        return items
+
+    stack = [(root, root_entries, 0)]
+    while stack:
+        parent, entries, depth = stack.pop()
+        for entry in entries:
+            kind, is_link = entry[1], entry[5]
+            if kind == "file":
+                items.append(_entry_to_item(parent, entry))
+            elif kind == "folder" and not is_link and (max_depth is None or depth < max_depth):
+                child = os.path.join(parent, entry[0])
+                try:
+                    child_entries = list_directory(child)
+                except OSError:
+                    continue
+                visited.add(child)
+                folders.update(os.path.join(child, e[0]) for e in child_entries if e[1] == "folder")
+                stack.append((child, child_entries, depth + 1))
+    return items
+
+
+def scan_directory(
+    directory_path: str,
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    index: Optional[ScanIndex] = None,
+) -> Tuple[List[ItemRecord], ScanStats]:
+    """Escaneia um diretório e retorna (itens detalhados, estatísticas).
+
+    No modo padrão, retorna os itens da raiz; pastas recebem `sample_contents`
+    (até SAMPLE_SIZE nomes). No modo recursivo a árvore é achatada: retorna todos
+    os arquivos até `max_depth` níveis abaixo da raiz, sem seguir symlinks de pastas.
+    """
+    index = index if index is not None else scan_index
+    stats = ScanStats()
+    root = str(Path(directory_path).expanduser().resolve())
+    visited, folders = set(), set()
+
+    # Amostras das subpastas saem de uma espiada limitada: não fazem stat nem entram no índice.
+    items = collect_items(
+        root, lambda path: list_directory_cached(path, index, stats),
+        recursive=recursive, max_depth=max_depth, visited=visited, folders=folders, sample_names=peek_names
+    )
+    index.forget_missing(root, visited, folders)
+
+    index.save()
+    return items, stats
+
+
+# Índice compartilhado pelo processo do hub.
+scan_index = process_resource(f"{__name__}.scan_index", lambda: ScanIndex(SCAN_INDEX_PATH))
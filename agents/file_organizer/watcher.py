@@ -0,0 +1,304 @@
+# agents/file_organizer/watcher.py
+# Índice vivo de diretórios observados ("watched roots"), mantido por eventos do watchdog.
+
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+
+from agents.file_organizer.records import ItemRecord
+from agents.file_organizer.scanner import (
+    Entry, ScanStats, collect_items, list_directory_cached, read_directory, scan_index
+)
+from hivemind_core.resources import process_resource
+
+WATCHED_ROOTS_ENV = "FILE_ORGANIZER_WATCHED_ROOTS"
+DEBOUNCE_SECONDS = float(os.getenv("FILE_ORGANIZER_WATCH_DEBOUNCE", "0.25"))
+# Mesmo com eventos contínuos (ex: um unzip grande), o índice é atualizado ao menos nesse intervalo.
+MAX_DELAY_SECONDS = float(os.getenv("FILE_ORGANIZER_WATCH_MAX_DELAY", "2.0"))
+
+_IGNORED_EVENTS = {"opened", "closed_no_write"}
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, index: "LiveDirectoryIndex", root: str):
+        self.index = index
+        self.root = root
+
+    def on_any_event(self, event: FileSystemEvent):
+        if event.event_type in _IGNORED_EVENTS:
+            return
+        self.index._on_event(self.root, event)
+
+
+class LiveDirectoryIndex:
+    """Mantém em memória as listagens dos diretórios observados.
+
+    Eventos do watchdog apenas marcam pastas como "sujas"; uma thread de flush
+    espera a rajada acalmar (debounce), relê só as pastas afetadas e publica
+    as novas listagens de uma vez, incrementando `version`. `snapshot` nunca toca
+    o disco: lê a última versão publicada.
+    """
+
+    def __init__(self, debounce: float = DEBOUNCE_SECONDS, max_delay: float = MAX_DELAY_SECONDS):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.version = 0
+        self._listings: Dict[str, List[Entry]] = {}
+        self._roots: Dict[str, Any] = {}
+        # Raízes em carga inicial -> evento sinalizado quando a carga termina (ou falha).
+        self._pending_roots: Dict[str, threading.Event] = {}
+        self._snapshots: Dict[Tuple[str, bool], Tuple[int, List[ItemRecord]]] = {}
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._dirty: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._first_pending = 0.0
+        self._last_event = 0.0
+        self._observer: Optional[Observer] = None
+        self._worker: Optional[threading.Thread] = None
+        self._env_loaded = False
+
+    # --- Registro de raízes ---
+
+    def watch(self, directory_path: str) -> Dict[str, Any]:
+        """Passa a observar `directory_path` e carrega sua árvore (via índice persistente)."""
+        root = str(Path(directory_path).expanduser().resolve())
+        if not os.path.isdir(root):
+            raise NotADirectoryError(root)
+        self._ensure_running()
+        with self._lock:
+            if root in self._roots:
+                return {"root": root, "directories": self._count_under(root)}
+            loading = self._pending_roots.get(root)
+            if loading is None:
+                # Verificação e agendamento sob o mesmo lock: chamadas concorrentes para a mesma
+                # raiz não registram dois handlers. O observer é agendado antes da carga inicial
+                # para não perder eventos nesse intervalo; os que chegarem durante a carga são
+                # reaplicados depois dela.
+                watch = self._observer.schedule(_EventHandler(self, root), root, recursive=True)
+                self._pending_roots[root] = threading.Event()
+        if loading is not None:
+            # Outra chamada já está carregando esta raiz: espera por ela (e tenta de novo se falhou).
+            loading.wait()
+            return self.watch(root)
+        try:
+            stats = ScanStats()
+            listings = self._load_tree(root, lambda p: list_directory_cached(p, scan_index, stats))
+            scan_index.save()
+        except Exception:
+            with self._lock:
+                self._pending_roots.pop(root).set()
+            self._observer.unschedule(watch)
+            raise
+        with self._lock:
+            self._listings.update(listings)
+            self._roots[root] = watch
+            self._pending_roots.pop(root).set()
+            self.version += 1
+        return {"root": root, "directories": len(listings), **stats.as_dict()}
+
+    def unwatch(self, directory_path: str) -> bool:
+        root = str(Path(directory_path).expanduser().resolve())
+        with self._lock:
+            watch = self._roots.pop(root, None)
+            if watch is None:
+                return False
+            if not self._covering_root(root):
+                self._drop_under(root)
+            self._snapshots.clear()
+            self.version += 1
+        self._observer.unschedule(watch)
+        return True
+
+    def watch_from_env(self):
+        """Registra, uma única vez, as raízes listadas em FILE_ORGANIZER_WATCHED_ROOTS."""
+        if self._env_loaded:
+            return
+        self._env_loaded = True
+        for path in filter(None, os.getenv(WATCHED_ROOTS_ENV, "").split(os.pathsep)):
+            try:
+                self.watch(path)
+            except OSError as e:
+                print(f"AVISO: Não foi possível observar '{path}': {e}")
+
+    def watched_roots(self) -> List[str]:
+        with self._lock:
+            return sorted(self._roots)
+
+    def stop(self):
+        with self._cond:
+            observer, self._observer = self._observer, None
+            self._cond.notify_all()
+        if observer is not None:
+            observer.stop()
+            observer.join(timeout=5)
+
+    # --- Leitura ---
+
+    def snapshot(self, directory_path: str, recursive: bool = False) -> Optional[List[ItemRecord]]:
+        """Retorna os itens de `directory_path` a partir do índice, ou None se não estiver observado."""
+        root = str(Path(directory_path).expanduser().resolve())
+        with self._lock:
+            if not self._covering_root(root) or root not in self._listings:
+                return None
+            key = (root, recursive)
+            cached = self._snapshots.get(key)
+            if cached and cached[0] == self.version:
+                return list(cached[1])
+            items = collect_items(root, self._get_listing, recursive=recursive)
+            self._snapshots[key] = (self.version, items)
+            return list(items)
+
+    def _get_listing(self, dir_path: str) -> List[Entry]:
+        try:
+            return self._listings[dir_path]
+        except KeyError:
+            raise FileNotFoundError(dir_path)
+
+    # --- Eventos e flush ---
+
+    def _on_event(self, root: str, event: FileSystemEvent):
+        paths = [os.fsdecode(event.src_path)]
+        dest = getattr(event, "dest_path", None)
+        if dest:
+            paths.append(os.fsdecode(dest))
+
+        now = time.monotonic()
+        with self._cond:
+            for path in paths:
+                if _is_hidden(root, path):
+                    continue
+                if event.event_type in ("deleted", "moved") and path == paths[0] and event.is_directory:
+                    self._removed.add(path)
+                if event.is_directory and (event.event_type in ("created", "modified") or path != paths[0]):
+                    self._dirty.add(path)
+                self._dirty.add(os.path.dirname(path))
+            if not self._dirty and not self._removed:
+                return
+            if not self._first_pending:
+                self._first_pending = now
+            self._last_event = now
+            self._cond.notify()
+
+    def _ensure_running(self):
+        with self._cond:
+            if self._observer is None:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._observer.start()
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="live-directory-index", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._dirty or self._removed) and self._observer is not None:
+                    self._cond.wait()
+                if self._observer is None:
+                    return
+                # Coalesce: espera a rajada acalmar, sem ultrapassar max_delay.
+                while self._observer is not None:
+                    deadline = min(self._last_event + self.debounce, self._first_pending + self.max_delay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                dirty, self._dirty = self._dirty, set()
+                removed, self._removed = self._removed, set()
+                self._first_pending = 0.0
+            try:
+                self._apply(dirty, removed)
+            except Exception as e:
+                print(f"Erro ao atualizar índice de diretórios observados: {e}")
+
+    def _apply(self, dirty: Set[str], removed: Set[str]):
+        """Relê as pastas afetadas fora do lock e publica o resultado atomicamente."""
+        stats = ScanStats()
+        with self._lock:
+            # Subárvores removidas não contam como conhecidas: se foram recriadas, são recarregadas.
+            known = {p for p in self._listings if not any(_is_under(p, r) for r in removed)}
+        updates: Dict[str, List[Entry]] = {}
+        gone: Set[str] = set(removed)
+        requeue: Set[str] = set()
+        for dir_path in dirty:
+            if dir_path in removed:
+                continue
+            with self._lock:
+                watched = self._covering_root(dir_path) is not None
+                loading = any(_is_under(dir_path, r) for r in self._pending_roots)
+            if not watched:
+                if loading:
+                    requeue.add(dir_path)
+                continue
+            try:
+                entries = read_directory(dir_path, stats)
+            except OSError:
+                gone.add(dir_path)
+                continue
+            updates[dir_path] = entries
+            # Pastas novas (ex: uma árvore movida para dentro da raiz) são carregadas por completo.
+            for entry in entries:
+                child = os.path.join(dir_path, entry[0])
+                if entry[1] == "folder" and not entry[5] and child not in known and child not in updates:
+                    updates.update(self._load_tree(child, lambda p: read_directory(p, stats)))
+
+        with self._lock:
+            for dir_path in gone:
+                self._drop_under(dir_path)
+            self._listings.update(updates)
+            self.version += 1
+        if requeue:
+            with self._cond:
+                self._dirty |= requeue
+                self._first_pending = self._first_pending or time.monotonic()
+                self._last_event = time.monotonic()
+                self._cond.notify()
+
+    # --- Auxiliares ---
+
+    def _load_tree(self, root: str, list_directory) -> Dict[str, List[Entry]]:
+        listings = {}
+        stack = [root]
+        while stack:
+            dir_path = stack.pop()
+            try:
+                entries = list_directory(dir_path)
+            except OSError:
+                continue
+            listings[dir_path] = entries
+            for entry in entries:
+                if entry[1] == "folder" and not entry[5]:
+                    stack.append(os.path.join(dir_path, entry[0]))
+        return listings
+
+    def _covering_root(self, path: str) -> Optional[str]:
+        for root in self._roots:
+            if _is_under(path, root):
+                return root
+        return None
+
+    def _count_under(self, root: str) -> int:
+        return sum(1 for p in self._listings if _is_under(p, root))
+
+    def _drop_under(self, root: str):
+        for p in [p for p in self._listings if _is_under(p, root)]:
+            del self._listings[p]
+
+
+def _is_under(path: str, root: str) -> bool:
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _is_hidden(root: str, path: str) -> bool:
+    rel = os.path.relpath(path, root)
+    return any(part.startswith('.') and part not in ('.', '..') for part in rel.split(os.sep))
+
+
+# Índice compartilhado pelo processo do hub.
+live_index = process_resource(f"{__name__}.live_index", LiveDirectoryIndex)
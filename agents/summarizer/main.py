@@ -1,11 +1,17 @@
 # agents/summarizer/main.py (VERSÃO CORRIGIDA)
 
+import os
 import json
-import google.generativeai as genai
+import asyncio
 from fastmcp import FastMCP, Context
-from datetime import datetime
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional
 import uuid
 
+from hivemind_core.dispatch import call_tool
+from hivemind_core.model_backend import model_backend
+
 mcp = FastMCP(name="SummarizerAgent")
 
 # ## MUDANÇA PRINCIPAL 1: Prompt mais relevante ##
@@ -17,60 +23,149 @@ Post Original:
 Seu resumo de uma frase (ex: "O plano visa agrupar documentos fiscais e projetos de clientes para o diretório 'Downloads'."):
 """
 
+SUMMARIZER_MODEL_NAME = 'gemini-2.5-flash'
+SUMMARIZER_STATE_PATH = Path(os.getenv("SUMMARIZER_STATE_PATH", ".hivemind_cache/summarizer_state.json"))
+SUMMARIZER_MAX_CONCURRENCY = int(os.getenv("SUMMARIZER_CONCURRENCY", "4"))
+# Tamanho das páginas do feed e dos lotes de consulta por resumos existentes.
+SUMMARIZER_PAGE_SIZE = 200
+
+async def _summarize(text_to_summarize: str) -> str:
+    prompt = SUMMARIZATION_PROMPT.format(analysis_content=text_to_summarize)
+    response_text = await model_backend.generate(SUMMARIZER_MODEL_NAME, prompt)
+    return response_text.strip()
+
 @mcp.tool
 async def summarize_text(text_to_summarize: str, ctx: Context) -> str:
-    prompt = SUMMARIZATION_PROMPT.format(analysis_content=text_to_summarize)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    response = await model.generate_content_async(prompt)
-    return response.text.strip()
+    return await _summarize(text_to_summarize)
+
+def _load_state() -> Dict[str, Any]:
+    try:
+        with open(SUMMARIZER_STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_state(state: Dict[str, Any]):
+    SUMMARIZER_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = SUMMARIZER_STATE_PATH.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, SUMMARIZER_STATE_PATH)
+
+def _parse_timestamp(timestamp: Any) -> Optional[datetime]:
+    """Timestamp ISO 8601 como datetime com fuso (sem fuso = UTC), ou None se inválido."""
+    try:
+        parsed = datetime.fromisoformat(str(timestamp))
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+def _pick_timestamp(posts: List[dict], pick: Callable) -> Optional[str]:
+    """Timestamp (no formato original) escolhido por `pick` (min ou max) entre os posts.
+
+    A comparação é feita por instante, não pelo texto: "10:00+02:00" vem antes de "09:00Z".
+    """
+    dated = [(parsed, post["timestamp"]) for post in posts
+             if (parsed := _parse_timestamp(post.get("timestamp"))) is not None]
+    return pick(dated, key=lambda pair: pair[0])[1] if dated else None
+
+async def _plans_since(ctx: Context, watermark: str | None) -> List[dict]:
+    """Todos os planos com timestamp >= watermark, percorrendo o feed por cursor."""
+    plans, cursor = [], None
+    while True:
+        arguments = {"entry_type": "ORGANIZATION_PLAN", "page_size": SUMMARIZER_PAGE_SIZE, "cursor": cursor}
+        if watermark:
+            arguments["since"] = watermark
+        page = await call_tool(ctx, "get_feed_page", arguments)
+        data = page.data if page and page.data else {}
+        plans.extend(data.get("items", []))
+        cursor = data.get("next_cursor")
+        if not cursor:
+            return plans
+
+async def _already_summarized(ctx: Context, entry_ids: List[str]) -> set:
+    """Consulta exata (sem embedding) pelos resumos que referenciam qualquer um dos planos."""
+    summarized = set()
+    for start in range(0, len(entry_ids), SUMMARIZER_PAGE_SIZE):
+        batch = entry_ids[start:start + SUMMARIZER_PAGE_SIZE]
+        offset = 0
+        while True:
+            result = await call_tool(ctx, "query_memory", {
+                "query": "", "entry_type": "SUMMARY", "references_entry_ids": batch,
+                "top_k": SUMMARIZER_PAGE_SIZE, "offset": offset
+            })
+            found = result.data.get("results", []) if result and result.data else []
+            summarized.update(r.get("references_entry_id") for r in found)
+            if len(found) < SUMMARIZER_PAGE_SIZE:
+                break
+            offset += len(found)
+    return summarized
 
 @mcp.tool
-async def process_latest_posts(ctx: Context):
+async def process_latest_posts(ctx: Context, max_concurrency: int = SUMMARIZER_MAX_CONCURRENCY):
+    """Resume todos os planos ainda sem resumo desde a última execução (marca d'água persistida).
+
+    Os planos novos são buscados pelo feed paginado, os resumos existentes com uma consulta
+    exata em lote, e os resumos gerados em paralelo são gravados com um único post_entries.
+    """
     await ctx.log("SummarizerAgent: Verificando o feed por novos planos...", level="info")
+    state = _load_state()
+    watermark = state.get("watermark")
+
+    plans = await _plans_since(ctx, watermark)
+    if not plans:
+        await ctx.log("SummarizerAgent: Nenhum plano novo desde a última execução.", level="info")
+        return {"status": "noop", "details": "Nenhum plano novo."}
+
+    summarized = await _already_summarized(ctx, [post["entry_id"] for post in plans])
+    pending = [post for post in plans if post["entry_id"] not in summarized]
+    await ctx.log(f"SummarizerAgent: {len(plans)} planos desde a marca d'água, {len(pending)} sem resumo.", level="info")
+    if not pending:
+        _save_state({"watermark": _pick_timestamp(plans, max) or watermark, "last_run": datetime.utcnow().isoformat()})
+        return {"status": "noop", "details": "Nenhum plano novo."}
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    async def summarize_post(post: dict) -> dict | None:
+        async with semaphore:
+            try:
+                summary_content = await _summarize(post["content"])
+            except Exception as e:
+                await ctx.log(f"SummarizerAgent: Falha ao resumir o plano {post['entry_id']}: {e}", level="error")
+                return None
+        return {
+            "entry_id": str(uuid.uuid4()), "agent_name": "SummarizerAgent",
+            "entry_type": "SUMMARY", "timestamp": datetime.utcnow().isoformat(),
+            "content": summary_content, "context": {"source_agent": post["agent_name"]},
+            "tags": ["summary", "collaboration"], "utility_score": 0.0,
+            "references_entry_id": post["entry_id"]
+        }
+
+    summaries = await asyncio.gather(*(summarize_post(post) for post in pending))
+    new_entries = [entry for entry in summaries if entry is not None]
+    posted_ids = set()
+    if new_entries:
+        post_result = await call_tool(ctx, "post_entries", {"entries": new_entries})
+        results = post_result.data.get("results", []) if post_result and post_result.data else []
+        posted_ids = {
+            entry["references_entry_id"] for entry, result in zip(new_entries, results)
+            if result.get("status") == "success"
+        }
+
+    # A marca d'água só avança até o plano mais antigo que falhou: ele será tentado de novo.
+    failed = [post for post in pending if post["entry_id"] not in posted_ids]
+    if failed:
+        new_watermark = _pick_timestamp(failed, min) or watermark
+    else:
+        new_watermark = _pick_timestamp(plans, max) or watermark
+    _save_state({"watermark": new_watermark, "last_run": datetime.utcnow().isoformat()})
 
-    # CORREÇÃO: Usar ctx.call_tool em vez do obsoleto ctx.hub.call_tool
-    # O segundo argumento deve ser um dicionário com os parâmetros da ferramenta.
-    feed_result = await ctx.call_tool("get_feed", {"top_k": 10})
-    latest_posts = feed_result.data if feed_result and feed_result.data else []
-
-    if not latest_posts:
-        await ctx.log("SummarizerAgent: Feed está vazio.", level="info")
-        return {"status": "noop", "details": "Feed vazio."}
-
-    for post in latest_posts:
-        # ## MUDANÇA PRINCIPAL 2: Procurar pelo entry_type correto ##
-        if post.get("entry_type") == "ORGANIZATION_PLAN":
-            original_entry_id = post["entry_id"]
-
-            # Verifica se já existe um resumo para este post
-            query_result = await ctx.call_tool("query_memory", {"query": f"resumo para o plano {original_entry_id}"})
-            
-            found_summary = False
-            if query_result.data and query_result.data.get("results"):
-                 found_summary = any(
-                    res.get("references_entry_id") == original_entry_id
-                    for res in query_result.data["results"]
-                )
-
-            if not found_summary:
-                await ctx.log(f"SummarizerAgent: Novo plano encontrado para resumir: {original_entry_id}", level="info")
-                
-                summary_result = await ctx.call_tool("summarize_text", {"text_to_summarize": post["content"]})
-                summary_content = summary_result.data
-                
-                await ctx.call_tool("post_entry", {"entry": {
-                    "entry_id": str(uuid.uuid4()), "agent_name": "SummarizerAgent",
-                    "entry_type": "SUMMARY", "timestamp": datetime.utcnow().isoformat(),
-                    "content": summary_content, "context": {"source_agent": post["agent_name"]},
-                    "tags": ["summary", "collaboration"], "utility_score": 0.0,
-                    "references_entry_id": original_entry_id
-                }})
-                
-                await ctx.log(f"SummarizerAgent: Resumo postado com sucesso.", level="info")
-                return {"status": "success", "summary": summary_content}
-
-    await ctx.log("SummarizerAgent: Nenhum plano novo encontrado para resumir.", level="info")
-    return {"status": "noop", "details": "Nenhum plano novo."}
+    await ctx.log(f"SummarizerAgent: {len(posted_ids)} resumos postados, {len(failed)} falhas.", level="info")
+    return {
+        "status": "success" if not failed else "partial",
+        "summarized": len(posted_ids),
+        "failed": len(failed),
+        "watermark": new_watermark
+    }
 
 def get_agent_mcp():
     return mcp
@@ -0,0 +1,372 @@
+# benchmarks/bench_pipeline.py
+# Benchmark offline de ponta a ponta: árvores de diretórios e históricos de feed sintéticos,
+# com o backend de modelo local (HIVEMIND_MODEL_BACKEND=fake) no lugar do Gemini.
+#
+# Etapas: generate_organization_plan (frio e com caches quentes), ingestão na memória (em lote
+# e com posts concorrentes), get_feed, paginação do feed e o resumidor. Para cada etapa são
+# medidos tempo, vazão, latência por chamada (quando a etapa tem várias chamadas) e o pico de
+# RSS do processo (os workers de extração rodam em outros processos e não entram na conta).
+#
+# O resultado sai em JSON (stdout ou --output); com --baseline, etapas mais lentas que a
+# referência além da tolerância são listadas e o processo termina com código 1.
+#
+# Uso: python benchmarks/bench_pipeline.py [--sizes 1000,10000,100000] [--feed 2000]
+#          [--latency-ms 20] [--jitter-ms 5] [--failure-rate 0] [--memory-backend memory]
+#          [--output resultado.json] [--baseline referencia.json --tolerance 0.25]
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import statistics
+import subprocess
+import contextlib
+from pathlib import Path
+from datetime import datetime, timedelta
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+NAMES = ["relatorio_final", "IMG_2024", "setup-tool", "notas de aula", "backup", "orcamento", "meu-projeto",
+         "contrato assinado", "screenshot", "planilha_vendas", "curriculo", "apresentacao", "video_ferias"]
+# Extensões cobertas pelas regras, extensões que só a IA categoriza e cabeçalhos para arquivos sem extensão.
+RULE_EXTENSIONS = [".pdf", ".jpg", ".png", ".exe", ".docx", ".zip", ".mp4", ".txt", ".md", ".gz"]
+LLM_EXTENSIONS = [".xlsx", ".pptx", ".csv", ".json", ".py", ".psd", ".iso", ".dat", ".bak"]
+HEADERS = [b"%PDF-1.7\n", b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff\xe0", b"PK\x03\x04", b"MZ\x90\x00",
+           b"notas soltas sem extensao\n", b"\x00\x01\x02\x03binario"]
+ENTRY_TYPES = ["ORGANIZATION_PLAN", "SUGGESTION", "OBSERVATION", "SUMMARY"]
+AGENTS = ["FileOrganizerAgent", "SuggestionAgent", "WebScraperAgent", "SummarizerAgent"]
+
+
+def _configure_environment(args, workdir: Path):
+    """Aponta todos os caches e estados para uma pasta temporária e liga o backend local.
+
+    Precisa rodar antes de importar os agentes: a configuração deles é lida no import.
+    """
+    cache = workdir / "cache"
+    os.environ.update({
+        "HIVEMIND_MODEL_BACKEND": "fake",
+        "HIVEMIND_FAKE_LATENCY_MS": str(args.latency_ms),
+        "HIVEMIND_FAKE_JITTER_MS": str(args.jitter_ms),
+        "HIVEMIND_FAKE_FAILURE_RATE": str(args.failure_rate),
+        "HIVEMIND_FAKE_SEED": str(args.seed),
+        "HIVEMIND_MEMORY_BACKEND": args.memory_backend,
+        "HIVEMIND_CHROMA_PATH": str(cache / "chroma"),
+        "HIVEMIND_EMBEDDING_CACHE_DIR": str(cache / "embeddings"),
+        "HIVEMIND_FEED_INDEX": str(cache / "feed_index.sqlite3"),
+        "HIVEMIND_BLOB_DIR": str(cache / "blobs"),
+        "HIVEMIND_TOOL_MANIFEST": str(cache / "tool_manifest.json"),
+        "HIVEMIND_AGENT_HOT_RELOAD": "0",
+        "FILE_ORGANIZER_SCAN_INDEX": str(cache / "scan_index.sqlite3"),
+        "FILE_ORGANIZER_CATEGORY_CACHE": str(cache / "category_cache.sqlite3"),
+        "FILE_ORGANIZER_FEATURE_CACHE": str(cache / "feature_cache.sqlite3"),
+        # A extração é opcional no agente; o benchmark a liga para medir a etapa de conteúdo.
+        "FILE_ORGANIZER_EXTRACTION": "1",
+        "FILE_ORGANIZER_JOURNAL_DIR": str(cache / "journals"),
+        "SUMMARIZER_STATE_PATH": str(cache / "summarizer_state.json"),
+    })
+    os.environ.pop("FILE_ORGANIZER_WATCH_ROOTS", None)
+
+
+def make_tree(root: Path, entries: int, seed: int) -> dict:
+    """Cria `entries` itens na raiz: arquivos com extensão conhecida, desconhecida, sem extensão e pastas."""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    counts = {"rule_files": 0, "llm_files": 0, "content_files": 0, "folders": 0}
+    for i in range(entries):
+        name = f"{rng.choice(NAMES)}_{i}"
+        roll = rng.random()
+        if roll < 0.15:
+            folder = root / name
+            folder.mkdir()
+            for j in range(3):
+                (folder / f"{rng.choice(NAMES)}_{j}{rng.choice(RULE_EXTENSIONS + LLM_EXTENSIONS)}").write_bytes(b"x")
+            counts["folders"] += 1
+        elif roll < 0.60:
+            (root / f"{name}{rng.choice(RULE_EXTENSIONS)}").write_bytes(b"x" * rng.randint(1, 512))
+            counts["rule_files"] += 1
+        elif roll < 0.85:
+            (root / f"{name}{rng.choice(LLM_EXTENSIONS)}").write_bytes(b"x" * rng.randint(1, 512))
+            counts["llm_files"] += 1
+        else:
+            (root / name).write_bytes(rng.choice(HEADERS) + b"\n" * rng.randint(0, 64))
+            counts["content_files"] += 1
+    # Datas no passado: o scanner não confia em diretórios modificados há menos de 2 s.
+    past = time.time() - 3600
+    for path in [*root.rglob("*"), root]:
+        os.utime(path, (past, past))
+    return counts
+
+
+def make_feed(count: int, seed: int) -> list:
+    """Histórico sintético do feed, com timestamps crescentes e alguns planos grandes (blobs)."""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    entries = []
+    for i in range(count):
+        entry_type = rng.choice(ENTRY_TYPES)
+        context = {"source": "benchmark", "index": i}
+        if entry_type == "ORGANIZATION_PLAN" and rng.random() < 0.1:
+            context["plan"] = {"steps": [{"action": "move", "from": f"/tmp/bench/{n}.dat", "to": f"/tmp/bench/Dados/{n}.dat"}
+                                         for n in range(100)]}
+        entries.append({
+            "entry_id": f"bench-{seed}-{i:07d}", "agent_name": rng.choice(AGENTS), "entry_type": entry_type,
+            "timestamp": (start + timedelta(seconds=i)).isoformat(),
+            "content": f"{entry_type.lower()} {i}: {' '.join(rng.choice(NAMES) for _ in range(12))}",
+            "context": context, "tags": [entry_type.lower(), rng.choice(["bench", "synthetic"])],
+            "utility_score": 0.0, "references_entry_id": None,
+        })
+    return entries
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Sem /proc: ru_maxrss é o pico do processo inteiro (KiB no Linux, bytes no macOS).
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _PeakSampler:
+    """Amostra o RSS em uma thread durante a etapa e guarda o maior valor visto."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.start_rss = self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, _rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+class BenchContext:
+    """Contexto mínimo das ferramentas: descarta os logs e conta avisos e erros."""
+
+    def __init__(self):
+        self.levels = {}
+
+    async def log(self, message, level="info", logger_name=None):
+        self.levels[level] = self.levels.get(level, 0) + 1
+
+    async def report_progress(self, progress, total=None, message=None):
+        pass
+
+
+def _percentiles(latencies: list) -> dict | None:
+    if not latencies:
+        return None
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+    return {"p50": round(pick(0.50), 3), "p95": round(pick(0.95), 3), "p99": round(pick(0.99), 3),
+            "mean": round(statistics.fmean(ordered) * 1000, 3), "calls": len(ordered)}
+
+
+class StageRecorder:
+    def __init__(self):
+        self.stages = []
+
+    async def run(self, stage: str, size: int, work):
+        """Executa `work(ctx, latencies) -> (itens processados, detalhes)` medindo tempo e memória."""
+        latencies = []
+        ctx = BenchContext()
+        with _PeakSampler() as sampler:
+            start = time.perf_counter()
+            items, details = await work(ctx, latencies)
+            seconds = time.perf_counter() - start
+        warnings = ctx.levels.get("warning", 0) + ctx.levels.get("error", 0)
+        record = {
+            "stage": stage, "size": size, "seconds": round(seconds, 4), "items": items,
+            "throughput_per_s": round(items / seconds, 1) if seconds > 0 else None,
+            "latency_ms": _percentiles(latencies),
+            "peak_rss_mb": round(sampler.peak / 2**20, 1),
+            "rss_growth_mb": round((sampler.peak - sampler.start_rss) / 2**20, 1),
+            "log_warnings": warnings, "details": details,
+        }
+        self.stages.append(record)
+        print(f"{stage:<18}{size:>9}{seconds:>10.3f}s{record['throughput_per_s'] or 0:>12.1f}/s"
+              f"{record['peak_rss_mb']:>10.1f} MB  {json.dumps(details, ensure_ascii=False)}", file=sys.stderr)
+        return record
+
+
+async def _timed(latencies: list, coro):
+    start = time.perf_counter()
+    result = await coro
+    latencies.append(time.perf_counter() - start)
+    return result
+
+
+async def run_suite(args, workdir: Path) -> dict:
+    from fastmcp import FastMCP
+    from hivemind_core.agent_loader import load_agents_from_directory
+    from hivemind_core.dispatch import dispatcher, call_tool
+    from hivemind_core.model_backend import model_backend
+    from agents.file_organizer.extraction import feature_extractor
+
+    hub_mcp = FastMCP(name="BenchHub")
+    await load_agents_from_directory(hub_mcp, lazy=False)
+    dispatcher.bind(hub_mcp)
+    recorder = StageRecorder()
+    print(f"{'etapa':<18}{'tamanho':>9}{'tempo':>11}{'vazão':>14}{'pico RSS':>13}", file=sys.stderr)
+
+    try:
+        for size in args.sizes:
+            tree = workdir / f"tree_{size}"
+            start = time.perf_counter()
+            counts = make_tree(tree, size, args.seed)
+            print(f"árvore de {size} itens criada em {time.perf_counter() - start:.1f}s: {counts}", file=sys.stderr)
+
+            for stage in ("plan_cold", "plan_warm"):
+                async def plan(ctx, latencies):
+                    result = (await _timed(latencies, call_tool(ctx, "generate_organization_plan", {
+                        "directory_path": str(tree), "user_goal": "organizar por tipo de arquivo"
+                    }))).data
+                    steps = len((result.get("plan") or {}).get("steps", []))
+                    return size, {"status": result.get("status"), "steps": steps, "scan": result.get("scan_stats")}
+                await recorder.run(stage, size, plan)
+
+        feed = make_feed(args.feed, args.seed)
+        batch_part, single_part = feed[:len(feed) * 3 // 4], feed[len(feed) * 3 // 4:]
+
+        async def ingest_batch(ctx, latencies):
+            posted = 0
+            for start in range(0, len(batch_part), args.batch):
+                result = (await _timed(latencies, call_tool(ctx, "post_entries", {"entries": batch_part[start:start + args.batch]}))).data
+                posted += result.get("posted", 0)
+            return len(batch_part), {"posted": posted, "batch": args.batch}
+        await recorder.run("ingest_batch", len(batch_part), ingest_batch)
+
+        async def ingest_concurrent(ctx, latencies):
+            semaphore = asyncio.Semaphore(args.concurrency)
+            async def post(entry):
+                async with semaphore:
+                    return (await _timed(latencies, call_tool(ctx, "post_entry", {"entry": entry}))).data
+            results = await asyncio.gather(*(post(entry) for entry in single_part))
+            posted = sum(1 for r in results if r.get("status") == "success")
+            return len(single_part), {"posted": posted, "concurrency": args.concurrency}
+        await recorder.run("ingest_concurrent", len(single_part), ingest_concurrent)
+
+        async def get_feed(ctx, latencies):
+            returned = 0
+            for i in range(args.feed_calls):
+                order = "utility" if i % 4 == 3 else "recent"
+                returned += len((await _timed(latencies, call_tool(ctx, "get_feed", {"top_k": 50, "order": order}))).data)
+            return args.feed_calls, {"entries_returned": returned}
+        await recorder.run("get_feed", len(feed), get_feed)
+
+        async def feed_pages(ctx, latencies):
+            cursor, pages, entries = None, 0, 0
+            while True:
+                data = (await _timed(latencies, call_tool(ctx, "get_feed_page", {"page_size": 100, "cursor": cursor}))).data
+                pages += 1
+                entries += len(data.get("items", []))
+                cursor = data.get("next_cursor")
+                if not cursor:
+                    return entries, {"pages": pages}
+        await recorder.run("feed_pages", len(feed), feed_pages)
+
+        async def summarizer(ctx, latencies):
+            result = (await _timed(latencies, call_tool(ctx, "process_latest_posts", {}))).data
+            return result.get("summarized", 0) + result.get("failed", 0), {
+                key: result.get(key) for key in ("status", "summarized", "failed")
+            }
+        await recorder.run("summarizer", len(feed), summarizer)
+    finally:
+        feature_extractor.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(), "git_revision": _git_revision(),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "memory_backend": args.memory_backend, "model_backend": model_backend.name,
+            "fake_latency_ms": args.latency_ms, "fake_jitter_ms": args.jitter_ms,
+            "fake_failure_rate": args.failure_rate, "model_calls": getattr(model_backend, "calls", None),
+            "seed": args.seed, "sizes": args.sizes, "feed": args.feed,
+        },
+        "stages": recorder.stages,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Etapas (mesmo nome e tamanho) cujo tempo passou da referência em mais de `tolerance`."""
+    reference = {(s["stage"], s["size"]): s for s in baseline.get("stages", [])}
+    regressions = []
+    for stage in report["stages"]:
+        before = reference.get((stage["stage"], stage["size"]))
+        if before and before["seconds"] > 0 and stage["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append({"stage": stage["stage"], "size": stage["size"], "baseline_seconds": before["seconds"],
+                                "seconds": stage["seconds"], "ratio": round(stage["seconds"] / before["seconds"], 2)})
+    return regressions
+
+
+def main(args) -> int:
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory(prefix="hivemind_bench_") as tmp:
+        workdir = Path(tmp)
+        _configure_environment(args, workdir)
+        # Os agentes escrevem avisos no stdout; ele fica reservado para o JSON.
+        with contextlib.redirect_stdout(sys.stderr):
+            report = asyncio.run(run_suite(args, workdir))
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSÃO: {r['stage']} ({r['size']}) {r['baseline_seconds']}s -> {r['seconds']}s (x{r['ratio']})", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+        print(f"Resultado gravado em {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",") if x], default=[1000, 10000],
+                        help="Tamanhos das árvores sintéticas, ex: 1000,10000,100000")
+    parser.add_argument("--feed", type=int, default=2000, help="Entradas no histórico sintético do feed")
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--feed-calls", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--memory-backend", choices=["memory", "chroma"], default="memory")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,102 @@
+# benchmarks/bench_prompt_tokens.py
+# Compara os tokens estimados do prompt de categorização: formato anterior (JSON indentado com
+# caminhos absolutos e resposta caminho -> categoria) x formato compacto (linhas indexadas).
+#
+# Uso: python benchmarks/bench_prompt_tokens.py [--items 150] [--root /home/usuario/Downloads/2024]
+
+import sys
+import json
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from agents.file_organizer.main import _build_categorization_prompt
+from agents.file_organizer.records import ItemRecord
+from hivemind_core.prompt_manager import estimate_tokens
+
+NAMES = ["relatorio_final", "IMG_2024", "setup-tool", "notas de aula", "backup", "orcamento", "meu-projeto",
+         "contrato assinado", "screenshot", "planilha_vendas", "curriculo", "apresentacao", "video_ferias"]
+EXTENSIONS = [".pdf", ".jpg", ".exe", ".docx", ".zip", ".xlsx", ".png", ".mp4", ".txt", ".pptx", ""]
+
+
+def _old_item_view(item: ItemRecord):
+    """Item como era serializado no formato anterior: caminho, tipo e amostra, sem stat."""
+    data = {"path": item.path, "type": item.type}
+    if item.sample_contents is not None:
+        data["sample_contents"] = list(item.sample_contents)
+    return data
+
+
+def _old_prompt(user_goal, items, known_categories):
+    """Formato usado antes do PromptManager compilado (reproduzido aqui como linha de base)."""
+    categories_hint = ""
+    if known_categories:
+        categories_hint = f"""
+    **Categorias já usadas em outros lotes (reutilize-as quando fizer sentido, com a mesma grafia):**
+    {json.dumps(known_categories, ensure_ascii=False)}
+    """
+    return f"""
+    Você é um especialista em organização de arquivos. Sua tarefa é categorizar a seguinte lista de itens com base no objetivo do usuário e nas pistas fornecidas.
+    **Objetivo do Usuário:** "{user_goal}"
+    **Itens para Categorizar:**
+    ```json
+    {json.dumps([_old_item_view(item) for item in items], indent=2, ensure_ascii=False)}
+    ```
+    {categories_hint}
+    **Instruções:**
+    1. Analise cada item no JSON. Para "folder", use `sample_contents`. Para "file", use o nome/extensão.
+    2. Crie nomes de categoria lógicos (ex: "Projetos Python", "Documentos Fiscais", "Fotos de Viagem").
+    3. Se um item não tiver categoria clara, atribua a categoria "_a_revisar".
+    4. Sua resposta deve ser **APENAS** um único objeto JSON onde a chave é o caminho completo do item (`path`) e o valor é a string da categoria de destino.
+    **Exemplo de Saída JSON:**
+    ```json
+    {{
+      "/path/to/downloads/my-node-project": "Projetos Web",
+      "/path/to/downloads/relatorio.pdf": "Documentos",
+      "/path/to/downloads/fotos_ferias": "Fotos de Viagem"
+    }}
+    ```
+    """
+
+
+def _items(count: int, root: str):
+    rng = random.Random(42)
+    items = []
+    for i in range(count):
+        if rng.random() < 0.15:
+            samples = tuple(f"{rng.choice(NAMES)}{rng.choice(EXTENSIONS)}" for _ in range(3))
+            items.append(ItemRecord(path=f"{root}/{rng.choice(NAMES)}_{i}", type="folder", sample_contents=samples))
+        else:
+            items.append(ItemRecord(path=f"{root}/{rng.choice(NAMES)}_{i}{rng.choice(EXTENSIONS)}", type="file"))
+    return items
+
+
+def main(count: int, root: str):
+    items = _items(count, root)
+    goal = "organizar por tipo de arquivo e assunto"
+    categories = ["Documentos", "Imagens", "Instaladores", "Projetos", "Planilhas"]
+    categories_by_path = {item.path: categories[i % len(categories)] for i, item in enumerate(items)}
+    by_category = {}
+    for index, item in enumerate(items):
+        by_category.setdefault(categories_by_path[item.path], []).append(index)
+
+    rows = [
+        ("anterior", _old_prompt(goal, items, categories), json.dumps(categories_by_path, indent=2, ensure_ascii=False)),
+        ("compacto", _build_categorization_prompt(goal, items, categories), json.dumps(by_category, separators=(',', ':'))),
+    ]
+    baseline_in, baseline_out = estimate_tokens(rows[0][1]), estimate_tokens(rows[0][2])
+    print(f"{count} itens em {root}")
+    print(f"{'formato':<12}{'entrada':>10}{'saída':>10}{'entrada %':>11}{'saída %':>10}")
+    for label, prompt, response in rows:
+        tokens_in, tokens_out = estimate_tokens(prompt), estimate_tokens(response)
+        print(f"{label:<12}{tokens_in:>10}{tokens_out:>10}{100 * tokens_in / baseline_in:>10.0f}%{100 * tokens_out / baseline_out:>9.0f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=150)
+    parser.add_argument("--root", default="/home/usuario/Downloads/2024")
+    args = parser.parse_args()
+    main(args.items, args.root)
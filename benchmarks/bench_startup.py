@@ -0,0 +1,59 @@
+# benchmarks/bench_startup.py
+# Mede o tempo de startup do hub (import do loader + registro dos agentes) em processos novos:
+# carga completa x manifesto frio (primeira execução) x manifesto em cache (lazy).
+#
+# Uso: python benchmarks/bench_startup.py [--runs 3]
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Executado em um interpretador novo, para que nenhum módulo de agente já esteja importado.
+CHILD = """
+import time, json, asyncio
+start = time.perf_counter()
+from fastmcp import FastMCP
+from hivemind_core.agent_loader import load_agents_from_directory
+hub_mcp = FastMCP(name="BenchHub")
+asyncio.run(load_agents_from_directory(hub_mcp))
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "tools": len(hub_mcp._tool_manager._tools)}))
+"""
+
+
+def _run(env_overrides: dict) -> dict:
+    env = {**os.environ, **env_overrides, "PYTHONPATH": str(ROOT)}
+    out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(runs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = str(Path(tmp) / "tool_manifest.json")
+        eager = [_run({"HIVEMIND_LAZY_AGENTS": "0"}) for _ in range(runs)]
+        cold = _run({"HIVEMIND_TOOL_MANIFEST": manifest})
+        warm = [_run({"HIVEMIND_TOOL_MANIFEST": manifest}) for _ in range(runs)]
+
+    rows = [
+        ("carga completa", statistics.median(r["seconds"] for r in eager), eager[0]["tools"]),
+        ("manifesto frio", cold["seconds"], cold["tools"]),
+        ("manifesto em cache", statistics.median(r["seconds"] for r in warm), warm[0]["tools"]),
+    ]
+    baseline = rows[0][1]
+    print(f"{'modo':<22}{'startup (s)':>12}{'ferramentas':>13}{'ganho':>9}")
+    for label, seconds, tools in rows:
+        print(f"{label:<22}{seconds:>12.3f}{tools:>13}{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    main(parser.parse_args().runs)
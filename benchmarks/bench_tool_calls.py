@@ -0,0 +1,73 @@
+# benchmarks/bench_tool_calls.py
+# Mede o custo por chamada de ferramenta: Client novo por chamada x Client reaproveitado x dispatch direto.
+#
+# Uso: python benchmarks/bench_tool_calls.py [--calls 500]
+
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastmcp import FastMCP, Client, Context
+from hivemind_core.dispatch import ToolDispatcher
+
+hub_mcp = FastMCP(name="BenchHub")
+
+
+@hub_mcp.tool
+async def echo(payload: dict, ctx: Context) -> dict:
+    """Ferramenta mínima: o tempo medido é só o do caminho da chamada."""
+    return payload
+
+
+PAYLOAD = {"entry_id": "bench", "content": "x" * 200, "tags": ["a", "b"], "context": {"n": 1}}
+
+
+async def _timed(label: str, calls: int, call) -> dict:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "mode": label,
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+async def main(calls: int):
+    results = []
+
+    async def new_client_per_call():
+        async with Client(hub_mcp) as client:
+            await client.call_tool("echo", {"payload": PAYLOAD})
+    results.append(await _timed("client por chamada", calls, new_client_per_call))
+
+    async with Client(hub_mcp) as pooled:
+        async def pooled_client():
+            await pooled.call_tool("echo", {"payload": PAYLOAD})
+        results.append(await _timed("client reaproveitado", calls, pooled_client))
+
+    dispatcher = ToolDispatcher()
+    dispatcher.bind(hub_mcp)
+    async def direct_dispatch():
+        await dispatcher.call_tool(None, "echo", {"payload": PAYLOAD})
+    results.append(await _timed("dispatch direto", calls, direct_dispatch))
+
+    baseline = results[0]["mean_us"]
+    print(f"{'modo':<22}{'média (µs)':>12}{'p50 (µs)':>12}{'p99 (µs)':>12}{'ganho':>9}")
+    for r in results:
+        print(f"{r['mode']:<22}{r['mean_us']:>12.1f}{r['p50_us']:>12.1f}{r['p99_us']:>12.1f}{baseline / r['mean_us']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    asyncio.run(main(parser.parse_args().calls))
@@ -0,0 +1,131 @@
+# core_agents/memory_manager/blobs.py
+# Armazém de blobs comprimidos e endereçados por conteúdo para campos grandes das entradas.
+
+import os
+import json
+import time
+import zlib
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from hivemind_core.resources import process_resource
+
+BLOB_DIR = Path(os.getenv("HIVEMIND_BLOB_DIR", ".hivemind_cache/blobs"))
+# Campos do `context` cujo JSON passa desse tamanho vão para o armazém de blobs.
+BLOB_THRESHOLD_BYTES = int(os.getenv("HIVEMIND_BLOB_THRESHOLD", "4096"))
+# Blobs recém-gravados podem ainda não estar referenciados no índice; o GC os poupa por esse tempo.
+BLOB_GC_GRACE_SECONDS = 3600
+
+BLOB_REF_KEY = "$blob"
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get(BLOB_REF_KEY), str)
+
+
+def blob_refs_in(context: Any) -> Set[str]:
+    """Digests referenciados diretamente nos campos de um contexto."""
+    if not isinstance(context, dict):
+        return set()
+    return {value[BLOB_REF_KEY] for value in context.values() if is_blob_ref(value)}
+
+
+class BlobStore:
+    """Guarda valores JSON comprimidos com zlib em `<dir>/<2 primeiros hex>/<sha256>`.
+
+    O mesmo conteúdo gera sempre o mesmo digest, então gravar de novo só renova o mtime do
+    blob, que volta a contar como recém-gravado para o GC. O lock impede que o GC apague um
+    blob entre a verificação e a renovação feitas por `put`.
+    """
+
+    def __init__(self, directory: Path = BLOB_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> Path:
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Digest de blob inválido: {digest!r}")
+        return self.directory / digest[:2] / digest
+
+    def put(self, value: Any) -> Tuple[str, int]:
+        """Grava um valor JSON. Retorna (digest, tamanho em bytes do JSON original)."""
+        raw = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._path(digest)
+        with self._lock:
+            try:
+                # Reaproveitado: a nova referência ainda pode não estar no índice quando o GC rodar.
+                os.utime(path)
+                return digest, len(raw)
+            except FileNotFoundError:
+                pass
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(raw, 6))
+            os.replace(tmp_path, path)
+        return digest, len(raw)
+
+    def get(self, digest: str) -> Any:
+        with open(self._path(digest), "rb") as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    def offload_context(self, context: Any, threshold: int = BLOB_THRESHOLD_BYTES) -> Any:
+        """Substitui os campos grandes de um contexto por referências `{"$blob": digest, "bytes": n}`."""
+        if not isinstance(context, dict):
+            return context
+        offloaded: Dict[str, Any] = {}
+        for key, value in context.items():
+            if value is not None and not is_blob_ref(value) and not isinstance(value, (bool, int, float)):
+                size = len(json.dumps(value, ensure_ascii=False))
+                if size > threshold:
+                    digest, raw_size = self.put(value)
+                    value = {BLOB_REF_KEY: digest, "bytes": raw_size}
+            offloaded[key] = value
+        return offloaded
+
+    def resolve_context(self, context: Any) -> Any:
+        """Operação inversa de `offload_context`: carrega os blobs referenciados."""
+        if not isinstance(context, dict):
+            return context
+        return {key: self.get(value[BLOB_REF_KEY]) if is_blob_ref(value) else value for key, value in context.items()}
+
+    def iter_blobs(self) -> Iterable[Tuple[str, Path]]:
+        if not self.directory.is_dir():
+            return
+        for shard in self.directory.iterdir():
+            if shard.is_dir():
+                for path in shard.iterdir():
+                    if len(path.name) == 64:
+                        yield path.name, path
+
+    def collect_garbage(self, live_digests: Set[str], grace_seconds: float = BLOB_GC_GRACE_SECONDS,
+                        now: Optional[float] = None) -> Dict[str, int]:
+        """Apaga blobs sem referência, exceto os gravados há menos de `grace_seconds`."""
+        now = time.time() if now is None else now
+        removed = freed = kept = 0
+        for digest, path in list(self.iter_blobs()):
+            if digest in live_digests:
+                kept += 1
+                continue
+            with self._lock:
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue
+                if now - st.st_mtime < grace_seconds:
+                    kept += 1
+                    continue
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+            removed += 1
+            freed += st.st_size
+        return {"removed": removed, "freed_bytes": freed, "kept": kept}
+
+
+# Armazém compartilhado pelo processo do hub.
+blob_store = process_resource(f"{__name__}.blob_store", BlobStore)
@@ -0,0 +1,181 @@
+# core_agents/memory_manager/embedding_cache.py
+# Cache local de embeddings: matriz float32 mapeada em memória + índice SQLite, com despejo LRU.
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from hivemind_core.telemetry import cache_lookups
+from hivemind_core.resources import process_resource
+
+EMBEDDING_CACHE_DIR = Path(os.getenv("HIVEMIND_EMBEDDING_CACHE_DIR", ".hivemind_cache/embeddings"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("HIVEMIND_EMBEDDING_CACHE_SIZE", "20000"))
+
+
+def content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Mapeia (modelo, task_type, sha256 do conteúdo) -> vetor.
+
+    Os vetores ficam em um arquivo `vectors_<dim>.f32` por dimensão, com `max_entries`
+    linhas; o SQLite guarda apenas a linha (slot) de cada chave e o último uso. Quando
+    o arquivo enche, a linha usada há mais tempo é reaproveitada.
+    """
+
+    def __init__(self, directory: Path = EMBEDDING_CACHE_DIR, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._matrices: Dict[int, np.memmap] = {}
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.directory / "index.sqlite3"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, task_type TEXT NOT NULL, digest TEXT NOT NULL,"
+                " dim INTEGER NOT NULL, slot INTEGER NOT NULL, last_used INTEGER NOT NULL,"
+                " PRIMARY KEY (model, task_type, digest))"
+            )
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_embeddings_slot ON embeddings (dim, slot)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_lru ON embeddings (dim, last_used)")
+            self._conn = conn
+        return self._conn
+
+    def _matrix(self, dim: int) -> np.memmap:
+        matrix = self._matrices.get(dim)
+        if matrix is None:
+            path = self.directory / f"vectors_{dim}.f32"
+            expected = self.max_entries * dim * 4
+            conn = self._connection()
+            if not path.exists() or path.stat().st_size != expected:
+                # Arquivo novo (ou capacidade alterada): o índice dessa dimensão deixa de valer.
+                conn.execute("DELETE FROM embeddings WHERE dim = ?", (dim,))
+                with open(path, "wb") as f:
+                    f.truncate(expected)
+            # Linhas que apontam para fora do arquivo (índice de outra capacidade) também não valem.
+            conn.execute("DELETE FROM embeddings WHERE dim = ? AND slot >= ?", (dim, self.max_entries))
+            conn.commit()
+            matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(self.max_entries, dim))
+            self._matrices[dim] = matrix
+        return matrix
+
+    def _lookup(self, conn: sqlite3.Connection, model: str, task_type: str, digests: List[str]) -> Dict[str, tuple]:
+        found: Dict[str, tuple] = {}
+        for start in range(0, len(digests), 500):
+            batch = digests[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT digest, dim, slot FROM embeddings WHERE model = ? AND task_type = ? AND slot < ?"
+                f" AND digest IN ({placeholders})",
+                [model, task_type, self.max_entries, *batch]
+            ).fetchall()
+            for digest, dim, slot in rows:
+                found[digest] = (dim, slot)
+        return found
+
+    def get_many(self, model: str, task_type: str, contents: Sequence[str]) -> List[Optional[List[float]]]:
+        """Vetores em cache na ordem de `contents`; None para as faltas."""
+        digests = [content_digest(c) for c in contents]
+        with self._lock:
+            conn = self._connection()
+            unique = list(set(digests))
+            found = self._lookup(conn, model, task_type, unique)
+            unopened = {dim for dim, _ in found.values() if dim not in self._matrices}
+            if unopened:
+                # Abrir a matriz pode invalidar o índice da dimensão (arquivo ausente ou de outro
+                # tamanho): as linhas lidas antes disso apontariam para vetores zerados.
+                for dim in unopened:
+                    self._matrix(dim)
+                found = self._lookup(conn, model, task_type, unique)
+            vectors = {digest: self._matrix(dim)[slot].tolist() for digest, (dim, slot) in found.items()}
+            if found:
+                now = time.time_ns()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND task_type = ? AND digest = ?",
+                    [(now, model, task_type, digest) for digest in found]
+                )
+                conn.commit()
+
+        result = [vectors.get(digest) for digest in digests]
+        hits = sum(1 for v in result if v is not None)
+        self.hits += hits
+        self.misses += len(result) - hits
+        cache_lookups.inc(hits, cache="embedding", result="hit")
+        cache_lookups.inc(len(result) - hits, cache="embedding", result="miss")
+        return result
+
+    def put_many(self, model: str, task_type: str, contents: Sequence[str], vectors: Sequence[Sequence[float]]):
+        if not contents:
+            return
+        with self._lock:
+            conn = self._connection()
+            now = time.time_ns()
+            for content, vector in zip(contents, vectors):
+                array = np.asarray(vector, dtype=np.float32)
+                dim = int(array.shape[0])
+                matrix = self._matrix(dim)
+                digest = content_digest(content)
+                row = conn.execute(
+                    "SELECT slot FROM embeddings WHERE model = ? AND task_type = ? AND digest = ? AND dim = ?",
+                    (model, task_type, digest, dim)
+                ).fetchone()
+                if row is None:
+                    row = self._free_slot(conn, dim)
+                slot = row[0]
+                matrix[slot] = array
+                conn.execute(
+                    "INSERT INTO embeddings (model, task_type, digest, dim, slot, last_used) VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (model, task_type, digest) DO UPDATE SET dim = excluded.dim, slot = excluded.slot,"
+                    " last_used = excluded.last_used",
+                    (model, task_type, digest, dim, slot, now)
+                )
+            for matrix in self._matrices.values():
+                matrix.flush()
+            conn.commit()
+
+    def _free_slot(self, conn: sqlite3.Connection, dim: int) -> tuple:
+        used = conn.execute("SELECT COUNT(*) FROM embeddings WHERE dim = ?", (dim,)).fetchone()[0]
+        if used < self.max_entries:
+            # Slots são preenchidos em ordem; sem despejos anteriores, o próximo livre é `used`.
+            taken = conn.execute("SELECT 1 FROM embeddings WHERE dim = ? AND slot = ?", (dim, used)).fetchone()
+            if taken is None:
+                return (used,)
+            slots = {r[0] for r in conn.execute("SELECT slot FROM embeddings WHERE dim = ?", (dim,))}
+            return (next(s for s in range(self.max_entries) if s not in slots),)
+        # Cheio: reaproveita a linha usada há mais tempo.
+        victim = conn.execute(
+            "SELECT rowid, slot FROM embeddings WHERE dim = ? ORDER BY last_used ASC LIMIT 1", (dim,)
+        ).fetchone()
+        conn.execute("DELETE FROM embeddings WHERE rowid = ?", (victim[0],))
+        return (victim[1],)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "max_entries_per_dim": self.max_entries,
+        }
+
+
+# Cache compartilhado pelo processo do hub.
+embedding_cache = process_resource(f"{__name__}.embedding_cache", EmbeddingCache)
@@ -0,0 +1,251 @@
+# core_agents/memory_manager/feed_index.py
+# Índice do feed em SQLite ao lado do ChromaDB: leitura paginada por cursor, em O(tamanho da página).
+
+import os
+import json
+import math
+import base64
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core_agents.memory_manager.ingest import metadata_to_entry, timestamp_to_epoch, TIMESTAMP_EPOCH_KEY
+from core_agents.memory_manager.blobs import blob_refs_in
+from hivemind_core.resources import process_resource
+
+FEED_INDEX_PATH = Path(os.getenv("HIVEMIND_FEED_INDEX", ".hivemind_cache/feed_index.sqlite3"))
+BACKFILL_BATCH = 1000
+# Segundos para que uma entrada precise de e (~2,7) vezes mais utilidade para ficar à frente de uma mais nova.
+SCORE_DECAY_SECONDS = float(os.getenv("HIVEMIND_SCORE_DECAY_SECONDS", "86400"))
+
+
+def utility_rank(utility_score: Any, timestamp_epoch: float, decay_seconds: float = SCORE_DECAY_SECONDS) -> float:
+    """Chave de ordenação por utilidade com decaimento no tempo: log1p(max(score, 0)) + t / decay.
+
+    Como o termo de tempo cresce igual para todas as entradas, a ordem relativa não muda
+    com o passar do tempo: a chave só precisa ser recalculada quando o score muda.
+    """
+    score = utility_score if isinstance(utility_score, (int, float)) else 0.0
+    return math.log1p(max(score, 0.0)) + timestamp_epoch / decay_seconds
+
+
+def encode_cursor(timestamp_epoch: float, entry_id: str) -> str:
+    raw = json.dumps([timestamp_epoch, entry_id], separators=(',', ':')).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        timestamp_epoch, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(timestamp_epoch), str(entry_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Cursor inválido: {cursor!r}") from e
+
+
+class FeedIndex:
+    """Guarda cada entrada já decodificada, ordenada por (timestamp, entry_id) decrescente.
+
+    O ChromaDB não ordena por metadados; aqui a página mais recente (com ou sem filtros
+    por tipo, agente ou tag) é uma leitura de índice, e o cursor da próxima página é a
+    chave da última linha retornada (keyset pagination).
+    """
+
+    def __init__(self, path: Path = FEED_INDEX_PATH):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        # Serializa as primeiras chamadas de ensure_backfilled (separado de `_lock`, que
+        # upsert_many usa em cada lote da importação).
+        self._backfill_lock = threading.Lock()
+        self._backfill_checked = False
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS feed ("
+                " entry_id TEXT PRIMARY KEY, ts REAL NOT NULL, entry_type TEXT, agent_name TEXT,"
+                " entry_json TEXT NOT NULL, rank REAL);"
+                "CREATE INDEX IF NOT EXISTS idx_feed_ts ON feed (ts DESC, entry_id DESC);"
+                "CREATE INDEX IF NOT EXISTS idx_feed_type ON feed (entry_type, ts DESC, entry_id DESC);"
+                "CREATE INDEX IF NOT EXISTS idx_feed_agent ON feed (agent_name, ts DESC, entry_id DESC);"
+                "CREATE TABLE IF NOT EXISTS feed_tags ("
+                " tag TEXT NOT NULL, entry_id TEXT NOT NULL, ts REAL NOT NULL, PRIMARY KEY (tag, entry_id));"
+                "CREATE INDEX IF NOT EXISTS idx_feed_tags_ts ON feed_tags (tag, ts DESC, entry_id DESC);"
+                "CREATE TABLE IF NOT EXISTS blob_refs ("
+                " digest TEXT NOT NULL, entry_id TEXT NOT NULL, PRIMARY KEY (digest, entry_id));"
+                "CREATE INDEX IF NOT EXISTS idx_blob_refs_entry ON blob_refs (entry_id);"
+                "CREATE TABLE IF NOT EXISTS feed_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+            )
+            self._migrate_rank(conn)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _migrate_rank(conn: sqlite3.Connection):
+        """Índices criados antes da ordenação por utilidade ganham a coluna `rank`, preenchida aqui."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(feed)")}
+        if "rank" not in columns:
+            conn.execute("ALTER TABLE feed ADD COLUMN rank REAL")
+        rows = conn.execute("SELECT entry_id, ts, json_extract(entry_json, '$.utility_score') FROM feed WHERE rank IS NULL").fetchall()
+        if rows:
+            conn.executemany("UPDATE feed SET rank = ? WHERE entry_id = ?",
+                             [(utility_rank(score, ts), entry_id) for entry_id, ts, score in rows])
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_feed_rank ON feed (rank DESC, entry_id DESC)")
+        conn.commit()
+
+    def upsert_many(self, metadatas: Iterable[Dict[str, Any]]):
+        """Indexa metadados no formato gravado no ChromaDB; tags e contexto são decodificados aqui, uma vez."""
+        rows, tag_rows, blob_rows, ids = [], [], [], []
+        for meta in metadatas:
+            entry = metadata_to_entry(meta)
+            ts = meta.get(TIMESTAMP_EPOCH_KEY)
+            if ts is None:
+                ts = timestamp_to_epoch(entry.get("timestamp")) or 0.0
+            entry_id = entry["entry_id"]
+            ids.append((entry_id,))
+            rows.append((entry_id, ts, entry.get("entry_type"), entry.get("agent_name"),
+                         json.dumps(entry, ensure_ascii=False), utility_rank(entry.get("utility_score"), ts)))
+            tags = entry.get("tags") if isinstance(entry.get("tags"), list) else []
+            tag_rows.extend((str(tag), entry_id, ts) for tag in set(tags))
+            blob_rows.extend((digest, entry_id) for digest in blob_refs_in(entry.get("context")))
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("DELETE FROM feed_tags WHERE entry_id = ?", ids)
+            conn.executemany("DELETE FROM blob_refs WHERE entry_id = ?", ids)
+            conn.executemany(
+                "INSERT INTO feed (entry_id, ts, entry_type, agent_name, entry_json, rank) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (entry_id) DO UPDATE SET ts = excluded.ts, entry_type = excluded.entry_type,"
+                " agent_name = excluded.agent_name, entry_json = excluded.entry_json, rank = excluded.rank",
+                rows
+            )
+            conn.executemany("INSERT OR REPLACE INTO feed_tags (tag, entry_id, ts) VALUES (?, ?, ?)", tag_rows)
+            conn.executemany("INSERT OR IGNORE INTO blob_refs (digest, entry_id) VALUES (?, ?)", blob_rows)
+            conn.commit()
+
+    def delete_many(self, entry_ids: List[str]):
+        ids = [(entry_id,) for entry_id in entry_ids]
+        with self._lock:
+            conn = self._connection()
+            for table in ("feed", "feed_tags", "blob_refs"):
+                conn.executemany(f"DELETE FROM {table} WHERE entry_id = ?", ids)
+            conn.commit()
+
+    def expired_ids(self, entry_type: str, before: float, limit: int = BACKFILL_BATCH) -> List[str]:
+        """IDs das entradas mais antigas de um tipo com timestamp anterior a `before`."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT entry_id FROM feed WHERE entry_type = ? AND ts < ? ORDER BY ts ASC LIMIT ?",
+                (entry_type, before, limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def live_blob_digests(self) -> set:
+        with self._lock:
+            return {row[0] for row in self._connection().execute("SELECT DISTINCT digest FROM blob_refs")}
+
+    def update_scores(self, scores: Dict[str, float]):
+        """Atualiza o utility_score (e a chave de ordenação) de várias entradas em uma transação."""
+        if not scores:
+            return
+        with self._lock:
+            conn = self._connection()
+            rows = []
+            for entry_id, score in scores.items():
+                row = conn.execute("SELECT ts FROM feed WHERE entry_id = ?", (entry_id,)).fetchone()
+                if row is not None:
+                    rows.append((score, utility_rank(score, row[0]), entry_id))
+            conn.executemany(
+                "UPDATE feed SET entry_json = json_set(entry_json, '$.utility_score', ?), rank = ? WHERE entry_id = ?",
+                rows
+            )
+            conn.commit()
+
+    def page(self, page_size: int = 50, cursor: Optional[str] = None, entry_type: Optional[str] = None,
+             agent_name: Optional[str] = None, tag: Optional[str] = None,
+             since: Optional[float] = None, order: str = "recent") -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Retorna (entradas na ordem pedida, cursor da próxima página ou None).
+
+        `order="recent"` ordena por timestamp; `order="utility"` pela utilidade com decaimento.
+        """
+        if order not in ("recent", "utility"):
+            raise ValueError(f"Ordenação desconhecida: {order!r} (use 'recent' ou 'utility').")
+        page_size = max(1, page_size)
+        if tag:
+            sql = "FROM feed_tags t JOIN feed f ON f.entry_id = t.entry_id"
+            conditions, params, key = ["t.tag = ?"], [tag], ("t.ts", "t.entry_id")
+        else:
+            sql = "FROM feed f"
+            conditions, params, key = [], [], ("f.ts", "f.entry_id")
+        if order == "utility":
+            key = ("f.rank", "f.entry_id")
+        sql = f"SELECT f.entry_id, {key[0]}, f.entry_json {sql}"
+        if entry_type:
+            conditions.append("f.entry_type = ?")
+            params.append(entry_type)
+        if agent_name:
+            conditions.append("f.agent_name = ?")
+            params.append(agent_name)
+        if since is not None:
+            conditions.append("f.ts >= ?")
+            params.append(since)
+        if cursor:
+            cursor_ts, cursor_id = decode_cursor(cursor)
+            conditions.append(f"({key[0]} < ? OR ({key[0]} = ? AND {key[1]} < ?))")
+            params.extend([cursor_ts, cursor_ts, cursor_id])
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {key[0]} DESC, {key[1]} DESC LIMIT ?"
+        params.append(page_size + 1)
+
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        items = [json.loads(entry_json) for _, _, entry_json in rows]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if has_more else None
+        return items, next_cursor
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM feed").fetchone()[0]
+
+    def _backfill_done(self) -> bool:
+        with self._lock:
+            row = self._connection().execute("SELECT value FROM feed_meta WHERE key = 'backfilled'").fetchone()
+        return row is not None
+
+    def ensure_backfilled(self, collection) -> int:
+        """Importa as entradas já existentes no ChromaDB, se o índice ainda não foi preenchido.
+
+        O marcador em `feed_meta` só é gravado depois do último lote: uma importação
+        interrompida é refeita por inteiro na próxima abertura (os upserts são idempotentes).
+        """
+        if self._backfill_checked:
+            return 0
+        with self._backfill_lock:
+            if self._backfill_checked:
+                return 0
+            imported = 0
+            if not self._backfill_done():
+                total = collection.count()
+                for offset in range(0, total, BACKFILL_BATCH):
+                    batch = collection.get(limit=BACKFILL_BATCH, offset=offset, include=["metadatas"])
+                    self.upsert_many(batch["metadatas"])
+                    imported += len(batch["metadatas"])
+                with self._lock:
+                    conn = self._connection()
+                    conn.execute("INSERT OR REPLACE INTO feed_meta (key, value) VALUES ('backfilled', ?)", (str(imported),))
+                    conn.commit()
+            self._backfill_checked = True
+            return imported
+
+
+# Índice compartilhado pelo processo do hub.
+feed_index = process_resource(f"{__name__}.feed_index", FeedIndex)
@@ -0,0 +1,177 @@
+# core_agents/memory_manager/ingest.py
+# Fila de ingestão do Hive Mind: agrupa posts concorrentes em um embedding e um upsert.
+
+import os
+import json
+import time
+import asyncio
+import contextvars
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from hivemind_core.telemetry import span, current_span
+
+INGEST_WINDOW_SECONDS = float(os.getenv("HIVEMIND_INGEST_WINDOW_MS", "20")) / 1000.0
+# A API de embeddings aceita no máximo 100 textos por requisição.
+INGEST_MAX_BATCH = int(os.getenv("HIVEMIND_INGEST_MAX_BATCH", "100"))
+
+EmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+UpsertFn = Callable[[List[str], List[List[float]], List[Dict[str, Any]], List[str]], Awaitable[None]]
+
+
+# Campos derivados gravados junto com a entrada para permitir filtros `where` no ChromaDB.
+TIMESTAMP_EPOCH_KEY = "timestamp_epoch"
+TAG_FLAG_PREFIX = "tag_"
+
+
+def timestamp_to_epoch(timestamp: Any) -> Optional[float]:
+    """Converte um timestamp ISO 8601 (sem fuso = UTC) em segundos desde a época."""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    try:
+        parsed = datetime.fromisoformat(str(timestamp))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def tag_flag(tag: str) -> str:
+    return f"{TAG_FLAG_PREFIX}{tag}"
+
+
+def entry_to_metadata(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte uma MemoryEntry em metadados aceitos pelo ChromaDB (apenas valores escalares)."""
+    metadata = dict(entry)  # Todos os campos vão para metadados
+    tags = metadata.get('tags')
+    # Garante que tags e contexto sejam strings JSON
+    if isinstance(tags, list):
+        metadata['tags'] = json.dumps(tags, ensure_ascii=False)
+        # Uma flag booleana por tag: o filtro por tag vira uma igualdade indexada.
+        metadata.update({tag_flag(str(tag)): True for tag in tags})
+    if isinstance(metadata.get('context'), (dict, list)):
+        metadata['context'] = json.dumps(metadata['context'], ensure_ascii=False)
+    epoch = timestamp_to_epoch(metadata.get('timestamp'))
+    if epoch is not None:
+        metadata[TIMESTAMP_EPOCH_KEY] = epoch
+    return metadata
+
+
+def metadata_to_entry(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Operação inversa de `entry_to_metadata`: decodifica tags e contexto e remove os campos derivados."""
+    entry = {
+        key: value for key, value in metadata.items()
+        if key != TIMESTAMP_EPOCH_KEY and not key.startswith(TAG_FLAG_PREFIX)
+    }
+    for key, default in (('tags', []), ('context', {})):
+        if isinstance(entry.get(key), str):
+            try:
+                entry[key] = json.loads(entry[key])
+            except (json.JSONDecodeError, TypeError):
+                entry[key] = default
+    return entry
+
+
+class IngestionQueue:
+    """Coleta chamadas concorrentes de post_entry e as grava em lote.
+
+    A primeira entrada abre uma janela de `window` segundos (ou até `max_batch` entradas);
+    o lote é embutido em uma única requisição e gravado com um único upsert. Cada chamador
+    recebe o seu próprio resultado.
+    """
+
+    def __init__(self, embed: EmbedFn, upsert: UpsertFn,
+                 window: float = INGEST_WINDOW_SECONDS, max_batch: int = INGEST_MAX_BATCH):
+        self.embed = embed
+        self.upsert = upsert
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self.batches_written = 0
+        self.entries_written = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            if self._loop is not loop:
+                self._queue = asyncio.Queue()
+            self._loop = loop
+            # Contexto vazio: o worker atende todos os chamadores e não deve herdar o span de quem o criou.
+            self._worker = loop.create_task(self._run(), context=contextvars.Context())
+
+    async def submit(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return (await self.submit_many([entry]))[0]
+
+    async def submit_many(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        caller = current_span()
+        trace_id = caller.trace_id if caller else None
+        futures = []
+        for entry in entries:
+            future = loop.create_future()
+            self._queue.put_nowait((entry, future, trace_id))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                # Entradas já enfileiradas (ex: post_entries) entram sem esperar a janela.
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                # Nunca deixa um chamador esperando para sempre.
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_result({"status": "error", "message": f"Falha ao postar entrada no HiveMind: {e}"})
+
+    async def _write_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future, Optional[str]]]):
+        # Cada lote é um trace próprio; `caller_traces` liga-o aos traces de quem postou.
+        callers = sorted({trace_id for _, _, trace_id in batch if trace_id})
+        with span("memory.ingest_batch", entries=len(batch), caller_traces=callers):
+            await self._write_prepared(batch)
+
+    async def _write_prepared(self, batch: List[Tuple[Dict[str, Any], asyncio.Future, Optional[str]]]):
+        # Valida cada entrada separadamente: uma entrada inválida não derruba o lote.
+        # IDs repetidos no mesmo lote ficam com a última versão (o upsert rejeita duplicatas).
+        prepared: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        waiting: List[Tuple[str, asyncio.Future]] = []
+        for entry, future, _ in batch:
+            try:
+                entry_id = entry['entry_id']
+                prepared[entry_id] = (entry['content'], entry_to_metadata(entry))
+                waiting.append((entry_id, future))
+            except Exception as e:
+                if not future.done():
+                    future.set_result({"status": "error", "message": f"Entrada inválida: {e}"})
+        if not prepared:
+            return
+
+        ids = list(prepared)
+        documents = [prepared[i][0] for i in ids]
+        metadatas = [prepared[i][1] for i in ids]
+        embeddings = await self.embed(documents)
+        await self.upsert(ids, embeddings, metadatas, documents)
+        self.batches_written += 1
+        self.entries_written += len(ids)
+        for entry_id, future in waiting:
+            if not future.done():
+                future.set_result({"status": "success", "entry_id": entry_id})
@@ -2,28 +2,93 @@
 import os
 import uuid
 import json
+import time
+import asyncio
 from datetime import datetime
-from typing import List, Dict, TypedDict, Optional
-import google.generativeai as genai
+from typing import List, Dict, Optional
+# Pydantic exige o TypedDict de typing_extensions em Python < 3.12.
+from typing_extensions import TypedDict
 from fastmcp import FastMCP, Context
-import chromadb
-from chromadb.config import Settings
+
+from core_agents.memory_manager.ingest import (
+    IngestionQueue, metadata_to_entry, timestamp_to_epoch, tag_flag, TIMESTAMP_EPOCH_KEY
+)
+from core_agents.memory_manager.embedding_cache import embedding_cache
+from core_agents.memory_manager.feed_index import feed_index
+from core_agents.memory_manager.store import AsyncMemoryStore, create_backend
+from core_agents.memory_manager.scores import ScoreAggregator
+from core_agents.memory_manager.blobs import blob_store
+
+from hivemind_core.model_backend import model_backend
+from hivemind_core.resources import process_resource
 
 from dotenv import load_dotenv
 load_dotenv()
-if os.getenv("GEMINI_API_KEY"):
-    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
-client = chromadb.PersistentClient(
-    path="chroma_db",
-    settings=Settings(anonymized_telemetry=False)
-)
-hive_mind_collection = client.get_or_create_collection(
-    name="hive_mind_simulation", # Nome mais genérico
-    metadata={"hnsw:space": "cosine"}
-)
+# Backend escolhido por HIVEMIND_MEMORY_BACKEND ("chroma" por padrão, "memory" para testes).
+# Nenhuma chamada ao backend roda no event loop: leituras vão para um pool, escritas para uma única thread.
+# A instância é do processo: recarregar o agente não cria um segundo cliente nem uma segunda thread de escrita.
+memory_store = process_resource(f"{__name__}.memory_store", lambda: AsyncMemoryStore(create_backend()))
 mcp = FastMCP(name="MemoryManager")
 
+def _retention_seconds() -> Dict[str, float]:
+    """Retenção por entry_type em segundos, de HIVEMIND_RETENTION (ex: '{"ORGANIZATION_PLAN": 2592000}').
+
+    Lida a cada compactação. Tipos ausentes nunca expiram; JSON inválido ou prazos não numéricos
+    são ignorados com um aviso, sem derrubar o agente.
+    """
+    raw = os.getenv("HIVEMIND_RETENTION", "{}")
+    try:
+        configured = json.loads(raw)
+    except json.JSONDecodeError as e:
+        print(f"AVISO: HIVEMIND_RETENTION não é um JSON válido ({e}); nenhuma entrada vai expirar.")
+        return {}
+    if not isinstance(configured, dict):
+        print("AVISO: HIVEMIND_RETENTION deve ser um objeto {entry_type: segundos}; nenhuma entrada vai expirar.")
+        return {}
+    retention: Dict[str, float] = {}
+    for entry_type, ttl in configured.items():
+        if isinstance(ttl, bool) or not isinstance(ttl, (int, float)):
+            print(f"AVISO: Retenção de '{entry_type}' ignorada: {ttl!r} não é um número de segundos.")
+            continue
+        if ttl > 0:
+            retention[entry_type] = float(ttl)
+    return retention
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+async def _embed(texts: List[str], task_type: str) -> List[List[float]]:
+    """Gera embeddings em lote, consultando antes o cache local.
+
+    Só os textos ausentes do cache (sem repetição) vão para a API, em uma única requisição.
+    """
+    cache_model = model_backend.cache_key(EMBEDDING_MODEL)
+    vectors = await asyncio.to_thread(embedding_cache.get_many, cache_model, task_type, texts)
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    if missing:
+        embeddings = await model_backend.embed(EMBEDDING_MODEL, missing, task_type)
+        fresh = dict(zip(missing, embeddings))
+        await asyncio.to_thread(embedding_cache.put_many, cache_model, task_type, missing, embeddings)
+        vectors = [vector if vector is not None else fresh[text] for text, vector in zip(texts, vectors)]
+    return vectors
+
+async def _embed_documents(texts: List[str]) -> List[List[float]]:
+    return await _embed(texts, "RETRIEVAL_DOCUMENT")
+
+def _write_entries(ids: List[str], embeddings: List[List[float]], metadatas: List[dict], documents: List[str]):
+    memory_store.backend.upsert(ids, embeddings, metadatas, documents)
+    # O índice do feed precisa estar completo antes de receber as novas entradas.
+    feed_index.ensure_backfilled(memory_store.backend)
+    feed_index.upsert_many(metadatas)
+
+async def _upsert_entries(ids: List[str], embeddings: List[List[float]], metadatas: List[dict], documents: List[str]):
+    await memory_store.run_write(_write_entries, ids, embeddings, metadatas, documents)
+
+# Posts concorrentes são agrupados: um embedding em lote e um upsert por janela.
+# Após uma recarga, a fila (e o que está nela) continua a mesma, já usando as funções novas.
+ingest_queue = process_resource(f"{__name__}.ingest_queue", lambda: IngestionQueue(_embed_documents, _upsert_entries))
+ingest_queue.embed, ingest_queue.upsert = _embed_documents, _upsert_entries
+
 class MemoryEntry(TypedDict):
     entry_id: str
     agent_name: str
@@ -35,96 +100,263 @@ class MemoryEntry(TypedDict):
     utility_score: float
     references_entry_id: Optional[str]
 
+def _prepare_entries(entries: List[MemoryEntry]) -> List[dict]:
+    """Move os campos grandes do contexto (ex: o plano completo) para o armazém de blobs."""
+    prepared = []
+    for entry in entries:
+        entry = dict(entry)
+        entry['context'] = blob_store.offload_context(entry.get('context'))
+        prepared.append(entry)
+    return prepared
+
 @mcp.tool
 async def post_entry(entry: MemoryEntry, ctx: Context) -> dict:
     """Armazena uma entrada completa do HiveMind (MemoryEntry) na memória compartilhada."""
+    await ctx.log(f"HiveMind: Registrando entrada de '{entry.get('agent_name')}'", level="debug")
     try:
-        await ctx.log(f"HiveMind: Registrando entrada de '{entry['agent_name']}'", level="debug")
-        result = await genai.embed_content_async(
-            model="models/text-embedding-004",
-            content=entry['content'],
-            task_type="RETRIEVAL_DOCUMENT"
-        )
-        embedding = result['embedding']
-        metadata = dict(entry) # Todos os campos vão para metadados
-        
-        # Garante que tags sejam strings JSON
-        if 'tags' in metadata and isinstance(metadata['tags'], list):
-            metadata['tags'] = json.dumps(metadata['tags'])
-
-        hive_mind_collection.upsert(
-            ids=[entry['entry_id']],
-            embeddings=[embedding],
-            metadatas=[metadata],
-            documents=[entry['content']]
-        )
-        return {"status": "success", "entry_id": entry['entry_id']}
+        prepared = (await asyncio.to_thread(_prepare_entries, [entry]))[0]
+    except Exception as e:
+        return {"status": "error", "message": f"Falha ao gravar o contexto da entrada: {e}"}
+    result = await ingest_queue.submit(prepared)
+    if result["status"] != "success":
+        await ctx.log(result["message"], level="error")
+    return result
+
+@mcp.tool
+async def post_entries(entries: List[MemoryEntry], ctx: Context) -> dict:
+    """Armazena várias entradas de uma vez, com embeddings e gravação em lote."""
+    if not entries:
+        return {"status": "success", "posted": 0, "results": []}
+    await ctx.log(f"HiveMind: Registrando {len(entries)} entradas em lote.", level="debug")
+    try:
+        prepared = await asyncio.to_thread(_prepare_entries, entries)
+    except Exception as e:
+        return {"status": "error", "posted": 0, "message": f"Falha ao gravar o contexto das entradas: {e}", "results": []}
+    results = await ingest_queue.submit_many(prepared)
+    failures = [r for r in results if r["status"] != "success"]
+    if failures:
+        await ctx.log(f"HiveMind: {len(failures)} de {len(entries)} entradas falharam: {failures[0]['message']}", level="error")
+    status = "success" if not failures else ("error" if len(failures) == len(results) else "partial")
+    return {"status": status, "posted": len(results) - len(failures), "results": results}
+
+@mcp.tool
+async def get_embedding_cache_stats(ctx: Context) -> dict:
+    """Retorna acertos, faltas e tamanho do cache local de embeddings."""
+    return await asyncio.to_thread(embedding_cache.stats)
+
+def _build_where(
+    entry_type: Optional[str] = None, agent_name: Optional[str] = None,
+    references_entry_id: Optional[str] = None, references_entry_ids: Optional[List[str]] = None,
+    tag: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None
+) -> Optional[dict]:
+    """Monta o filtro `where` do ChromaDB a partir dos filtros opcionais da consulta."""
+    conditions = []
+    if entry_type:
+        conditions.append({"entry_type": entry_type})
+    if agent_name:
+        conditions.append({"agent_name": agent_name})
+    if references_entry_id:
+        conditions.append({"references_entry_id": references_entry_id})
+    if references_entry_ids:
+        conditions.append({"references_entry_id": {"$in": list(references_entry_ids)}})
+    if tag:
+        conditions.append({tag_flag(tag): True})
+    for bound, operator in ((since, "$gte"), (until, "$lte")):
+        if bound:
+            epoch = timestamp_to_epoch(bound)
+            if epoch is None:
+                raise ValueError(f"Timestamp inválido: {bound!r}")
+            conditions.append({TIMESTAMP_EPOCH_KEY: {operator: epoch}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+@mcp.tool
+async def query_memory(
+    query: str, ctx: Context, top_k: int = 5, offset: int = 0,
+    entry_type: Optional[str] = None, agent_name: Optional[str] = None,
+    references_entry_id: Optional[str] = None, references_entry_ids: Optional[List[str]] = None,
+    tag: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None
+) -> dict:
+    """Consulta o HiveMind por similaridade semântica, com filtros de metadados e paginação.
+
+    Com `query` vazia, faz uma busca exata só pelos filtros (ex: resumos que referenciam
+    uma entrada), sem gerar embedding. `since`/`until` são timestamps ISO 8601.
+    Os resultados semânticos trazem `score` (1 - distância de cosseno).
+    """
+    try:
+        where = _build_where(entry_type, agent_name, references_entry_id, references_entry_ids, tag, since, until)
+    except ValueError as e:
+        return {"status": "error", "message": str(e), "results": []}
+    top_k, offset = max(1, top_k), max(0, offset)
+
+    if not query or not query.strip():
+        if where is None:
+            return {"status": "error", "message": "Informe uma consulta ou pelo menos um filtro.", "results": []}
+        found = await memory_store.get(where=where, limit=top_k, offset=offset, include=["metadatas"])
+        results = [metadata_to_entry(meta) for meta in found["metadatas"]]
+        return {"status": "success", "mode": "exact", "offset": offset, "results": results}
+
+    total = await memory_store.count()
+    if total == 0:
+        return {"status": "success", "mode": "semantic", "offset": offset, "results": []}
+    try:
+        query_embedding = (await _embed([query], "RETRIEVAL_QUERY"))[0]
     except Exception as e:
-        error_msg = f"Falha ao postar entrada no HiveMind: {e}"
+        error_msg = f"Falha ao gerar embedding da consulta: {e}"
         await ctx.log(error_msg, level="error")
-        return {"status": "error", "message": error_msg}
+        return {"status": "error", "message": error_msg, "results": []}
+
+    # O HNSW não tem offset: busca offset + top_k vizinhos e descarta o início.
+    found = await memory_store.query(
+        query_embeddings=[query_embedding], n_results=min(offset + top_k, total),
+        where=where, include=["metadatas", "distances"]
+    )
+    metadatas, distances = found["metadatas"][0], found["distances"][0]
+    results = [
+        {**metadata_to_entry(meta), "score": round(1.0 - distance, 6)}
+        for meta, distance in zip(metadatas[offset:], distances[offset:])
+    ]
+    return {"status": "success", "mode": "semantic", "offset": offset, "results": results}
 
 @mcp.tool
-async def query_memory(query: str, ctx: Context, top_k: int = 5) -> dict:
-    """Consulta o HiveMind por similaridade semântica."""
-    # ... (código da função query_memory pode permanecer, é genérico)
-    return {"results": []} # Placeholder
+async def get_entry(entry_id: str, ctx: Context, resolve_blobs: bool = True) -> dict:
+    """Retorna uma entrada completa. Com `resolve_blobs`, carrega os campos guardados como blob.
+
+    O feed e as consultas devolvem apenas a referência `{"$blob": ..., "bytes": ...}` desses campos.
+    """
+    found = await memory_store.get(ids=[entry_id], include=["metadatas"])
+    if not found["metadatas"]:
+        return {"status": "error", "message": "Entrada não encontrada."}
+    entry = metadata_to_entry(found["metadatas"][0])
+    if resolve_blobs:
+        try:
+            entry['context'] = await asyncio.to_thread(blob_store.resolve_context, entry.get('context'))
+        except (OSError, ValueError) as e:
+            return {"status": "error", "message": f"Falha ao carregar o contexto da entrada: {e}"}
+    return {"status": "success", "entry": entry}
 
 # Adicione get_feed_for_agent e update_entry_score se quiser, eles são genéricos.
 # REMOVEMOS: index_directory, remove_from_memory_index, update_memory_index
 
+def _read_feed_page(page_size: int, cursor: Optional[str], entry_type: Optional[str], agent_name: Optional[str],
+                    tag: Optional[str], since: Optional[float], order: str = "recent"):
+    imported = feed_index.ensure_backfilled(memory_store.backend)
+    if imported:
+        print(f"Índice do feed criado a partir de {imported} entradas existentes.")
+    return feed_index.page(page_size, cursor, entry_type, agent_name, tag, since, order)
+
 @mcp.tool
-async def get_feed(ctx: Context, top_k: int = 50) -> List[dict]:
-    """Retorna as N memórias mais recentes do Hive Mind."""
-    if hive_mind_collection.count() == 0:
-        return []
-
-    # Recupera os N itens mais recentes. A ordenação por timestamp
-    # é feita após a busca, pois o ChromaDB não ordena nativamente por metadados.
-    results = hive_mind_collection.get(
-        limit=top_k,
-        include=["metadatas"]
-    )
-    
-    all_metadatas = results['metadatas']
-    
-    # Deserializa as tags se necessário
-    for meta in all_metadatas:
-        if 'tags' in meta and isinstance(meta.get('tags'), str):
-            try:
-                meta['tags'] = json.loads(meta['tags'])
-            except (json.JSONDecodeError, TypeError):
-                meta['tags'] = []
-    
-    # Ordenar o feed pela data, do mais novo para o mais antigo
-    sorted_feed = sorted(all_metadatas, key=lambda x: x.get("timestamp", ""), reverse=True)
-    
-    return sorted_feed
+async def get_feed(ctx: Context, top_k: int = 50, order: str = "recent") -> List[dict]:
+    """Retorna as N memórias mais recentes do Hive Mind (ou as mais úteis, com order="utility")."""
+    items, _ = await memory_store.run_read(_read_feed_page, top_k, None, None, None, None, None, order)
+    return items
 
 @mcp.tool
-async def update_entry_score(entry_id: str, score_delta: float, ctx: Context) -> dict:
-    """Atualiza o utility_score de uma entrada do HiveMind."""
+async def get_feed_page(
+    ctx: Context, page_size: int = 50, cursor: Optional[str] = None, entry_type: Optional[str] = None,
+    agent_name: Optional[str] = None, tag: Optional[str] = None, since: Optional[str] = None,
+    order: str = "recent"
+) -> dict:
+    """Retorna uma página do feed e o cursor da próxima página.
+
+    Passe o `next_cursor` recebido para continuar de onde a página anterior parou; ele é
+    None quando não há mais entradas. `since` é um timestamp ISO 8601. `order="recent"`
+    (padrão) traz as mais novas primeiro; `order="utility"` ordena pelo utility_score com
+    decaimento no tempo.
+    """
+    since_epoch = None
+    if since:
+        since_epoch = timestamp_to_epoch(since)
+        if since_epoch is None:
+            return {"status": "error", "message": f"Timestamp inválido: {since!r}", "items": [], "next_cursor": None}
     try:
-        entry = hive_mind_collection.get(ids=[entry_id], include=["metadatas"])
-        if not entry or not entry.get('metadatas'):
-            return {"status": "error", "message": "Entrada não encontrada."}
-        
-        meta = entry['metadatas'][0]
+        items, next_cursor = await memory_store.run_read(
+            _read_feed_page, page_size, cursor, entry_type, agent_name, tag, since_epoch, order
+        )
+    except ValueError as e:
+        return {"status": "error", "message": str(e), "items": [], "next_cursor": None}
+    return {"status": "success", "items": items, "next_cursor": next_cursor}
+
+def _apply_score_deltas(deltas: Dict[str, float]) -> Dict[str, float]:
+    # Roda na thread de escrita: um get e um update para todo o lote de deltas.
+    ids = list(deltas)
+    found = memory_store.backend.get(ids=ids, include=["metadatas"])
+    new_scores, metadatas = {}, []
+    for entry_id, meta in zip(found["ids"], found["metadatas"]):
         current_score = meta.get('utility_score', 0.0)
         # Garante que o score seja float
         if not isinstance(current_score, (int, float)):
             current_score = 0.0
+        meta['utility_score'] = current_score + deltas[entry_id]
+        new_scores[entry_id] = meta['utility_score']
+        metadatas.append(meta)
+    if metadatas:
+        memory_store.backend.update(list(new_scores), metadatas)
+        feed_index.update_scores(new_scores)
+    return new_scores
 
-        meta['utility_score'] = current_score + score_delta
-        
-        # Garante que tags sejam strings JSON para o ChromaDB
-        if 'tags' in meta and isinstance(meta['tags'], list):
-            meta['tags'] = json.dumps(meta['tags'])
+async def _flush_score_deltas(deltas: Dict[str, float]) -> Dict[str, float]:
+    return await memory_store.run_write(_apply_score_deltas, deltas)
+
+# Votos são somados em memória e gravados em lote (HIVEMIND_SCORE_FLUSH_SECONDS).
+# Os deltas pendentes sobrevivem à recarga do agente.
+score_aggregator = process_resource(f"{__name__}.score_aggregator", lambda: ScoreAggregator(_flush_score_deltas))
+score_aggregator.flush_fn = _flush_score_deltas
+
+@mcp.tool
+async def update_entry_score(entry_id: str, score_delta: float, ctx: Context, wait: bool = True) -> dict:
+    """Atualiza o utility_score de uma entrada do HiveMind.
 
-        hive_mind_collection.update(ids=[entry_id], metadatas=[meta])
-        return {"status": "success", "new_score": meta['utility_score']}
+    Votos concorrentes são somados e gravados em lote; a chamada espera o lote com o seu
+    voto e retorna o novo score. Com `wait=False`, o voto só é enfileirado e a resposta é
+    `{"status": "queued", "pending_delta": ...}`; nesse modo, votos em entradas inexistentes
+    são descartados no flush.
+    """
+    if not wait:
+        return {"status": "queued", "pending_delta": score_aggregator.add(entry_id, score_delta)}
+    try:
+        new_score = await score_aggregator.submit(entry_id, score_delta)
     except Exception as e:
         return {"status": "error", "message": str(e)}
+    if new_score is None:
+        return {"status": "error", "message": "Entrada não encontrada."}
+    return {"status": "success", "new_score": new_score}
+
+def _delete_entries(entry_ids: List[str]):
+    memory_store.backend.delete(entry_ids)
+    feed_index.delete_many(entry_ids)
+
+@mcp.tool
+async def compact_memory(ctx: Context, dry_run: bool = False) -> dict:
+    """Remove entradas expiradas (retenção por entry_type em HIVEMIND_RETENTION) e blobs sem referência."""
+    await memory_store.run_read(feed_index.ensure_backfilled, memory_store.backend)
+    now = time.time()
+    expired: Dict[str, int] = {}
+    for entry_type, ttl in _retention_seconds().items():
+        removed = 0
+        while True:
+            ids = await memory_store.run_read(feed_index.expired_ids, entry_type, now - ttl)
+            if not ids:
+                break
+            removed += len(ids)
+            if dry_run:
+                break
+            await memory_store.run_write(_delete_entries, ids)
+        expired[entry_type] = removed
+
+    blobs = {"removed": 0, "freed_bytes": 0, "kept": 0}
+    if not dry_run:
+        # Lido depois das remoções: blobs das entradas apagadas acima já contam como lixo.
+        live = await memory_store.run_read(feed_index.live_blob_digests)
+        blobs = await asyncio.to_thread(blob_store.collect_garbage, live)
+    total = sum(expired.values())
+    await ctx.log(
+        f"HiveMind: compactação {'(simulada) ' if dry_run else ''}— {total} entradas expiradas, "
+        f"{blobs['removed']} blobs removidos ({blobs['freed_bytes']} bytes).",
+        level="info"
+    )
+    return {"status": "success", "dry_run": dry_run, "expired": expired, "blobs": blobs}
 
 def get_agent_mcp():
     """Retorna a instância do FastMCP do agente para o loader."""
@@ -0,0 +1,113 @@
+# core_agents/memory_manager/scores.py
+# Agregador de votos: soma os deltas de utility_score em memória e grava em lote.
+
+import os
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+SCORE_FLUSH_SECONDS = float(os.getenv("HIVEMIND_SCORE_FLUSH_SECONDS", "1.0"))
+SCORE_MAX_PENDING = int(os.getenv("HIVEMIND_SCORE_MAX_PENDING", "1000"))
+
+FlushFn = Callable[[Dict[str, float]], Awaitable[Dict[str, float]]]
+
+
+class ScoreAggregator:
+    """Acumula deltas por entry_id e os aplica em um único get + update a cada `interval`.
+
+    Votos concorrentes na mesma entrada somam no buffer em vez de disputar um
+    read-modify-write, então nenhum é perdido. Com `max_pending` entradas distintas no
+    buffer, o flush é antecipado.
+
+    `add` só enfileira o voto; `submit` antecipa o flush e espera o lote que contém o voto,
+    recebendo o novo score (ou None se a entrada não existe). Se a gravação falhar, quem
+    esperava recebe o erro e seu delta sai do buffer; os deltas enfileirados voltam ao
+    buffer e entram no próximo flush.
+    """
+
+    def __init__(self, flush_fn: FlushFn, interval: float = SCORE_FLUSH_SECONDS, max_pending: int = SCORE_MAX_PENDING):
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.max_pending = max(1, max_pending)
+        self.flushes = 0
+        self.discarded = 0
+        self._pending: Dict[str, float] = {}
+        self._waiters: Dict[str, List[Tuple[asyncio.Future, float]]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._worker = None
+            self._waiters = {}
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+
+    def add(self, entry_id: str, delta: float) -> float:
+        """Registra um voto. Retorna o delta ainda não gravado para essa entrada."""
+        self._ensure_worker()
+        self._pending[entry_id] = self._pending.get(entry_id, 0.0) + delta
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+        return self._pending[entry_id]
+
+    async def submit(self, entry_id: str, delta: float) -> Optional[float]:
+        """Registra um voto e espera sua gravação. Retorna o novo score, ou None se a entrada não existe."""
+        self.add(entry_id, delta)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(entry_id, []).append((future, delta))
+        # Votos que chegarem enquanto este flush roda vão juntos no próximo.
+        self._wakeup.set()
+        return await future
+
+    def pending(self, entry_id: str) -> float:
+        return self._pending.get(entry_id, 0.0)
+
+    async def flush(self) -> Dict[str, float]:
+        """Grava tudo o que está no buffer. Retorna os novos scores das entradas gravadas."""
+        self._ensure_worker()
+        async with self._flush_lock:
+            if not self._pending:
+                return {}
+            deltas, self._pending = self._pending, {}
+            waiters, self._waiters = self._waiters, {}
+            try:
+                new_scores = await self.flush_fn(deltas)
+            except Exception as e:
+                for entry_id, delta in deltas.items():
+                    # Só os votos enfileirados voltam ao buffer; quem esperava recebe o erro.
+                    delta -= sum(waiter_delta for _, waiter_delta in waiters.get(entry_id, ()))
+                    if delta:
+                        self._pending[entry_id] = self._pending.get(entry_id, 0.0) + delta
+                for entry_waiters in waiters.values():
+                    for future, _ in entry_waiters:
+                        if not future.done():
+                            future.set_exception(e)
+                raise
+            self.flushes += 1
+            missing = [entry_id for entry_id in deltas if entry_id not in new_scores and entry_id not in waiters]
+            if missing:
+                self.discarded += len(missing)
+                print(f"HiveMind: votos enfileirados descartados para {len(missing)} entradas inexistentes: {sorted(missing)[:5]}")
+            for entry_id, entry_waiters in waiters.items():
+                for future, _ in entry_waiters:
+                    if not future.done():
+                        future.set_result(new_scores.get(entry_id))
+            return new_scores
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Erro ao gravar scores agregados (nova tentativa no próximo ciclo): {e}")
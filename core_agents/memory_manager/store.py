@@ -0,0 +1,280 @@
+# core_agents/memory_manager/store.py
+# Armazenamento assíncrono do Hive Mind: backends plugáveis rodando fora do event loop.
+
+import os
+import time
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+import numpy as np
+
+from hivemind_core.telemetry import span, memory_operations, memory_operation_duration, memory_queue_wait
+
+MEMORY_BACKEND = os.getenv("HIVEMIND_MEMORY_BACKEND", "chroma")
+CHROMA_PATH = os.getenv("HIVEMIND_CHROMA_PATH", "chroma_db")
+COLLECTION_NAME = "hive_mind_simulation"
+MAX_READERS = int(os.getenv("HIVEMIND_MEMORY_READERS", "4"))
+MAX_PENDING_READS = int(os.getenv("HIVEMIND_MEMORY_PENDING_READS", "64"))
+MAX_PENDING_WRITES = int(os.getenv("HIVEMIND_MEMORY_PENDING_WRITES", "32"))
+
+T = TypeVar("T")
+
+
+class MemoryBackend(ABC):
+    """Interface mínima usada pelo MemoryManager, no formato de resposta do ChromaDB.
+
+    Implementações são síncronas: o AsyncMemoryStore decide em qual thread cada chamada roda.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: List[List[float]], metadatas: List[dict], documents: List[str]):
+        ...
+
+    @abstractmethod
+    def update(self, ids: List[str], metadatas: List[dict]):
+        ...
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None, include: Sequence[str] = ("metadatas",)) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def query(self, query_embeddings: List[List[float]], n_results: int, where: Optional[dict] = None,
+              include: Sequence[str] = ("metadatas", "distances")) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        ...
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+
+class ChromaBackend(MemoryBackend):
+    name = "chroma"
+
+    def __init__(self, path: str = CHROMA_PATH, collection_name: str = COLLECTION_NAME):
+        import chromadb
+        from chromadb.config import Settings
+
+        self.client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,  # Nome mais genérico
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def update(self, ids, metadatas):
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas",)):
+        return self.collection.get(ids=ids, where=where, limit=limit, offset=offset, include=list(include))
+
+    def query(self, query_embeddings, n_results, where=None, include=("metadatas", "distances")):
+        return self.collection.query(
+            query_embeddings=query_embeddings, n_results=n_results, where=where, include=list(include)
+        )
+
+    def delete(self, ids):
+        self.collection.delete(ids=ids)
+
+    def count(self):
+        return self.collection.count()
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def matches_where(metadata: dict, where: Optional[dict]) -> bool:
+    """Avalia um filtro `where` no formato do ChromaDB ($and, $or e operadores de comparação)."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, c) for c in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, c) for c in condition):
+                return False
+        elif isinstance(condition, dict):
+            if key not in metadata and not any(op in ("$ne", "$nin") for op in condition):
+                return False
+            value = metadata.get(key)
+            if not all(_OPERATORS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif key not in metadata or metadata[key] != condition:
+            return False
+    return True
+
+
+class InMemoryBackend(MemoryBackend):
+    """Backend em memória com busca exata por cosseno; usado em testes e benchmarks."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        with self._lock:
+            for entry_id, embedding, metadata, document in zip(ids, embeddings, metadatas, documents):
+                # Como o ChromaDB, valores None não são gravados.
+                self._rows[entry_id] = {
+                    "embedding": np.asarray(embedding, dtype=np.float32),
+                    "metadata": {k: v for k, v in metadata.items() if v is not None},
+                    "document": document,
+                }
+
+    def update(self, ids, metadatas):
+        with self._lock:
+            for entry_id, metadata in zip(ids, metadatas):
+                if entry_id in self._rows:
+                    self._rows[entry_id]["metadata"] = {k: v for k, v in metadata.items() if v is not None}
+
+    def _select(self, ids, where):
+        with self._lock:
+            candidates = [(i, self._rows[i]) for i in ids if i in self._rows] if ids is not None else list(self._rows.items())
+        return [(i, row) for i, row in candidates if matches_where(row["metadata"], where)]
+
+    @staticmethod
+    def _pack(rows, include) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"ids": [i for i, _ in rows]}
+        if "metadatas" in include:
+            result["metadatas"] = [dict(row["metadata"]) for _, row in rows]
+        if "documents" in include:
+            result["documents"] = [row["document"] for _, row in rows]
+        if "embeddings" in include:
+            result["embeddings"] = [row["embedding"].tolist() for _, row in rows]
+        return result
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas",)):
+        rows = self._select(ids, where)
+        start = offset or 0
+        rows = rows[start:start + limit] if limit is not None else rows[start:]
+        return self._pack(rows, include)
+
+    def query(self, query_embeddings, n_results, where=None, include=("metadatas", "distances")):
+        rows = self._select(None, where)
+        result: Dict[str, List] = {"ids": [], "metadatas": [], "documents": [], "distances": [], "embeddings": []}
+        if rows:
+            matrix = np.stack([row["embedding"] for _, row in rows])
+            norms = np.linalg.norm(matrix, axis=1)
+        for query_embedding in query_embeddings:
+            if not rows:
+                packed, distances = self._pack([], include), []
+            else:
+                q = np.asarray(query_embedding, dtype=np.float32)
+                similarity = matrix @ q / np.maximum(norms * np.linalg.norm(q), 1e-12)
+                order = np.argsort(-similarity, kind="stable")[:n_results]
+                packed = self._pack([rows[k] for k in order], include)
+                distances = [float(1.0 - similarity[k]) for k in order]
+            for key in ("ids", "metadatas", "documents", "embeddings"):
+                result[key].append(packed.get(key, []))
+            result["distances"].append(distances)
+        return result
+
+    def delete(self, ids):
+        with self._lock:
+            for entry_id in ids:
+                self._rows.pop(entry_id, None)
+
+    def count(self):
+        with self._lock:
+            return len(self._rows)
+
+
+def create_backend(name: str = MEMORY_BACKEND) -> MemoryBackend:
+    if name == "chroma":
+        return ChromaBackend()
+    if name == "memory":
+        return InMemoryBackend()
+    raise ValueError(f"Backend de memória desconhecido: {name!r} (use 'chroma' ou 'memory').")
+
+
+class AsyncMemoryStore:
+    """Executa as operações do backend fora do event loop.
+
+    Leituras rodam em um pool de `max_readers` threads; escritas passam por uma única
+    thread, em ordem de chegada, e nunca disputam entre si. As filas são limitadas por
+    semáforos: com muitas operações pendentes, quem chama espera em vez de acumular
+    trabalho sem limite.
+    """
+
+    def __init__(self, backend: MemoryBackend, max_readers: int = MAX_READERS,
+                 max_pending_reads: int = MAX_PENDING_READS, max_pending_writes: int = MAX_PENDING_WRITES):
+        self.backend = backend
+        self._readers = ThreadPoolExecutor(max_workers=max(1, max_readers), thread_name_prefix="hivemind-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hivemind-write")
+        self._read_slots = asyncio.Semaphore(max(1, max_pending_reads))
+        self._write_slots = asyncio.Semaphore(max(1, max_pending_writes))
+
+    async def run_read(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        return await self._run("read", self._readers, self._read_slots, fn, args, kwargs)
+
+    async def run_write(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        return await self._run("write", self._writer, self._write_slots, fn, args, kwargs)
+
+    async def _run(self, kind: str, executor: ThreadPoolExecutor, slots: asyncio.Semaphore,
+                   fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        op = getattr(fn, "__name__", "call").lstrip("_")
+        backend = self.backend.name
+        queued = time.perf_counter()
+
+        def run() -> T:
+            # Mede separadamente a espera na fila e a execução na thread.
+            start = time.perf_counter()
+            memory_queue_wait.observe(start - queued, kind=kind)
+            status = "error"
+            try:
+                result = fn(*args, **kwargs)
+                status = "ok"
+                return result
+            finally:
+                memory_operation_duration.observe(time.perf_counter() - start, backend=backend, kind=kind, op=op)
+                memory_operations.inc(backend=backend, kind=kind, op=op, status=status)
+
+        with span(f"memory.{kind}", op=op, backend=backend):
+            async with slots:
+                return await asyncio.get_running_loop().run_in_executor(executor, run)
+
+    async def upsert(self, ids, embeddings, metadatas, documents):
+        return await self.run_write(self.backend.upsert, ids, embeddings, metadatas, documents)
+
+    async def update(self, ids, metadatas):
+        return await self.run_write(self.backend.update, ids, metadatas)
+
+    async def delete(self, ids):
+        return await self.run_write(self.backend.delete, ids)
+
+    async def get(self, **kwargs) -> Dict[str, Any]:
+        return await self.run_read(self.backend.get, **kwargs)
+
+    async def query(self, **kwargs) -> Dict[str, Any]:
+        return await self.run_read(self.backend.query, **kwargs)
+
+    async def count(self) -> int:
+        return await self.run_read(self.backend.count)
+
+    def shutdown(self):
+        self._readers.shutdown(wait=False)
+        self._writer.shutdown(wait=True)
@@ -2,20 +2,161 @@
 import importlib
 import os
 import json
-from typing import Any
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 import traceback
 
-async def load_agents_from_directory(hub_mcp: Any):
-    """Carrega todos os agentes dos diretórios 'core_agents' e 'agents' e registra suas ferramentas no hub_mcp."""
-    
-    agent_base_dirs = ['core_agents', 'agents']
+import fastmcp
+from fastmcp.tools import Tool
+from fastmcp.tools.tool import ToolResult
+from pydantic import PrivateAttr
 
-    for base_dir in agent_base_dirs:
+# Cache com nome e schema das ferramentas de cada agente, válido enquanto o código do agente não mudar.
+TOOL_MANIFEST_PATH = Path(os.getenv("HIVEMIND_TOOL_MANIFEST", ".hivemind_cache/tool_manifest.json"))
+# Com o manifesto em dia, o módulo do agente só é importado na primeira chamada de uma de suas ferramentas.
+LAZY_AGENTS = os.getenv("HIVEMIND_LAZY_AGENTS", "1") != "0"
+
+AGENT_BASE_DIRS = ['core_agents', 'agents']
+
+
+def _source_hash(agent_path: Path) -> str:
+    """Hash dos fontes Python do agente (e da versão do fastmcp, que gera os schemas)."""
+    digest = hashlib.sha256(fastmcp.__version__.encode())
+    for path in sorted(agent_path.rglob("*.py")):
+        if "__pycache__" in path.parts:
+            continue
+        digest.update(path.relative_to(agent_path).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _load_manifest(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(path: Path, manifest: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def _describe_tools(tools: List[Tool]) -> Optional[List[Dict[str, Any]]]:
+    """Dados de cada ferramenta que o hub expõe em list_tools. None se alguma não puder ser descrita em JSON."""
+    if any(tool.serializer is not None for tool in tools):
+        return None
+    return [tool.model_dump(mode="json", exclude={"fn", "serializer"}) for tool in tools]
+
+
+def _set_manifest_entry(manifest: Dict[str, Any], module_name: str, source_hash: str, tools: List[Tool]):
+    described = _describe_tools(tools)
+    if described is None:
+        manifest.pop(module_name, None)
+    else:
+        manifest[module_name] = {"source_hash": source_hash, "tools": described}
+
+
+def update_manifest_entry(module_name: str, agent_path: Path, tools: Optional[List[Tool]],
+                          manifest_path: Path = TOOL_MANIFEST_PATH):
+    """Atualiza (ou remove, com `tools=None`) a entrada de um agente no manifesto, ex: após um reload."""
+    manifest = _load_manifest(manifest_path)
+    if tools is None:
+        manifest.pop(module_name, None)
+    else:
+        _set_manifest_entry(manifest, module_name, _source_hash(agent_path), tools)
+    _save_manifest(manifest_path, manifest)
+
+
+def _register_tools(hub_mcp: Any, tools: List[Tool]):
+    # Atribuição direta: substitui proxies já registrados sem o aviso de ferramenta duplicada.
+    for tool in tools:
+        hub_mcp._tool_manager._tools[tool.key] = tool
+
+
+def _agent_tools(module: Any) -> Optional[List[Tool]]:
+    # PADRÃO CORRIGIDO: Usar get_agent_mcp() para obter a instância do agente
+    if not hasattr(module, 'get_agent_mcp'):
+        return None
+    # Acessa diretamente o dicionário de ferramentas para obter os objetos completos
+    return list(module.get_agent_mcp()._tool_manager._tools.values())
+
+
+class LazyTool(Tool):
+    """Ferramenta registrada a partir do manifesto; importa o módulo do agente na primeira chamada.
+
+    Depois da importação, as ferramentas reais do módulo substituem os proxies no hub,
+    então as chamadas seguintes não passam mais por aqui.
+    """
+
+    module_name: str
+    _hub: Any = PrivateAttr(default=None)
+
+    async def load(self) -> Tool:
+        tools = await _import_agent_module(self._hub, self.module_name)
+        for tool in tools:
+            if tool.key == self.key:
+                return tool
+        raise KeyError(f"Ferramenta '{self.key}' não existe mais em '{self.module_name}'. Reinicie o hub para atualizar o manifesto.")
+
+    async def run(self, arguments: Dict[str, Any]) -> ToolResult:
+        tool = await self.load()
+        return await tool.run(arguments)
+
+
+# Uma importação por módulo, mesmo com várias primeiras chamadas simultâneas.
+_module_imports: Dict[str, asyncio.Future] = {}
+
+
+async def _import_agent_module(hub_mcp: Any, module_name: str) -> List[Tool]:
+    future = _module_imports.get(module_name)
+    if future is None:
+        future = asyncio.ensure_future(_do_import(hub_mcp, module_name))
+        _module_imports[module_name] = future
+        future.add_done_callback(lambda f: _forget_failed_import(module_name, f))
+    return await asyncio.shield(future)
+
+
+def _forget_failed_import(module_name: str, future: asyncio.Future):
+    # Uma importação que falhou é tentada de novo na próxima chamada.
+    if future.cancelled() or future.exception() is not None:
+        _module_imports.pop(module_name, None)
+
+
+async def _do_import(hub_mcp: Any, module_name: str) -> List[Tool]:
+    # Os imports dos agentes são pesados (ChromaDB, google.generativeai): fora do event loop.
+    module = await asyncio.to_thread(importlib.import_module, module_name)
+    tools = _agent_tools(module) or []
+    _register_tools(hub_mcp, tools)
+    print(f"  -> Módulo '{module_name}' importado sob demanda ({len(tools)} ferramentas).")
+    return tools
+
+
+async def load_agents_from_directory(hub_mcp: Any, lazy: bool = LAZY_AGENTS,
+                                     manifest_path: Path = TOOL_MANIFEST_PATH) -> Dict[str, List[str]]:
+    """Carrega todos os agentes dos diretórios 'core_agents' e 'agents' e registra suas ferramentas no hub_mcp.
+
+    Com `lazy=True`, agentes cujo código não mudou desde a última execução são registrados
+    a partir do manifesto em cache, como `LazyTool`; os demais são importados e o manifesto é atualizado.
+    Retorna as chaves das ferramentas registradas por módulo de agente.
+    """
+    manifest = _load_manifest(manifest_path) if lazy else {}
+    manifest_changed = False
+    loaded: Dict[str, List[str]] = {}
+
+    for base_dir in AGENT_BASE_DIRS:
         if not os.path.isdir(base_dir):
             print(f"AVISO: Diretório de agentes '{base_dir}' não encontrado. Pulando.")
             continue
 
-        for agent_name in os.listdir(base_dir):
+        for agent_name in sorted(os.listdir(base_dir)):
             agent_path = os.path.join(base_dir, agent_name)
             if os.path.isdir(agent_path):
                 main_py_path = os.path.join(agent_path, 'main.py')
@@ -24,22 +165,45 @@ async def load_agents_from_directory(hub_mcp: Any):
 
                 module_name = f"{base_dir}.{agent_name}.main"
                 try:
+                    source_hash = _source_hash(Path(agent_path)) if lazy else None
+                    cached = manifest.get(module_name)
+                    if lazy and cached and cached.get("source_hash") == source_hash:
+                        proxies = []
+                        for data in cached["tools"]:
+                            proxy = LazyTool(module_name=module_name, **data)
+                            proxy._hub = hub_mcp
+                            proxies.append(proxy)
+                        _register_tools(hub_mcp, proxies)
+                        loaded[module_name] = [proxy.key for proxy in proxies]
+                        if proxies:
+                            print(f"  -> Módulo '{agent_name}' ({base_dir}) registrado do manifesto com {len(proxies)} ferramentas.")
+                        continue
+
                     module = importlib.import_module(module_name)
-                    
-                    # PADRÃO CORRIGIDO: Usar get_agent_mcp() para obter a instância do agente
-                    if hasattr(module, 'get_agent_mcp'):
-                        agent_mcp = module.get_agent_mcp()
-                        # Acessa diretamente o dicionário de ferramentas para obter os objetos completos
-                        agent_tools_dict = agent_mcp._tool_manager._tools
-                        
-                        for tool_object in agent_tools_dict.values():
-                            hub_mcp.add_tool(tool_object)
-                        
-                        if agent_tools_dict:
-                            print(f"  -> Módulo '{agent_name}' ({base_dir}) carregado com {len(agent_tools_dict)} ferramentas.")
-                    else:
+                    agent_tools = _agent_tools(module)
+                    if agent_tools is None:
                         print(f"AVISO: Agente '{agent_name}' não possui a função get_agent_mcp(). Nenhuma ferramenta carregada.")
+                        continue
+
+                    for tool_object in agent_tools:
+                        hub_mcp.add_tool(tool_object)
+                    loaded[module_name] = [tool.key for tool in agent_tools]
+
+                    if agent_tools:
+                        print(f"  -> Módulo '{agent_name}' ({base_dir}) carregado com {len(agent_tools)} ferramentas.")
+
+                    if lazy:
+                        _set_manifest_entry(manifest, module_name, source_hash, agent_tools)
+                        manifest_changed = True
 
                 except Exception as e:
                     print(f"Erro ao carregar agente de '{agent_name}' em '{base_dir}': {e}")
-                    print(traceback.format_exc())
\ No newline at end of file
+                    print(traceback.format_exc())
+
+    if manifest_changed:
+        try:
+            _save_manifest(manifest_path, manifest)
+        except OSError as e:
+            print(f"AVISO: Não foi possível gravar o manifesto de ferramentas em '{manifest_path}': {e}")
+
+    return loaded
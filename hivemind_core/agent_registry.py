@@ -0,0 +1,209 @@
+# hivemind_core/agent_registry.py
+# Registro dos agentes carregados no hub, com recarga a quente por agente.
+
+import os
+import sys
+import time
+import asyncio
+import importlib
+import threading
+import traceback
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler, FileSystemEvent
+
+from hivemind_core.agent_loader import (
+    AGENT_BASE_DIRS, LAZY_AGENTS, TOOL_MANIFEST_PATH,
+    _agent_tools, _module_imports, _source_hash, load_agents_from_directory, update_manifest_entry,
+)
+from hivemind_core.resources import release_resources
+
+# Recarga a quente dos agentes quando seus arquivos .py mudam (0 desativa).
+HOT_RELOAD = os.getenv("HIVEMIND_AGENT_HOT_RELOAD", "1") != "0"
+# Espera a rajada de eventos de um salvamento acalmar antes de recarregar.
+RELOAD_DEBOUNCE_SECONDS = float(os.getenv("HIVEMIND_AGENT_RELOAD_DEBOUNCE", "0.2"))
+
+
+class _AgentEventHandler(FileSystemEventHandler):
+    def __init__(self, registry: "AgentRegistry"):
+        self.registry = registry
+
+    def on_any_event(self, event: FileSystemEvent):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path and str(path).endswith(".py"):
+                self.registry._on_source_event(str(path))
+
+
+class AgentRegistry:
+    """Sabe quais ferramentas do hub pertencem a cada módulo de agente e recarrega um agente por vez.
+
+    A recarga importa o pacote do agente do zero (novos objetos de módulo, sem `importlib.reload`)
+    e troca o dicionário de ferramentas do hub por um novo de uma vez só. Chamadas em andamento
+    já seguram a função antiga e terminam na versão antiga; as seguintes usam a nova. Se a
+    importação falhar, o agente continua na versão anterior.
+
+    Estado e threads do agente (conexões, pools, observers, filas) ficam em
+    `hivemind_core.resources` e passam da versão antiga para a nova; só são encerrados
+    quando o agente é removido do hub.
+    """
+
+    def __init__(self, hub_mcp: Any, base_dirs: List[str] = AGENT_BASE_DIRS, lazy: bool = LAZY_AGENTS,
+                 manifest_path: Path = TOOL_MANIFEST_PATH, debounce: float = RELOAD_DEBOUNCE_SECONDS):
+        self.hub_mcp = hub_mcp
+        self.base_dirs = base_dirs
+        self.lazy = lazy
+        self.manifest_path = manifest_path
+        self.debounce = debounce
+        self.reloads = 0
+        self._tool_keys: Dict[str, List[str]] = {}
+        self._hashes: Dict[str, str] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._observer: Optional[Observer] = None
+        self._timers: Dict[str, threading.Timer] = {}
+        self._timers_lock = threading.Lock()
+        self._reload_locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _agent_path(module_name: str) -> Path:
+        base_dir, agent_name, _ = module_name.split(".")
+        return Path(base_dir) / agent_name
+
+    def tools_of(self, module_name: str) -> List[str]:
+        return list(self._tool_keys.get(module_name, []))
+
+    async def load_all(self) -> int:
+        """Carga inicial de todos os agentes. Retorna o número de ferramentas registradas."""
+        self._loop = asyncio.get_running_loop()
+        self._tool_keys = await load_agents_from_directory(self.hub_mcp, lazy=self.lazy, manifest_path=self.manifest_path)
+        for module_name in self._tool_keys:
+            self._hashes[module_name] = _source_hash(self._agent_path(module_name))
+        return sum(len(keys) for keys in self._tool_keys.values())
+
+    def _swap_tools(self, module_name: str, tools: List[Any]):
+        # Novo dicionário montado ao lado e publicado com uma única atribuição.
+        old_keys = set(self._tool_keys.get(module_name, []))
+        new_tools = {key: tool for key, tool in self.hub_mcp._tool_manager._tools.items() if key not in old_keys}
+        for tool in tools:
+            new_tools[tool.key] = tool
+        self.hub_mcp._tool_manager._tools = new_tools
+        self._tool_keys[module_name] = [tool.key for tool in tools]
+
+    async def reload(self, module_name: str, force: bool = False) -> Dict[str, Any]:
+        """Reimporta o pacote de um agente e troca suas ferramentas no hub."""
+        lock = self._reload_locks.setdefault(module_name, asyncio.Lock())
+        async with lock:
+            start = time.perf_counter()
+            agent_path = self._agent_path(module_name)
+            package = module_name.rsplit(".", 1)[0]
+
+            if not (agent_path / "main.py").exists():
+                if module_name not in self._tool_keys:
+                    return {"status": "skipped", "module": module_name}
+                self._swap_tools(module_name, [])
+                del self._tool_keys[module_name]
+                self._hashes.pop(module_name, None)
+                _module_imports.pop(module_name, None)
+                self._remove_modules(package)
+                released = await asyncio.to_thread(release_resources, package)
+                print(f"  -> Agente '{module_name}' removido do hub ({len(released)} recursos encerrados).")
+                return {"status": "removed", "module": module_name}
+
+            source_hash = _source_hash(agent_path)
+            if not force and self._hashes.get(module_name) == source_hash:
+                return {"status": "unchanged", "module": module_name}
+
+            old_modules = self._remove_modules(package)
+            importlib.invalidate_caches()
+            try:
+                module = await asyncio.to_thread(importlib.import_module, module_name)
+                tools = _agent_tools(module)
+                if tools is None:
+                    raise RuntimeError("o módulo não possui a função get_agent_mcp()")
+            except Exception as e:
+                # Mantém a versão anterior em uso.
+                self._remove_modules(package)
+                sys.modules.update(old_modules)
+                print(f"Erro ao recarregar '{module_name}'; mantendo a versão anterior: {e}")
+                print(traceback.format_exc())
+                return {"status": "error", "module": module_name, "message": str(e)}
+
+            self._swap_tools(module_name, tools)
+            self._hashes[module_name] = source_hash
+            _module_imports.pop(module_name, None)
+            self.reloads += 1
+            if self.lazy:
+                try:
+                    update_manifest_entry(module_name, agent_path, tools, self.manifest_path)
+                except OSError as e:
+                    print(f"AVISO: Não foi possível atualizar o manifesto de ferramentas: {e}")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"  -> Agente '{module_name}' recarregado com {len(tools)} ferramentas em {elapsed_ms:.0f} ms.")
+            return {"status": "reloaded", "module": module_name, "tools": len(tools), "elapsed_ms": round(elapsed_ms, 1)}
+
+    @staticmethod
+    def _remove_modules(package: str) -> Dict[str, Any]:
+        """Tira de sys.modules o pacote do agente e seus submódulos; os objetos antigos seguem vivos para quem os referencia."""
+        removed = {}
+        for name in list(sys.modules):
+            if name == package or name.startswith(package + "."):
+                removed[name] = sys.modules.pop(name)
+        return removed
+
+    # --- Observação dos diretórios ---
+
+    def _module_for_path(self, path: str) -> Optional[str]:
+        try:
+            relative = Path(path).resolve().relative_to(Path.cwd().resolve())
+        except ValueError:
+            return None
+        parts = relative.parts
+        if len(parts) < 3 or parts[0] not in self.base_dirs or "__pycache__" in parts:
+            return None
+        return f"{parts[0]}.{parts[1]}.main"
+
+    def _on_source_event(self, path: str):
+        # Chamado na thread do watchdog: agenda a recarga com debounce por agente.
+        module_name = self._module_for_path(path)
+        if module_name is None or self._loop is None:
+            return
+        with self._timers_lock:
+            timer = self._timers.pop(module_name, None)
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(self.debounce, self._schedule_reload, args=(module_name,))
+            timer.daemon = True
+            self._timers[module_name] = timer
+            timer.start()
+
+    def _schedule_reload(self, module_name: str):
+        with self._timers_lock:
+            self._timers.pop(module_name, None)
+        if self._loop is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.reload(module_name), self._loop)
+
+    def start_watching(self):
+        if self._observer is not None:
+            return
+        observer = Observer()
+        handler = _AgentEventHandler(self)
+        for base_dir in self.base_dirs:
+            if os.path.isdir(base_dir):
+                observer.schedule(handler, base_dir, recursive=True)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        print(f"Recarga a quente de agentes ativa em: {', '.join(self.base_dirs)}.")
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        with self._timers_lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
@@ -0,0 +1,80 @@
+# hivemind_core/dispatch.py
+# Chamadas diretas entre ferramentas do mesmo hub, sem passar pelo protocolo MCP.
+
+import inspect
+from typing import Any, Dict, Optional
+
+from fastmcp import Context
+from fastmcp.utilities.types import find_kwarg_by_type
+
+from hivemind_core.agent_loader import LazyTool
+from hivemind_core.telemetry import traced_tool_call
+
+
+class DispatchResult:
+    """Mesmo formato usado pelo Client do fastmcp: o valor retornado fica em `.data`."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __repr__(self):
+        return f"DispatchResult(data={self.data!r})"
+
+
+class ToolDispatcher:
+    """Encaminha chamadas entre ferramentas para a função Python registrada no hub.
+
+    Evita a serialização, a validação e a sessão MCP de um Client: o `ctx` de quem chama
+    é repassado, então logs e progresso continuam indo para a mesma sessão.
+    """
+
+    def __init__(self):
+        self._hub = None
+
+    def bind(self, hub_mcp):
+        self._hub = hub_mcp
+
+    def _tool(self, name: str):
+        if self._hub is None:
+            raise RuntimeError("Dispatcher não vinculado a um hub: chame dispatcher.bind(hub_mcp) na inicialização.")
+        # Mesmo acesso usado pelo agent_loader: consulta O(1) e sempre reflete as ferramentas atuais.
+        tool = self._hub._tool_manager._tools.get(name)
+        if tool is None:
+            raise KeyError(f"Ferramenta '{name}' não encontrada no hub.")
+        return tool
+
+    async def call_tool(self, ctx: Optional[Context], name: str, arguments: Optional[Dict[str, Any]] = None) -> DispatchResult:
+        # O span da chamada aninhada fica como filho do span da ferramenta que a fez.
+        return await traced_tool_call(name, lambda: self._call_tool(ctx, name, arguments))
+
+    async def _call_tool(self, ctx: Optional[Context], name: str, arguments: Optional[Dict[str, Any]]) -> DispatchResult:
+        tool = self._tool(name)
+        if isinstance(tool, LazyTool):
+            tool = await tool.load()
+        arguments = dict(arguments or {})
+        fn = getattr(tool, "fn", None)
+        if fn is None:
+            # Ferramentas que não são funções Python passam pelo caminho normal do fastmcp.
+            result = await tool.run(arguments)
+            structured = result.structured_content
+            if isinstance(structured, dict) and set(structured) == {"result"}:
+                structured = structured["result"]
+            return DispatchResult(structured)
+        context_kwarg = find_kwarg_by_type(fn, kwarg_type=Context)
+        if context_kwarg and context_kwarg not in arguments:
+            arguments[context_kwarg] = ctx
+        result = fn(**arguments)
+        if inspect.isawaitable(result):
+            result = await result
+        return DispatchResult(result)
+
+
+# Singleton para ser usado em toda a aplicação
+dispatcher = ToolDispatcher()
+
+
+async def call_tool(ctx: Optional[Context], name: str, arguments: Optional[Dict[str, Any]] = None) -> DispatchResult:
+    """Chama outra ferramenta do hub a partir de uma ferramenta, no mesmo processo."""
+    return await dispatcher.call_tool(ctx, name, arguments)
@@ -0,0 +1,44 @@
+# hivemind_core/log_routing.py
+# Marca os logs de cada chamada de ferramenta com o id do pedido, para que um único Client
+# compartilhado por várias chamadas concorrentes saiba de qual chamada veio cada log.
+
+from typing import Any, Optional
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+# O id vai no campo `logger` das notificações de log e na mensagem do progresso inicial:
+# "hivemind.request.<id do pedido>".
+REQUEST_LOGGER_PREFIX = "hivemind.request."
+
+
+def request_token(tag: Optional[str]) -> Optional[Any]:
+    """Id do pedido numa marca do middleware (como int quando numérico), ou None."""
+    if not tag or not tag.startswith(REQUEST_LOGGER_PREFIX):
+        return None
+    token = tag[len(REQUEST_LOGGER_PREFIX):]
+    return int(token) if token.lstrip("-").isdigit() else token
+
+
+class RequestLogMiddleware(Middleware):
+    """Anuncia o id de cada pedido com progresso e marca com ele os logs da chamada.
+
+    Quando o cliente pede progresso, a primeira notificação (progresso 0, sem total) traz
+    o id do pedido na mensagem: chega ao handler de progresso da chamada antes de qualquer
+    log, e o cliente passa a rotear os logs marcados (inclusive os de chamadas aninhadas)
+    e a cancelar o pedido por esse id.
+    """
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        ctx = context.fastmcp_context
+        meta = ctx.request_context.meta if ctx is not None else None
+        if getattr(meta, "progressToken", None) is not None:
+            tag = f"{REQUEST_LOGGER_PREFIX}{ctx.request_context.request_id}"
+            await ctx.report_progress(0, None, tag)
+            # O Context é criado por pedido: a troca vale só para esta chamada.
+            log = ctx.log
+
+            async def tagged_log(message: str, level=None, logger_name: Optional[str] = None):
+                await log(message, level, logger_name or tag)
+
+            ctx.log = tagged_log
+        return await call_next(context)
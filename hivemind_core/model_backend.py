@@ -0,0 +1,203 @@
+# hivemind_core/model_backend.py
+# Backends de modelo (geração de texto e embeddings) plugáveis: Gemini em produção, um
+# substituto local determinístico para benchmarks e execuções offline.
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from pathlib import PurePath
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from hivemind_core.prompt_manager import estimate_tokens
+from hivemind_core.telemetry import (
+    span, llm_request_duration, llm_requests, llm_prompt_tokens, llm_response_tokens, embedding_batch_size,
+)
+
+# "gemini" (padrão) ou "fake" (local, sem rede).
+MODEL_BACKEND = os.getenv("HIVEMIND_MODEL_BACKEND", "gemini")
+FAKE_LATENCY_MS = float(os.getenv("HIVEMIND_FAKE_LATENCY_MS", "0"))
+FAKE_JITTER_MS = float(os.getenv("HIVEMIND_FAKE_JITTER_MS", "0"))
+FAKE_FAILURE_RATE = float(os.getenv("HIVEMIND_FAKE_FAILURE_RATE", "0"))
+FAKE_SEED = int(os.getenv("HIVEMIND_FAKE_SEED", "0"))
+# Mesma dimensão do text-embedding-004, para o custo de memória/consulta ser realista.
+FAKE_EMBEDDING_DIM = int(os.getenv("HIVEMIND_FAKE_EMBEDDING_DIM", "768"))
+
+
+class ModelBackendError(RuntimeError):
+    """Falha de uma chamada ao modelo (incluindo as falhas simuladas do backend local)."""
+
+
+class ModelBackend(ABC):
+    """Interface mínima usada pelos agentes para falar com um modelo.
+
+    Subclasses implementam `_generate` e `_embed`; `generate` e `embed` registram o span,
+    a latência e os tamanhos de cada chamada.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    async def _generate(self, model: str, prompt: str) -> str:
+        ...
+
+    @abstractmethod
+    async def _embed(self, model: str, texts: List[str], task_type: str) -> List[List[float]]:
+        ...
+
+    async def generate(self, model: str, prompt: str) -> str:
+        prompt_tokens = estimate_tokens(prompt)
+        llm_prompt_tokens.observe(prompt_tokens, model=model)
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with span("llm.generate", backend=self.name, model=model, prompt_tokens=prompt_tokens) as active:
+                text = await self._generate(model, prompt)
+                response_tokens = estimate_tokens(text)
+                active.set_attribute("response_tokens", response_tokens)
+            llm_response_tokens.observe(response_tokens, model=model)
+            status = "ok"
+            return text
+        finally:
+            llm_request_duration.observe(time.perf_counter() - start, backend=self.name, model=model, operation="generate")
+            llm_requests.inc(backend=self.name, model=model, operation="generate", status=status)
+
+    async def embed(self, model: str, texts: List[str], task_type: str) -> List[List[float]]:
+        embedding_batch_size.observe(len(texts), model=model)
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with span("llm.embed", backend=self.name, model=model, texts=len(texts), task_type=task_type):
+                vectors = await self._embed(model, texts, task_type)
+            status = "ok"
+            return vectors
+        finally:
+            llm_request_duration.observe(time.perf_counter() - start, backend=self.name, model=model, operation="embed")
+            llm_requests.inc(backend=self.name, model=model, operation="embed", status=status)
+
+    def cache_key(self, model: str) -> str:
+        """Chave usada nos caches locais (ex: embeddings), para backends diferentes não se misturarem."""
+        return model
+
+
+class GeminiBackend(ModelBackend):
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self._api_key = api_key
+        self._genai = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        # Importa e configura o SDK na primeira chamada, qualquer que seja o agente que a faça.
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    import google.generativeai as genai
+                    from dotenv import load_dotenv
+
+                    load_dotenv()
+                    api_key = self._api_key or os.getenv("GEMINI_API_KEY")
+                    if api_key:
+                        genai.configure(api_key=api_key)
+                    self._genai = genai
+        return self._genai
+
+    async def _generate(self, model: str, prompt: str) -> str:
+        response = await self._client().GenerativeModel(model).generate_content_async(prompt)
+        return response.text
+
+    async def _embed(self, model: str, texts: List[str], task_type: str) -> List[List[float]]:
+        result = await self._client().embed_content_async(model=model, content=texts, task_type=task_type)
+        return result['embedding']
+
+
+_CATEGORY_ROW = re.compile(r"^(\d+)\|([fd])\|([^|\n]*)", re.MULTILINE)
+
+
+def fake_response(model: str, prompt: str) -> str:
+    """Resposta determinística para os prompts do projeto.
+
+    Prompts de categorização (linhas `índice|tipo|caminho|...`) recebem um JSON agrupando os
+    índices por extensão; qualquer outro prompt recebe um resumo curto derivado do texto.
+    """
+    rows = _CATEGORY_ROW.findall(prompt)
+    if rows:
+        by_category = {}
+        for index, kind, path in rows:
+            if kind == "d":
+                category = "Pastas"
+            else:
+                suffix = PurePath(path.strip()).suffix.lstrip(".").upper()
+                category = f"Arquivos {suffix}" if suffix else "_a_revisar"
+            by_category.setdefault(category, []).append(int(index))
+        return json.dumps(by_category, separators=(',', ':'))
+    words = prompt.split()
+    digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=4).hexdigest()
+    return f"Resumo simulado ({digest}): {' '.join(words[-30:])}"
+
+
+class FakeBackend(ModelBackend):
+    """Backend local: respostas e embeddings determinísticos, com latência, jitter e falhas configuráveis.
+
+    O mesmo texto gera sempre o mesmo vetor (semente derivada do hash do texto), então buscas
+    e caches se comportam de forma reprodutível entre execuções.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_ms: float = FAKE_LATENCY_MS, jitter_ms: float = FAKE_JITTER_MS,
+                 failure_rate: float = FAKE_FAILURE_RATE, seed: int = FAKE_SEED,
+                 embedding_dim: int = FAKE_EMBEDDING_DIM,
+                 responder: Callable[[str, str], str] = fake_response):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.embedding_dim = embedding_dim
+        self.responder = responder
+        self._rng = random.Random(seed)
+        self.calls = {"generate": 0, "embed": 0, "failures": 0}
+
+    async def _simulate_call(self, kind: str):
+        self.calls[kind] += 1
+        delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) if self.jitter_ms else self.latency_ms
+        if delay:
+            await asyncio.sleep(delay / 1000.0)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            self.calls["failures"] += 1
+            raise ModelBackendError(f"Falha simulada do backend local ({kind}).")
+
+    async def _generate(self, model: str, prompt: str) -> str:
+        await self._simulate_call("generate")
+        return self.responder(model, prompt)
+
+    def _vector(self, model: str, task_type: str, text: str) -> List[float]:
+        # O task_type fica fora da semente: documento e consulta iguais devem coincidir.
+        seed = int.from_bytes(hashlib.blake2b(f"{model}\x00{text}".encode("utf-8"), digest_size=8).digest(), "big")
+        vector = np.random.default_rng(seed).standard_normal(self.embedding_dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    async def _embed(self, model: str, texts: List[str], task_type: str) -> List[List[float]]:
+        await self._simulate_call("embed")
+        return [self._vector(model, task_type, text) for text in texts]
+
+    def cache_key(self, model: str) -> str:
+        return f"{self.name}:{model}"
+
+
+def create_model_backend(name: str = MODEL_BACKEND) -> ModelBackend:
+    if name == "fake":
+        return FakeBackend()
+    if name == "gemini":
+        return GeminiBackend()
+    raise ValueError(f"Backend de modelo desconhecido: {name}")
+
+# Backend compartilhado pelo processo do hub.
+model_backend = create_model_backend()
@@ -1,44 +1,169 @@
+import os
 import json
+import math
+import time
+import threading
 from pathlib import Path
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Pasta de prompts do projeto, independente do diretório de trabalho.
+PROMPTS_DIRECTORY = Path(os.getenv("HIVEMIND_PROMPTS_DIR", Path(__file__).resolve().parent.parent / "prompts"))
+RELOAD_INTERVAL_SECONDS = 1.0
+# Aproximação usada pelos modelos Gemini para texto: ~4 caracteres por token.
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa barata (sem tokenizer) do número de tokens de um texto."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+class CompiledPrompt:
+    """Template já dividido em (texto literal, campo) na carga; renderizar é só concatenar."""
+
+    __slots__ = ("task_name", "metadata", "template", "fields", "_parts", "_literal_tokens")
+
+    def __init__(self, task_name: str, metadata: Dict[str, Any], template: str):
+        self.task_name = task_name
+        self.metadata = metadata
+        self.template = template
+        parts: List[Tuple[str, Optional[str], Optional[str], str]] = []
+        for literal, field, format_spec, conversion in Formatter().parse(template):
+            if field is not None and (not field.isidentifier()):
+                raise ValueError(f"Campo inválido '{{{field}}}' no template '{task_name}' (chaves literais devem ser escritas como '{{{{' e '}}}}').")
+            parts.append((literal, field, conversion, format_spec or ""))
+        self._parts = parts
+        self.fields = {field for _, field, _, _ in parts if field is not None}
+        declared = set(metadata.get("input_variables", []))
+        if declared and self.fields - declared:
+            raise ValueError(f"Template '{task_name}' usa variáveis não declaradas em input_variables: {sorted(self.fields - declared)}")
+        self._literal_tokens = estimate_tokens(''.join(literal for literal, _, _, _ in parts))
+
+    def render(self, **kwargs) -> str:
+        missing = self.fields - kwargs.keys()
+        if missing:
+            raise KeyError(f"Variáveis ausentes para o prompt '{self.task_name}': {sorted(missing)}")
+        out = []
+        for literal, field, conversion, format_spec in self._parts:
+            out.append(literal)
+            if field is not None:
+                value = kwargs[field]
+                if conversion == "r":
+                    value = repr(value)
+                elif conversion == "s":
+                    value = str(value)
+                out.append(format(value, format_spec))
+        return ''.join(out)
+
+    def estimate_tokens(self, **kwargs) -> int:
+        """Tokens do prompt renderizado, sem montar a string inteira."""
+        return self._literal_tokens + sum(estimate_tokens(str(kwargs.get(field, ""))) for field in self.fields)
+
 
 class PromptManager:
-    def __init__(self, prompts_directory: str = "prompts"):
-        # Agora busca a partir do diretório de trabalho atual
-        self.base_path = Path.cwd() / prompts_directory
-        self.prompts = self._load_prompts()
-
-    def _load_prompts(self):
-        loaded_prompts = {}
-        for prompt_dir in self.base_path.iterdir():
-            if prompt_dir.is_dir():
-                metadata_path = prompt_dir / "prompt.json"
-                if metadata_path.exists():
-                    with open(metadata_path, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                        task_name = prompt_dir.name
-                        
-                        template_path = prompt_dir / metadata["template_file"]
-                        if template_path.exists():
-                            metadata["template"] = template_path.read_text(encoding="utf-8")
-                            loaded_prompts[task_name] = metadata
-                        else:
-                            print(f"Aviso: Arquivo de template {template_path} não encontrado para a tarefa {task_name}.")
-                else:
-                    print(f"Aviso: prompt.json não encontrado em {prompt_dir}")
-        return loaded_prompts
+    """Carrega os templates de `prompts/<tarefa>/` uma vez, já compilados.
+
+    Os arquivos são verificados no máximo a cada `reload_interval` segundos: um prompt.json
+    ou template alterado é recompilado na próxima chamada, sem reiniciar o hub. Se a nova
+    versão for inválida, a anterior continua em uso.
+    """
+
+    def __init__(self, prompts_directory: Path | str = PROMPTS_DIRECTORY, reload_interval: float = RELOAD_INTERVAL_SECONDS):
+        self.base_path = Path(prompts_directory)
+        if not self.base_path.is_absolute():
+            self.base_path = Path(__file__).resolve().parent.parent / self.base_path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._signatures: Dict[str, Tuple] = {}
+        self.prompts: Dict[str, CompiledPrompt] = {}
+        self.reload_if_changed(force=True)
+
+    def _compile(self, prompt_dir: Path) -> CompiledPrompt:
+        with open(prompt_dir / "prompt.json", 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        template_path = prompt_dir / metadata["template_file"]
+        return CompiledPrompt(prompt_dir.name, metadata, template_path.read_text(encoding="utf-8"))
+
+    def _signature(self, prompt_dir: Path) -> Optional[Tuple]:
+        """(mtime, tamanho) do prompt.json e dos templates da pasta; None se não houver prompt.json."""
+        metadata_path = prompt_dir / "prompt.json"
+        if not metadata_path.exists():
+            return None
+        signature = []
+        for path in sorted(prompt_dir.iterdir()):
+            if path.is_file():
+                st = path.stat()
+                signature.append((path.name, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        """Recompila os prompts cujos arquivos mudaram. Retorna True se algo mudou."""
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return False
+        with self._lock:
+            self._last_check = now
+            if not self.base_path.is_dir():
+                print(f"Aviso: diretório de prompts {self.base_path} não encontrado.")
+                return False
+            prompts = dict(self.prompts)
+            signatures = dict(self._signatures)
+            seen = set()
+            changed = False
+            for prompt_dir in self.base_path.iterdir():
+                if not prompt_dir.is_dir():
+                    continue
+                task_name = prompt_dir.name
+                try:
+                    signature = self._signature(prompt_dir)
+                except OSError:
+                    continue
+                if signature is None:
+                    if force:
+                        print(f"Aviso: prompt.json não encontrado em {prompt_dir}")
+                    continue
+                seen.add(task_name)
+                if signatures.get(task_name) == signature:
+                    continue
+                signatures[task_name] = signature
+                try:
+                    prompts[task_name] = self._compile(prompt_dir)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Aviso: prompt '{task_name}' não carregado: {e}")
+                    continue
+                changed = True
+                if not force:
+                    print(f"Prompt '{task_name}' recarregado.")
+            for task_name in set(prompts) - seen:
+                del prompts[task_name]
+                signatures.pop(task_name, None)
+                changed = True
+            self.prompts = prompts
+            self._signatures = signatures
+            return changed
+
+    def get_prompt(self, task_name: str) -> Optional[CompiledPrompt]:
+        self.reload_if_changed()
+        return self.prompts.get(task_name)
 
     def get_prompt_template(self, task_name: str) -> str | None:
         """Retorna o template de prompt para uma tarefa específica."""
-        if task_name in self.prompts:
-            return self.prompts[task_name].get("template")
-        return None
+        prompt = self.get_prompt(task_name)
+        return prompt.template if prompt else None
 
     def format_prompt(self, task_name: str, **kwargs) -> str | None:
         """Formata um prompt com os argumentos fornecidos."""
-        template = self.get_prompt_template(task_name)
-        if template:
-            return template.format(**kwargs)
+        prompt = self.get_prompt(task_name)
+        if prompt:
+            return prompt.render(**kwargs)
         return None
 
+    def estimate_tokens(self, task_name: str, **kwargs) -> int | None:
+        """Estimativa de tokens do prompt formatado com os argumentos fornecidos."""
+        prompt = self.get_prompt(task_name)
+        return prompt.estimate_tokens(**kwargs) if prompt else None
+
 # Singleton para ser usado em toda a aplicação
-prompt_manager = PromptManager() 
\ No newline at end of file
+prompt_manager = PromptManager()
@@ -0,0 +1,42 @@
+# hivemind_core/resources.py
+# Recursos de processo dos agentes (conexões, pools, threads, filas) que sobrevivem à recarga a quente.
+
+import threading
+from typing import Any, Callable, Dict, List, TypeVar
+
+T = TypeVar("T")
+
+_resources: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def process_resource(key: str, factory: Callable[[], T]) -> T:
+    """Retorna o recurso `key` do processo, criando-o com `factory` na primeira vez.
+
+    A recarga de um agente reimporta o pacote do zero; singletons com estado ou threads
+    criados direto no módulo seriam duplicados a cada recarga (um segundo escritor no banco,
+    um observer órfão, votos pendentes perdidos). Guardados aqui, a nova versão do módulo
+    recebe a mesma instância da anterior. Use o nome do módulo na chave:
+    `process_resource(f"{__name__}.cache", Cache)`.
+    """
+    with _lock:
+        if key not in _resources:
+            _resources[key] = factory()
+        return _resources[key]
+
+
+def release_resources(prefix: str) -> List[str]:
+    """Encerra e esquece os recursos cujas chaves começam com `prefix` (ex: agente removido do hub)."""
+    with _lock:
+        keys = [key for key in _resources if key == prefix or key.startswith(prefix + ".")]
+        released = [(key, _resources.pop(key)) for key in keys]
+    for key, resource in released:
+        for method in ("shutdown", "stop", "close"):
+            close = getattr(resource, method, None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    print(f"AVISO: Falha ao encerrar o recurso '{key}': {e}")
+                break
+    return keys
@@ -0,0 +1,75 @@
+# hivemind_core/streams.py
+# Canais de streaming em processo entre ferramentas do hub e a interface web.
+
+import asyncio
+import uuid
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_PENDING = 8
+
+
+class MessageStream:
+    """Fila limitada: quem publica espera quando o consumidor está atrasado (backpressure).
+
+    Se o consumidor desistir (ex: WebSocket fechado), o stream é fechado e as
+    publicações seguintes são descartadas em vez de bloquear a ferramenta.
+    """
+
+    _END = object()
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.closed = False
+
+    async def send(self, message: Dict[str, Any]) -> bool:
+        if self.closed:
+            return False
+        await self.queue.put(message)
+        return True
+
+    async def finish(self):
+        if not self.closed:
+            await self.queue.put(self._END)
+
+    def abort(self):
+        """Fecha o stream e libera produtores que estejam esperando espaço na fila."""
+        self.closed = True
+        while True:
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+
+    async def __aiter__(self):
+        while True:
+            message = await self.queue.get()
+            if message is self._END:
+                return
+            yield message
+
+
+class StreamBroker:
+    """Registro de streams abertos, identificados por um id passado às ferramentas."""
+
+    def __init__(self):
+        self._streams: Dict[str, MessageStream] = {}
+
+    def open(self, max_pending: int = DEFAULT_MAX_PENDING) -> tuple[str, MessageStream]:
+        stream_id = uuid.uuid4().hex
+        stream = MessageStream(max_pending)
+        self._streams[stream_id] = stream
+        return stream_id, stream
+
+    def get(self, stream_id: Optional[str]) -> Optional[MessageStream]:
+        if not stream_id:
+            return None
+        return self._streams.get(stream_id)
+
+    def close(self, stream_id: str):
+        stream = self._streams.pop(stream_id, None)
+        if stream is not None:
+            stream.abort()
+
+
+# Singleton para ser usado em toda a aplicação
+stream_broker = StreamBroker()
@@ -0,0 +1,300 @@
+# hivemind_core/telemetry.py
+# Telemetria embutida do hub: spans encadeados por contextvars e métricas no formato de texto
+# do Prometheus, sem dependências externas (importável também nos workers de extração).
+
+import os
+import time
+import random
+import bisect
+import threading
+import contextvars
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Telemetria ligada por padrão (0 desativa spans e métricas).
+TELEMETRY_ENABLED = os.getenv("HIVEMIND_TELEMETRY", "1") != "0"
+# Quantos spans terminados ficam em memória para consulta em /traces.
+TRACE_BUFFER_SIZE = int(os.getenv("HIVEMIND_TRACE_BUFFER", "2048"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+BATCH_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _le_label(bound) -> str:
+    return 'le="%s"' % (bound if isinstance(bound, str) else format(bound, "g"))
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not TELEMETRY_ENABLED or not amount:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._labels(key)} {value:g}" for key, value in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por combinação de labels: [contagem por bucket (não cumulativa, +Inf no fim), soma, total].
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        if not TELEMETRY_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{self._labels(key, _le_label(bound))} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._labels(key, _le_label('+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Recarregar um agente não deve duplicar (nem zerar) suas métricas.
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Todas as métricas no formato de exposição de texto do Prometheus (0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registro compartilhado pelo processo do hub.
+metrics = MetricsRegistry()
+
+span_duration = metrics.histogram(
+    "hivemind_span_duration_seconds", "Duração dos spans por nome e status.", ("span", "status"))
+tool_calls = metrics.counter(
+    "hivemind_tool_calls_total", "Chamadas de ferramentas, de clientes MCP ou aninhadas via dispatcher.", ("tool", "status"))
+llm_request_duration = metrics.histogram(
+    "hivemind_llm_request_duration_seconds", "Latência das chamadas ao modelo.", ("backend", "model", "operation"))
+llm_requests = metrics.counter(
+    "hivemind_llm_requests_total", "Chamadas ao modelo por resultado.", ("backend", "model", "operation", "status"))
+llm_prompt_tokens = metrics.histogram(
+    "hivemind_llm_prompt_tokens", "Tokens estimados dos prompts enviados.", ("model",), TOKEN_BUCKETS)
+llm_response_tokens = metrics.histogram(
+    "hivemind_llm_response_tokens", "Tokens estimados das respostas recebidas.", ("model",), TOKEN_BUCKETS)
+embedding_batch_size = metrics.histogram(
+    "hivemind_embedding_batch_size", "Textos por requisição de embedding.", ("model",), BATCH_BUCKETS)
+cache_lookups = metrics.counter(
+    "hivemind_cache_lookups_total", "Consultas aos caches locais por resultado (hit/miss).", ("cache", "result"))
+memory_operations = metrics.counter(
+    "hivemind_memory_operations_total", "Operações no backend de memória.", ("backend", "kind", "op", "status"))
+memory_operation_duration = metrics.histogram(
+    "hivemind_memory_operation_duration_seconds", "Tempo de execução das operações no backend de memória.", ("backend", "kind", "op"))
+memory_queue_wait = metrics.histogram(
+    "hivemind_memory_queue_wait_seconds", "Espera na fila até a operação começar a rodar.", ("kind",))
+
+
+class Span:
+    """Um trecho cronometrado; o pai é o span ativo no contexto (a task ou thread) de quem o abriu."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes", "start_time", "duration", "status", "error",
+                 "_start", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        parent = _current_span.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_time = 0.0
+        self.duration: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._start = 0.0
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "error" if issubclass(exc_type, Exception) else "cancelled"
+            self.error = f"{exc_type.__name__}: {exc}"
+        span_duration.observe(self.duration, span=self.name, status=self.status)
+        _finished_spans.append(self)
+        return False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "start_time": self.start_time, "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status, "error": self.error, "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    __slots__ = ()
+    status = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("hivemind_span", default=None)
+_finished_spans: deque = deque(maxlen=max(1, TRACE_BUFFER_SIZE))
+
+
+def span(name: str, **attributes) -> Span:
+    """Abre um span filho do span ativo: `with span("plan.scan", directory=...):`.
+
+    Funciona em código síncrono e assíncrono; tasks e `asyncio.to_thread` herdam o span ativo.
+    """
+    if not TELEMETRY_ENABLED:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def recent_spans(limit: int = 200, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Spans terminados mais recentes (ou todos os de um trace), do mais antigo para o mais novo."""
+    spans = list(_finished_spans)
+    if trace_id:
+        spans = [s for s in spans if s.trace_id == trace_id]
+    return [s.as_dict() for s in spans[-limit:]]
+
+
+def tool_span(tool_name: str) -> Span:
+    return span(f"tool.{tool_name}", tool=tool_name)
+
+
+def record_tool_call(tool_name: str, status: str):
+    tool_calls.inc(tool=tool_name, status=status)
+
+
+def _is_error_result(result: Any) -> bool:
+    # Erros do MCP (isError) e o padrão das ferramentas do hub: retornar {"status": "error", ...}.
+    if getattr(result, "isError", False):
+        return True
+    data = getattr(result, "data", None)
+    if data is None:
+        data = getattr(result, "structured_content", None)
+    return isinstance(data, dict) and data.get("status") == "error"
+
+
+async def traced_tool_call(tool_name: str, call: Callable[[], Any]) -> Any:
+    """Executa a chamada de uma ferramenta dentro do seu span e conta o resultado."""
+    with tool_span(tool_name) as active:
+        try:
+            result = await call()
+        except Exception:
+            record_tool_call(tool_name, "error")
+            raise
+        except BaseException:
+            record_tool_call(tool_name, "cancelled")
+            raise
+        status = "error" if _is_error_result(result) else "ok"
+        if status == "error" and isinstance(active, Span):
+            active.status = status
+        record_tool_call(tool_name, status)
+        return result
+
@@ -0,0 +1,13 @@
+# hivemind_core/telemetry_middleware.py
+# Middleware do hub que abre o span raiz das chamadas de ferramenta vindas de clientes MCP.
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+
+from hivemind_core.telemetry import traced_tool_call
+
+
+class TelemetryMiddleware(Middleware):
+    """Chamadas aninhadas feitas pelo dispatcher viram spans filhos deste."""
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        return await traced_tool_call(context.message.name, lambda: call_next(context))
@@ -1,3 +1,4 @@
+import os
 import uvicorn
 import sys
 from pathlib import Path
@@ -10,4 +11,8 @@ if __name__ == "__main__":
     print(f"🚀 Iniciando interface web do Hive Mind em http://127.0.0.1:8000")
     # O Uvicorn irá carregar o objeto 'app' do módulo 'web_ui.app'.
     # A lógica de startup agora está dentro de 'web_ui.app' usando 'lifespan'.
-    uvicorn.run("web_ui.app:app", host="127.0.0.1", port=8000, reload=True) 
\ No newline at end of file
+    # Mudanças em agentes são recarregadas a quente pelo AgentRegistry, sem reiniciar o processo.
+    # O reload do Uvicorn (reinicia tudo, derruba as sessões) fica para mudanças no próprio hub:
+    # use `--reload` ou HIVEMIND_UVICORN_RELOAD=1.
+    reload = "--reload" in sys.argv[1:] or os.getenv("HIVEMIND_UVICORN_RELOAD", "0") == "1"
+    uvicorn.run("web_ui.app:app", host="127.0.0.1", port=8000, reload=reload)
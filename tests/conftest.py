@@ -0,0 +1,23 @@
+# tests/conftest.py
+# Torna os pacotes do projeto importáveis e isola os caches em pastas temporárias.
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# A configuração dos módulos é lida no import: os caches dos testes nunca tocam .hivemind_cache/.
+_CACHE = Path(tempfile.mkdtemp(prefix="hivemind_tests_"))
+os.environ.setdefault("HIVEMIND_MEMORY_BACKEND", "memory")
+os.environ.setdefault("HIVEMIND_MODEL_BACKEND", "fake")
+os.environ.setdefault("HIVEMIND_EMBEDDING_CACHE_DIR", str(_CACHE / "embeddings"))
+os.environ.setdefault("HIVEMIND_FEED_INDEX", str(_CACHE / "feed_index.sqlite3"))
+os.environ.setdefault("HIVEMIND_BLOB_DIR", str(_CACHE / "blobs"))
+os.environ.setdefault("FILE_ORGANIZER_SCAN_INDEX", str(_CACHE / "scan_index.sqlite3"))
+os.environ.setdefault("FILE_ORGANIZER_CATEGORY_CACHE", str(_CACHE / "category_cache.sqlite3"))
+os.environ.setdefault("FILE_ORGANIZER_FEATURE_CACHE", str(_CACHE / "feature_cache.sqlite3"))
+os.environ.setdefault("FILE_ORGANIZER_JOURNAL_DIR", str(_CACHE / "journals"))
+os.environ.setdefault("SUMMARIZER_STATE_PATH", str(_CACHE / "summarizer_state.json"))
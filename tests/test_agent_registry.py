@@ -0,0 +1,64 @@
+import sys
+import asyncio
+import importlib
+
+from fastmcp import FastMCP
+
+from conftest import ROOT
+from hivemind_core.agent_registry import AgentRegistry
+from hivemind_core.resources import process_resource, release_resources
+
+
+def _reload(module_name):
+    registry = AgentRegistry(FastMCP(name="TestHub"), lazy=False)
+    result = asyncio.run(registry.reload(module_name, force=True))
+    assert result["status"] == "reloaded", result
+    return sys.modules[module_name]
+
+
+def test_reload_hands_memory_manager_state_to_the_new_module(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    old = importlib.import_module("core_agents.memory_manager.main")
+    new = _reload("core_agents.memory_manager.main")
+
+    assert new is not old
+    # Um único cliente e uma única thread de escrita; a fila e os votos pendentes continuam os mesmos.
+    assert new.memory_store is old.memory_store
+    assert new.ingest_queue is old.ingest_queue
+    assert new.score_aggregator is old.score_aggregator
+    assert new.embedding_cache is old.embedding_cache
+    assert new.feed_index is old.feed_index
+    # ...mas passam a chamar as funções da versão nova.
+    assert new.ingest_queue.upsert is new._upsert_entries
+    assert new.score_aggregator.flush_fn is new._flush_score_deltas
+
+
+def test_reload_keeps_live_index_and_extractor(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    old = importlib.import_module("agents.file_organizer.main")
+    old_scan_index = sys.modules["agents.file_organizer.scanner"].scan_index
+    new = _reload("agents.file_organizer.main")
+
+    assert new is not old
+    assert new.live_index is old.live_index
+    assert new.feature_extractor is old.feature_extractor
+    assert new.category_cache is old.category_cache
+    assert sys.modules["agents.file_organizer.scanner"].scan_index is old_scan_index
+
+
+def test_release_resources_shuts_down_only_the_package():
+    class Resource:
+        stopped = False
+
+        def stop(self):
+            self.stopped = True
+
+    mine = process_resource("tests.fake_agent.worker", Resource)
+    other = process_resource("tests.fake_agent_two.worker", Resource)
+    assert process_resource("tests.fake_agent.worker", Resource) is mine
+
+    assert release_resources("tests.fake_agent") == ["tests.fake_agent.worker"]
+    assert mine.stopped and not other.stopped
+    assert process_resource("tests.fake_agent.worker", Resource) is not mine
+    release_resources("tests.fake_agent")
+    release_resources("tests.fake_agent_two")
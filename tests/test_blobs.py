@@ -0,0 +1,92 @@
+import os
+import time
+import asyncio
+
+from core_agents.memory_manager.blobs import BLOB_REF_KEY, BlobStore, blob_refs_in
+
+PLAN = {"steps": [{"action": "move", "source": f"/tmp/a{i}.txt", "destination": f"/tmp/b/a{i}.txt"} for i in range(200)]}
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_put_dedups_by_content(tmp_path):
+    store = BlobStore(tmp_path)
+    digest, size = store.put(PLAN)
+    again, _ = store.put({"steps": list(PLAN["steps"])})
+
+    assert again == digest
+    assert [d for d, _ in store.iter_blobs()] == [digest]
+    assert store.get(digest) == PLAN
+    # Comprimido em disco, menor que o JSON original.
+    assert store._path(digest).stat().st_size < size
+
+
+def test_offload_and_resolve_round_trip(tmp_path):
+    store = BlobStore(tmp_path)
+    context = {"plan": PLAN, "note": "curto", "count": 3}
+    offloaded = store.offload_context(context, threshold=100)
+
+    assert offloaded["note"] == "curto" and offloaded["count"] == 3
+    assert blob_refs_in(offloaded) == {offloaded["plan"][BLOB_REF_KEY]}
+    assert store.resolve_context(offloaded) == context
+
+
+def test_gc_removes_only_old_unreferenced_blobs(tmp_path):
+    store = BlobStore(tmp_path)
+    live, _ = store.put({"live": PLAN})
+    dead, _ = store.put({"dead": PLAN})
+    fresh, _ = store.put({"fresh": PLAN})
+    _age(store._path(live), 7200)
+    _age(store._path(dead), 7200)
+
+    result = store.collect_garbage({live}, grace_seconds=3600)
+
+    assert result["removed"] == 1 and result["kept"] == 2 and result["freed_bytes"] > 0
+    assert {d for d, _ in store.iter_blobs()} == {live, fresh}
+
+
+def test_dedup_hit_protects_blob_from_gc(tmp_path):
+    store = BlobStore(tmp_path)
+    digest, _ = store.put(PLAN)
+    _age(store._path(digest), 7200)
+
+    # Uma entrada nova reaproveita o blob antigo, mas ainda não está no índice do feed.
+    assert store.put(PLAN)[0] == digest
+    result = store.collect_garbage(set(), grace_seconds=3600)
+
+    assert result["removed"] == 0
+    assert store.get(digest) == PLAN
+
+
+def test_put_rewrites_blob_removed_by_gc(tmp_path):
+    store = BlobStore(tmp_path)
+    digest, _ = store.put(PLAN)
+    _age(store._path(digest), 7200)
+    assert store.collect_garbage(set(), grace_seconds=3600)["removed"] == 1
+
+    assert store.put(PLAN)[0] == digest
+    assert store.get(digest) == PLAN
+
+
+class _Ctx:
+    async def log(self, message, level="info", **kwargs):
+        pass
+
+
+def test_invalid_retention_config_is_ignored_with_a_warning(monkeypatch, capsys):
+    from core_agents.memory_manager import main
+
+    monkeypatch.setenv("HIVEMIND_RETENTION", '{"PLAN": 60, "NOTE": "30d", "LOG": true, "OLD": 0}')
+    assert main._retention_seconds() == {"PLAN": 60.0}
+    warnings = capsys.readouterr().out
+    assert "'NOTE'" in warnings and "'LOG'" in warnings
+
+    for raw in ("{nope", "[1, 2]"):
+        monkeypatch.setenv("HIVEMIND_RETENTION", raw)
+        assert main._retention_seconds() == {}
+        assert "AVISO" in capsys.readouterr().out
+        result = asyncio.run(main.compact_memory.fn(_Ctx(), dry_run=True))
+        assert result["status"] == "success" and result["expired"] == {}
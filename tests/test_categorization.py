@@ -0,0 +1,87 @@
+import re
+import json
+import asyncio
+
+from agents.file_organizer import main as organizer
+from agents.file_organizer.records import ItemRecord
+
+ROW = re.compile(r"^(\d+)\|[fd]\|(\S+)", re.MULTILINE)
+
+
+class _Ctx:
+    async def log(self, message, level="info", **kwargs):
+        pass
+
+
+class FakeModel:
+    """Categoriza pela extensão; falha (uma vez) nos blocos que contêm um dos nomes em `fail_once`."""
+
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.prompts = []
+
+    async def generate(self, model, prompt):
+        self.prompts.append(prompt)
+        rows = ROW.findall(prompt)
+        names = {name for _, name in rows}
+        if names & self.fail_once:
+            self.fail_once -= names
+            return "isso não é JSON"
+        by_category = {}
+        for index, name in rows:
+            by_category.setdefault(name.rsplit(".", 1)[-1].upper(), []).append(int(index))
+        return "```json\n" + json.dumps(by_category) + "\n```"
+
+
+def _items(count):
+    return [ItemRecord(path=f"/dados/item{i}.{'pdf' if i % 2 else 'png'}", type="file") for i in range(count)]
+
+
+def test_chunks_respect_item_and_token_limits():
+    items = _items(10)
+    assert [len(c) for c in organizer._chunk_items(items, max_items=4, max_tokens=10_000)] == [4, 4, 2]
+    small = organizer._chunk_items(items, max_items=100, max_tokens=12)
+    assert len(small) > 1 and sum(len(c) for c in small) == 10
+    # Um item maior que o orçamento ainda forma um bloco sozinho.
+    assert organizer._chunk_items(items[:1], max_tokens=1) == [items[:1]]
+
+
+def test_map_accepts_both_response_shapes_and_counts_invalid_indices():
+    chunk = _items(3)
+    mapped, invalid = organizer._map_categorization({"A": [0, 7], "1": "B", "x": "C"}, chunk)
+    assert mapped == {chunk[0].path: "A", chunk[1].path: "B"}
+    assert invalid == 2
+
+
+def test_failed_chunks_are_retried_alone_and_later_chunks_see_known_categories(monkeypatch):
+    items = _items(400)
+    chunks = organizer._chunk_items(items)
+    assert len(chunks) == 3
+    model = FakeModel(fail_once={chunks[2][0].name})
+    monkeypatch.setattr(organizer.model_backend, "generate", model.generate)
+    seen = []
+
+    async def on_chunk(chunk, result):
+        seen.append(len(chunk))
+
+    result = asyncio.run(organizer._categorize_items("organizar", items, _Ctx(), max_concurrency=2, on_chunk=on_chunk))
+
+    assert result == {item.path: item.path.rsplit(".", 1)[-1].upper() for item in items}
+    # 3 blocos + 1 nova tentativa, só do bloco que falhou.
+    assert len(model.prompts) == 4
+    assert ROW.findall(model.prompts[-1])[0][1] == chunks[2][0].name
+    assert sorted(seen) == sorted(len(c) for c in chunks)
+    # O primeiro bloco roda sozinho; os seguintes recebem as categorias já criadas.
+    assert "Categorias já usadas" not in model.prompts[0]
+    assert all('["PDF","PNG"]' in prompt for prompt in model.prompts[1:])
+
+
+def test_chunks_that_keep_failing_are_reported_not_raised(monkeypatch):
+    items = _items(10)
+
+    async def broken(model, prompt):
+        raise RuntimeError("cota esgotada")
+
+    monkeypatch.setattr(organizer.model_backend, "generate", broken)
+    monkeypatch.setattr(organizer, "LLM_MAX_ATTEMPTS", 1)
+    assert asyncio.run(organizer._categorize_items("organizar", items, _Ctx())) == {}
@@ -0,0 +1,58 @@
+from agents.file_organizer.category_cache import CategoryCache, item_signature, normalize_goal
+from agents.file_organizer.records import ItemRecord
+
+
+def _file(path, samples=None, item_type="file"):
+    return ItemRecord(path=path, type=item_type, sample_contents=samples)
+
+
+def test_signature_ignores_parent_folder_but_not_name_type_or_samples():
+    assert item_signature(_file("/a/Relatório.PDF")) == item_signature(_file("/b/c/relatório.pdf"))
+    assert item_signature(_file("/a/x.pdf")) != item_signature(_file("/a/y.pdf"))
+    assert item_signature(_file("/a/proj", ("b", "a"), "folder")) == item_signature(_file("/z/proj", ("a", "b"), "folder"))
+    assert item_signature(_file("/a/proj", ("a",), "folder")) != item_signature(_file("/a/proj", ("b",), "folder"))
+    assert normalize_goal("  Separar   POR tipo ") == "separar por tipo"
+
+
+def test_store_and_lookup_by_goal(tmp_path):
+    cache = CategoryCache(tmp_path / "cache.sqlite3")
+    items = [_file("/d/a.pdf"), _file("/d/b.png"), _file("/d/c.bin")]
+    cache.store(items, {"/d/a.pdf": "Documentos", "/d/b.png": "Imagens", "/d/c.bin": "_a_revisar"}, "Por tipo")
+
+    hits, misses = cache.lookup([_file("/outra/a.pdf"), _file("/d/b.png"), _file("/d/c.bin")], "  por TIPO")
+    assert hits == {"/outra/a.pdf": "Documentos", "/d/b.png": "Imagens"}
+    # "_a_revisar" não é guardado: o item volta para a IA.
+    assert [m.path for m in misses] == ["/d/c.bin"]
+    assert cache.lookup([_file("/d/a.pdf")], "por projeto")[0] == {}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+    # Persistente entre instâncias.
+    assert CategoryCache(tmp_path / "cache.sqlite3").lookup([_file("/d/a.pdf")], "por tipo")[0] == {"/d/a.pdf": "Documentos"}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = CategoryCache(tmp_path / "cache.sqlite3", max_entries=2)
+    a, b, c = _file("/d/a.pdf"), _file("/d/b.pdf"), _file("/d/c.pdf")
+    cache.store([a], {a.path: "A"}, "g")
+    cache.store([b], {b.path: "B"}, "g")
+    cache.lookup([a], "g")
+    cache.store([c], {c.path: "C"}, "g")
+
+    hits, misses = cache.lookup([a, b, c], "g")
+    assert hits == {a.path: "A", c.path: "C"}
+    assert misses == [b]
+    assert cache.stats()["entries"] == 2
+
+
+def test_invalidate_by_goal_or_all(tmp_path):
+    cache = CategoryCache(tmp_path / "cache.sqlite3")
+    a = _file("/d/a.pdf")
+    cache.store([a], {a.path: "A"}, "um")
+    cache.store([a], {a.path: "B"}, "dois")
+    cache.store([a], {a.path: "C"}, "três")
+
+    assert cache.invalidate(" UM ") == 1
+    assert cache.lookup([a], "um")[0] == {}
+    assert cache.lookup([a], "dois")[0] == {a.path: "B"}
+    assert cache.invalidate() == 2
+    assert cache.stats()["entries"] == 0
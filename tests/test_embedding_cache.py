@@ -0,0 +1,56 @@
+import sqlite3
+
+from core_agents.memory_manager.embedding_cache import EmbeddingCache
+
+MODEL, TASK = "fake:models/text-embedding-004", "RETRIEVAL_DOCUMENT"
+
+
+def test_round_trip_and_keys(tmp_path):
+    cache = EmbeddingCache(tmp_path, max_entries=10)
+    cache.put_many(MODEL, TASK, ["a", "b"], [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+    assert cache.get_many(MODEL, TASK, ["b", "x", "a", "b"]) == [[4.0, 5.0, 6.0], None, [1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    assert cache.get_many(MODEL, "RETRIEVAL_QUERY", ["a"]) == [None]
+    assert cache.get_many("outro", TASK, ["a"]) == [None]
+    assert (cache.hits, cache.misses) == (3, 3)
+    # Dimensões diferentes ficam em arquivos separados.
+    cache.put_many(MODEL, TASK, ["c"], [[7.0, 8.0]])
+    assert cache.get_many(MODEL, TASK, ["c", "a"]) == [[7.0, 8.0], [1.0, 2.0, 3.0]]
+
+
+def test_full_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(tmp_path, max_entries=2)
+    cache.put_many(MODEL, TASK, ["a", "b"], [[1.0], [2.0]])
+    cache.get_many(MODEL, TASK, ["a"])
+    cache.put_many(MODEL, TASK, ["c"], [[3.0]])
+
+    assert cache.get_many(MODEL, TASK, ["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["entries"] == 2
+
+
+def test_persists_across_instances(tmp_path):
+    EmbeddingCache(tmp_path, max_entries=10).put_many(MODEL, TASK, ["a"], [[1.0, 2.0]])
+    assert EmbeddingCache(tmp_path, max_entries=10).get_many(MODEL, TASK, ["a"]) == [[1.0, 2.0]]
+
+
+def test_capacity_change_invalidates_instead_of_returning_zero_vectors(tmp_path):
+    EmbeddingCache(tmp_path, max_entries=10).put_many(MODEL, TASK, ["a"], [[1.0, 2.0, 3.0]])
+
+    grown = EmbeddingCache(tmp_path, max_entries=20)
+    assert grown.get_many(MODEL, TASK, ["a"]) == [None]
+    assert (grown.hits, grown.stats()["entries"]) == (0, 0)
+    grown.put_many(MODEL, TASK, ["a"], [[1.0, 2.0, 3.0]])
+    assert grown.get_many(MODEL, TASK, ["a"]) == [[1.0, 2.0, 3.0]]
+
+
+def test_rows_outside_capacity_are_dropped(tmp_path):
+    cache = EmbeddingCache(tmp_path, max_entries=4)
+    cache.put_many(MODEL, TASK, ["a", "b", "c", "d"], [[1.0], [2.0], [3.0], [4.0]])
+    # Índice de outra capacidade, com o arquivo de vetores ainda no tamanho atual.
+    with sqlite3.connect(tmp_path / "index.sqlite3") as conn:
+        conn.execute("UPDATE embeddings SET slot = slot + 10 WHERE digest IN (SELECT digest FROM embeddings WHERE slot >= 2)")
+
+    reopened = EmbeddingCache(tmp_path, max_entries=4)
+    assert reopened.get_many(MODEL, TASK, ["a", "b", "c", "d"]) == [[1.0], [2.0], None, None]
+    reopened.put_many(MODEL, TASK, ["e"], [[5.0]])
+    assert reopened.get_many(MODEL, TASK, ["e", "a"]) == [[5.0], [1.0]]
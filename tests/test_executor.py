@@ -0,0 +1,215 @@
+import os
+import errno
+import uuid
+import asyncio
+
+import pytest
+
+from agents.file_organizer import executor
+from agents.file_organizer.executor import Journal, execute_plan, resume_plan, rollback_plan
+
+
+def _files(root, names):
+    root.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        (root / name).write_text(name)
+
+
+def _plan(root, moves):
+    return {
+        "root_directory": str(root),
+        "steps": [{"action": "MOVE_FILE", "from": str(root / src), "to": str(root / dst)} for src, dst in moves],
+    }
+
+
+def _ops(journal_id):
+    return [(r["op"], r.get("state")) for r in Journal(journal_id).read()]
+
+
+def _journal(moves, records):
+    journal = Journal(uuid.uuid4().hex)
+    journal.open()
+    journal.append({"op": "begin", "root_directory": None, "folders": [], "moves": moves, "skipped_conflicts": 0})
+    for record in records:
+        journal.append(record)
+    journal.close()
+    return journal.journal_id
+
+
+def test_execute_and_rollback(tmp_path):
+    _files(tmp_path, ["a.pdf", "b.txt"])
+    result = asyncio.run(execute_plan(_plan(tmp_path, [("a.pdf", "Docs/a.pdf"), ("b.txt", "Textos/b.txt")])))
+
+    assert result["status"] == "completed"
+    assert result["renamed"] == 2 and result["created_folders"] == 2
+    assert (tmp_path / "Docs" / "a.pdf").read_text() == "a.pdf"
+    ops = _ops(result["journal_id"])
+    assert ops[0] == ("begin", None) and ops[-1] == ("commit", None)
+    assert ops.count(("move", "done")) == 2
+
+    undone = asyncio.run(rollback_plan(result["journal_id"]))
+    assert undone["status"] == "rolled_back"
+    assert undone["restored"] == 2 and undone["removed_folders"] == 2
+    assert sorted(os.listdir(tmp_path)) == ["a.pdf", "b.txt"]
+
+
+def test_conflicts_abort_or_skip(tmp_path):
+    _files(tmp_path, ["a.pdf", "b.pdf"])
+    _files(tmp_path / "Docs", ["b.pdf"])
+    plan = _plan(tmp_path, [("a.pdf", "Docs/a.pdf"), ("b.pdf", "Docs/b.pdf"), ("c.pdf", "Docs/c.pdf")])
+
+    aborted = asyncio.run(execute_plan(plan))
+    assert aborted["status"] == "conflict" and aborted["moved"] == 0
+    assert {c["reason"] for c in aborted["conflicts"]} == {"destino já existe", "origem não existe"}
+    assert (tmp_path / "a.pdf").exists()
+
+    skipped = asyncio.run(execute_plan(plan, on_conflict="skip"))
+    assert skipped["status"] == "completed" and skipped["moved"] == 1
+    assert len(skipped["skipped_conflicts"]) == 2
+    assert (tmp_path / "Docs" / "a.pdf").exists() and (tmp_path / "b.pdf").exists()
+
+
+def test_unknown_on_conflict_is_rejected(tmp_path):
+    _files(tmp_path, ["a.pdf"])
+    with pytest.raises(ValueError):
+        asyncio.run(execute_plan(_plan(tmp_path, [("a.pdf", "Docs/a.pdf")]), on_conflict="overwrite"))
+    assert (tmp_path / "a.pdf").exists() and not (tmp_path / "Docs").exists()
+
+
+def _failing(code):
+    def fail(path, *args):
+        raise OSError(code, os.strerror(code), path)
+    return fail
+
+
+def test_rename_falls_back_to_copy_only_on_exdev(tmp_path, monkeypatch):
+    _files(tmp_path, ["a.pdf"])
+    monkeypatch.setattr(executor.os, "rename", _failing(errno.EXDEV))
+    result = asyncio.run(execute_plan(_plan(tmp_path, [("a.pdf", "Docs/a.pdf")])))
+
+    assert result["status"] == "completed" and result["copied"] == 1 and result["renamed"] == 0
+    assert (tmp_path / "Docs" / "a.pdf").exists() and not (tmp_path / "a.pdf").exists()
+
+
+@pytest.mark.parametrize("code", [errno.EACCES, errno.ENOSPC])
+def test_rename_errors_are_reported_not_copied(tmp_path, monkeypatch, code):
+    _files(tmp_path, ["a.pdf"])
+    monkeypatch.setattr(executor.os, "rename", _failing(code))
+    monkeypatch.setattr(executor.shutil, "move", lambda *a: pytest.fail("não deveria copiar"))
+    result = asyncio.run(execute_plan(_plan(tmp_path, [("a.pdf", "Docs/a.pdf")])))
+
+    assert result["status"] == "partial" and result["moved"] == 0
+    assert result["failures"][0]["error"] == str(OSError(code, os.strerror(code), str(tmp_path / "a.pdf")))
+    assert ("move", "failed") in _ops(result["journal_id"])
+    assert (tmp_path / "a.pdf").exists()
+
+
+def _partial_copytree(src, dst, symlinks=False):
+    os.makedirs(dst)
+    open(os.path.join(dst, "parcial"), "w").close()
+    raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC), dst)
+
+
+def test_failed_copy_discards_partial_destination(tmp_path, monkeypatch):
+    _files(tmp_path / "Projeto", ["a.txt", "b.txt"])
+    monkeypatch.setattr(executor, "_same_device", lambda src, dst: False)
+    monkeypatch.setattr(executor.shutil, "copytree", _partial_copytree)
+    result = asyncio.run(execute_plan(_plan(tmp_path, [("Projeto", "Destino/Projeto")])))
+
+    assert result["status"] == "partial" and len(result["failures"]) == 1
+    assert ("move", "failed") in _ops(result["journal_id"])
+    assert not (tmp_path / "Destino" / "Projeto").exists()
+    assert sorted(os.listdir(tmp_path / "Projeto")) == ["a.txt", "b.txt"]
+
+    # Retomar copia a pasta de novo para o destino, sem aninhar a origem numa cópia parcial.
+    monkeypatch.undo()
+    resumed = asyncio.run(resume_plan(result["journal_id"]))
+    assert resumed["status"] == "completed"
+    assert sorted(os.listdir(tmp_path / "Destino" / "Projeto")) == ["a.txt", "b.txt"]
+    assert not (tmp_path / "Projeto").exists()
+
+
+def test_partial_copy_that_cannot_be_removed_is_discarded_by_rollback(tmp_path, monkeypatch):
+    _files(tmp_path / "Projeto", ["a.txt"])
+    monkeypatch.setattr(executor, "_same_device", lambda src, dst: False)
+    monkeypatch.setattr(executor.shutil, "copytree", _partial_copytree)
+    monkeypatch.setattr(executor, "_remove_path", _failing(errno.EBUSY))
+    result = asyncio.run(execute_plan(_plan(tmp_path, [("Projeto", "Destino/Projeto")])))
+    assert result["status"] == "partial"
+    assert ("move", "failed") not in _ops(result["journal_id"])
+
+    monkeypatch.undo()
+    undone = asyncio.run(rollback_plan(result["journal_id"]))
+    assert undone["discarded_partial"] == 1
+    assert sorted(os.listdir(tmp_path)) == ["Projeto"]
+
+
+def test_resume_checks_pending_moves_for_new_conflicts(tmp_path):
+    _files(tmp_path, ["a.pdf", "b.pdf"])
+    moves = [[str(tmp_path / n), str(tmp_path / "Docs" / n)] for n in ("a.pdf", "b.pdf")]
+    journal_id = _journal(moves, [])
+    _files(tmp_path / "Docs", ["b.pdf"])
+    (tmp_path / "Docs" / "b.pdf").write_text("arquivo novo")
+
+    aborted = asyncio.run(resume_plan(journal_id))
+    assert aborted["status"] == "conflict"
+    assert [c["reason"] for c in aborted["conflicts"]] == ["destino já existe"]
+    assert (tmp_path / "a.pdf").exists()
+
+    skipped = asyncio.run(resume_plan(journal_id, on_conflict="skip"))
+    assert skipped["status"] == "completed" and skipped["moved"] == 1
+    assert len(skipped["skipped_conflicts"]) == 1
+    assert (tmp_path / "Docs" / "b.pdf").read_text() == "arquivo novo"
+    assert (tmp_path / "b.pdf").exists() and not (tmp_path / "a.pdf").exists()
+
+
+def test_rollback_discards_interrupted_copy(tmp_path):
+    _files(tmp_path, ["a.pdf", "b.pdf"])
+    _files(tmp_path / "Docs", ["a.pdf"])  # cópia parcial: origem e destino existem
+    (tmp_path / "Docs" / "b.pdf").write_text("b.pdf")
+    (tmp_path / "b.pdf").unlink()
+    moves = [[str(tmp_path / "a.pdf"), str(tmp_path / "Docs" / "a.pdf")],
+             [str(tmp_path / "b.pdf"), str(tmp_path / "Docs" / "b.pdf")]]
+    journal_id = _journal(moves, [
+        {"op": "move", "i": 0, "state": "start", "mode": "copy"},
+        {"op": "move", "i": 1, "state": "done", "mode": "rename"},
+    ])
+
+    result = asyncio.run(rollback_plan(journal_id))
+    assert result["status"] == "rolled_back"
+    assert result["discarded_partial"] == 1 and result["restored"] == 1
+    assert not (tmp_path / "Docs" / "a.pdf").exists()
+    assert (tmp_path / "a.pdf").exists() and (tmp_path / "b.pdf").exists()
+
+
+def test_resume_finishes_interrupted_plan(tmp_path):
+    _files(tmp_path, ["a.pdf", "b.pdf", "c.pdf"])
+    (tmp_path / "Docs").mkdir()
+    (tmp_path / "b.pdf").rename(tmp_path / "Docs" / "b.pdf")  # movido, sem registro no journal
+    (tmp_path / "Docs" / "c.pdf").write_text("parcial")
+    moves = [[str(tmp_path / n), str(tmp_path / "Docs" / n)] for n in ("a.pdf", "b.pdf", "c.pdf")]
+    journal_id = _journal(moves, [{"op": "move", "i": 2, "state": "start", "mode": "copy"}])
+
+    result = asyncio.run(resume_plan(journal_id))
+    assert result["status"] == "completed" and result["resumed"]
+    assert result["moved"] == 3
+    assert (tmp_path / "Docs" / "c.pdf").read_text() == "c.pdf"
+    assert ("move", "done") in _ops(journal_id)
+
+    asyncio.run(rollback_plan(journal_id))
+    with pytest.raises(executor.JournalError):
+        asyncio.run(resume_plan(journal_id))
+
+
+def test_journal_ignores_truncated_last_line(tmp_path):
+    journal = Journal("truncado", tmp_path)
+    journal.open()
+    journal.append({"op": "begin", "moves": []})
+    journal.append({"op": "move", "i": 0, "state": "done"})
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"op": "mo')
+
+    assert [r["op"] for r in journal.read()] == ["begin", "move"]
+    with pytest.raises(executor.JournalError):
+        Journal("ausente", tmp_path).read()
@@ -0,0 +1,49 @@
+import os
+import sys
+import struct
+import subprocess
+from pathlib import Path
+
+from agents.file_organizer.extraction import _sniff_signature
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _bmp_header() -> bytes:
+    return b"BM" + struct.pack("<I", 70) + b"\0\0\0\0" + struct.pack("<I", 54) + struct.pack("<I", 40) + b"\0" * 40
+
+
+def _pe_header() -> bytes:
+    head = bytearray(b"MZ" + b"\0" * 254)
+    head[0x3C:0x40] = struct.pack("<I", 128)
+    head[128:132] = b"PE\0\0"
+    return bytes(head)
+
+
+def test_weak_magic_in_plain_text_is_not_binary():
+    assert _sniff_signature(b"BMW notes about the car\n") == "txt"
+    assert _sniff_signature(b"MZ was here\n") == "txt"
+
+
+def test_validated_headers_are_recognized():
+    assert _sniff_signature(_bmp_header()) == "bmp"
+    assert _sniff_signature(_pe_header()) == "pebin"
+    assert _sniff_signature(b"\x1f\x8b\x08\x00" + b"\0" * 12) == "gzip"
+
+
+def test_dos_stub_without_pe_header_is_not_pebin():
+    head = bytearray(_pe_header())
+    head[128:132] = b"XX\0\0"
+    assert _sniff_signature(bytes(head)) != "pebin"
+
+
+def test_strong_signatures():
+    assert _sniff_signature(b"%PDF-1.7\n") == "pdf"
+    assert _sniff_signature(b"\x89PNG\r\n\x1a\n" + b"\0" * 8) == "png"
+
+
+def test_extraction_is_opt_in():
+    env = {k: v for k, v in os.environ.items() if k != "FILE_ORGANIZER_EXTRACTION"}
+    code = "from agents.file_organizer.extraction import feature_extractor; print(feature_extractor.enabled)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "False"
@@ -0,0 +1,155 @@
+import threading
+
+import pytest
+
+from core_agents.memory_manager import feed_index as feed_index_module
+
+from core_agents.memory_manager.feed_index import FeedIndex, decode_cursor, encode_cursor
+from core_agents.memory_manager.ingest import entry_to_metadata
+from core_agents.memory_manager.store import InMemoryBackend
+
+BASE = 1_700_000_000.0
+
+
+def _meta(entry_id, ts, entry_type="NOTE", agent="A", tags=(), score=0.0):
+    return entry_to_metadata({
+        "entry_id": entry_id, "agent_name": agent, "entry_type": entry_type, "timestamp": ts,
+        "content": entry_id, "context": {}, "tags": list(tags), "utility_score": score,
+    })
+
+
+def _index(tmp_path, metadatas):
+    index = FeedIndex(tmp_path / "feed.sqlite3")
+    index.upsert_many(metadatas)
+    return index
+
+
+def _backend(count):
+    backend = InMemoryBackend()
+    metas = [_meta(f"e{i}", BASE + i) for i in range(count)]
+    backend.upsert([m["entry_id"] for m in metas], [[1.0, 0.0]] * count, metas, ["doc"] * count)
+    return backend
+
+
+def _all_pages(index, page_size, **filters):
+    ids, cursor, pages = [], None, 0
+    while True:
+        items, cursor = index.page(page_size, cursor, **filters)
+        ids.extend(item["entry_id"] for item in items)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+def test_pages_cover_every_entry_once_in_order_with_ties(tmp_path):
+    # Timestamps repetidos: o entry_id desempata a ordem e o cursor.
+    metas = [_meta(f"e{i:02d}", BASE + i // 3) for i in range(10)]
+    index = _index(tmp_path, metas)
+
+    ids, pages = _all_pages(index, 3)
+    expected = [m["entry_id"] for m in sorted(metas, key=lambda m: (m["timestamp"], m["entry_id"]), reverse=True)]
+    assert ids == expected
+    assert pages == 4
+    # Página exata: o último lote não deixa cursor para uma página vazia.
+    assert _all_pages(index, 5) == (expected, 2)
+
+
+def test_cursor_is_stable_while_new_entries_arrive(tmp_path):
+    index = _index(tmp_path, [_meta(f"e{i}", BASE + i) for i in range(6)])
+    first, cursor = index.page(3)
+    index.upsert_many([_meta("newer", BASE + 100)])
+    second, cursor = index.page(3, cursor)
+
+    assert [i["entry_id"] for i in first] == ["e5", "e4", "e3"]
+    assert [i["entry_id"] for i in second] == ["e2", "e1", "e0"]
+    assert cursor is None
+
+
+def test_filters_by_type_agent_tag_and_since(tmp_path):
+    index = _index(tmp_path, [
+        _meta("plan-1", BASE + 1, entry_type="PLAN", agent="Org", tags=["x"]),
+        _meta("note-1", BASE + 2, agent="Sum", tags=["x", "y"]),
+        _meta("plan-2", BASE + 3, entry_type="PLAN", agent="Org"),
+        _meta("note-2", BASE + 4, agent="Sum", tags=["y"]),
+    ])
+
+    assert _all_pages(index, 1, entry_type="PLAN")[0] == ["plan-2", "plan-1"]
+    assert _all_pages(index, 1, agent_name="Sum")[0] == ["note-2", "note-1"]
+    assert _all_pages(index, 1, tag="x")[0] == ["note-1", "plan-1"]
+    assert _all_pages(index, 1, tag="y", since=BASE + 3)[0] == ["note-2"]
+
+    index.delete_many(["note-1"])
+    assert _all_pages(index, 1, tag="x")[0] == ["plan-1"]
+
+
+def test_utility_order_pages_by_rank_and_follows_score_updates(tmp_path):
+    index = _index(tmp_path, [_meta(f"e{i}", BASE + i, score=0.0) for i in range(5)])
+    index.update_scores({"e0": 100.0, "e1": 100.0})
+
+    ids, _ = _all_pages(index, 2, order="utility")
+    assert ids[:2] == ["e1", "e0"]
+    assert sorted(ids) == [f"e{i}" for i in range(5)]
+    top, _ = index.page(1, order="utility")
+    assert top[0]["utility_score"] == 100.0
+
+
+def test_invalid_cursor_and_order_are_rejected(tmp_path):
+    index = _index(tmp_path, [_meta("e0", BASE)])
+    assert decode_cursor(encode_cursor(BASE, "e0")) == (BASE, "e0")
+    with pytest.raises(ValueError):
+        index.page(10, "não-é-um-cursor")
+    with pytest.raises(ValueError):
+        index.page(10, order="alfabética")
+
+
+def test_backfill_imports_existing_entries_once(tmp_path):
+    backend = _backend(5)
+    index = FeedIndex(tmp_path / "feed.sqlite3")
+    assert index.ensure_backfilled(backend) == 5
+    assert index.ensure_backfilled(backend) == 0
+    assert _all_pages(index, 2)[0] == [f"e{i}" for i in reversed(range(5))]
+
+
+class _CrashingBackend:
+    """Falha depois do primeiro lote, como uma queda no meio da importação."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.calls = 0
+
+    def count(self):
+        return self.backend.count()
+
+    def get(self, **kwargs):
+        self.calls += 1
+        if self.calls > 1:
+            raise RuntimeError("queda")
+        return self.backend.get(**kwargs)
+
+
+def test_interrupted_backfill_is_completed_on_next_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(feed_index_module, "BACKFILL_BATCH", 2)
+    backend = _backend(5)
+    with pytest.raises(RuntimeError):
+        FeedIndex(tmp_path / "feed.sqlite3").ensure_backfilled(_CrashingBackend(backend))
+
+    reopened = FeedIndex(tmp_path / "feed.sqlite3")
+    assert reopened.count() == 2
+    assert reopened.ensure_backfilled(backend) == 5
+    assert reopened.count() == 5
+    assert FeedIndex(tmp_path / "feed.sqlite3").ensure_backfilled(backend) == 0
+
+
+def test_concurrent_first_calls_backfill_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(feed_index_module, "BACKFILL_BATCH", 1)
+    backend = _backend(20)
+    index = FeedIndex(tmp_path / "feed.sqlite3")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(index.ensure_backfilled(backend))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [0, 0, 0, 20]
+    assert index.count() == 20
@@ -0,0 +1,83 @@
+import asyncio
+
+from core_agents.memory_manager.ingest import IngestionQueue
+
+
+class FakeWriter:
+    def __init__(self, fail_embed=False):
+        self.embed_calls = []
+        self.upserts = []
+        self.fail_embed = fail_embed
+
+    async def embed(self, texts):
+        self.embed_calls.append(list(texts))
+        if self.fail_embed:
+            raise RuntimeError("API fora do ar")
+        return [[float(len(text))] for text in texts]
+
+    async def upsert(self, ids, embeddings, metadatas, documents):
+        self.upserts.append((list(ids), embeddings, metadatas, documents))
+
+
+def _entry(entry_id, content="texto"):
+    return {"entry_id": entry_id, "agent_name": "A", "entry_type": "NOTE", "timestamp": "2024-01-01T00:00:00",
+            "content": content, "context": {"k": 1}, "tags": ["t"], "utility_score": 0.0}
+
+
+def test_concurrent_posts_share_one_embedding_and_upsert():
+    writer = FakeWriter()
+
+    async def scenario():
+        queue = IngestionQueue(writer.embed, writer.upsert, window=0.05)
+        results = await asyncio.gather(*(queue.submit(_entry(f"e{i}")) for i in range(10)))
+        return queue, results
+
+    queue, results = asyncio.run(scenario())
+    assert [r["entry_id"] for r in results] == [f"e{i}" for i in range(10)]
+    assert all(r["status"] == "success" for r in results)
+    assert len(writer.embed_calls) == 1 and len(writer.upserts) == 1
+    assert (queue.batches_written, queue.entries_written) == (1, 10)
+    # Os metadados já vão no formato do ChromaDB.
+    metadata = writer.upserts[0][2][0]
+    assert metadata["context"] == '{"k": 1}' and metadata["tag_t"] is True
+
+
+def test_batches_are_capped_at_max_batch():
+    writer = FakeWriter()
+
+    async def scenario():
+        queue = IngestionQueue(writer.embed, writer.upsert, window=0.05, max_batch=4)
+        return await queue.submit_many([_entry(f"e{i}") for i in range(10)])
+
+    results = asyncio.run(scenario())
+    assert len(results) == 10
+    assert [len(call) for call in writer.embed_calls] == [4, 4, 2]
+
+
+def test_invalid_entries_and_duplicates_do_not_break_the_batch():
+    writer = FakeWriter()
+
+    async def scenario():
+        queue = IngestionQueue(writer.embed, writer.upsert, window=0.01)
+        return await queue.submit_many([_entry("a", "v1"), {"content": "sem id"}, _entry("a", "v2"), _entry("b")])
+
+    results = asyncio.run(scenario())
+    assert [r["status"] for r in results] == ["success", "error", "success", "success"]
+    ids, _, _, documents = writer.upserts[0]
+    assert ids == ["a", "b"] and documents == ["v2", "texto"]
+
+
+def test_write_failures_are_returned_to_every_caller():
+    writer = FakeWriter(fail_embed=True)
+
+    async def scenario():
+        queue = IngestionQueue(writer.embed, writer.upsert, window=0.01)
+        first = await queue.submit_many([_entry("a"), _entry("b")])
+        # O worker continua atendendo depois da falha.
+        writer.fail_embed = False
+        second = await queue.submit(_entry("c"))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert all(r["status"] == "error" and "API fora do ar" in r["message"] for r in first)
+    assert second == {"status": "success", "entry_id": "c"}
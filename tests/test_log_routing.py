@@ -0,0 +1,114 @@
+import asyncio
+import importlib
+
+from fastmcp import FastMCP, Client, Context
+
+from conftest import ROOT
+from hivemind_core.log_routing import RequestLogMiddleware, request_token
+
+
+def _hub():
+    hub = FastMCP(name="TestHub")
+    hub.add_middleware(RequestLogMiddleware())
+    state = {"cancelled": False}
+
+    @hub.tool
+    async def work(name: str, steps: int, ctx: Context) -> dict:
+        for step in range(steps):
+            await ctx.log(f"{name} passo {step}")
+            await ctx.report_progress(step + 1, steps)
+            await asyncio.sleep(0.01)
+        return {"name": name}
+
+    @hub.tool
+    async def slow(ctx: Context) -> dict:
+        try:
+            await ctx.log("começou")
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        return {}
+
+    return hub, state
+
+
+def _app(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    return importlib.import_module("web_ui.app")
+
+
+def test_request_token_parsing():
+    assert request_token("hivemind.request.12") == 12
+    assert request_token("hivemind.request.abc") == "abc"
+    assert request_token(None) is None
+    assert request_token("outro.logger") is None
+
+
+def test_concurrent_jobs_share_one_session(monkeypatch):
+    app = _app(monkeypatch)
+    hub, _ = _hub()
+
+    async def scenario():
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        async def route_log(message):
+            job = app.JobClient.for_log(client, message)
+            if job is not None:
+                await job.log(message)
+
+        async with Client(hub, log_handler=route_log) as client:
+            jobs = [app.JobClient(client, send, f"job-{i}") for i in range(3)]
+            results = await asyncio.gather(*(job.call_tool("work", {"name": job.job_id, "steps": 3}) for job in jobs))
+        return messages, [r.data for r in results]
+
+    messages, results = asyncio.run(scenario())
+    assert results == [{"name": f"job-{i}"} for i in range(3)]
+    for i in range(3):
+        job_id = f"job-{i}"
+        logs = [m["message"] for m in messages if m["type"] == "log" and m["job_id"] == job_id]
+        progress = [m["progress"] for m in messages if m["type"] == "progress" and m["job_id"] == job_id]
+        assert logs == [f"{job_id} passo {step}" for step in range(3)]
+        assert progress == [1, 2, 3]
+    # Pedidos encerrados saem do mapa.
+    assert app.JobClient._by_request == {}
+
+
+def test_cancelling_a_job_cancels_the_tool_on_the_hub(monkeypatch):
+    app = _app(monkeypatch)
+    hub, state = _hub()
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def send(message):
+            if message["type"] == "log":
+                started.set()
+
+        async def route_log(message):
+            job = app.JobClient.for_log(client, message)
+            if job is not None:
+                await job.log(message)
+
+        async with Client(hub, log_handler=route_log) as client:
+            job = app.JobClient(client, send, "job-1")
+            task = asyncio.create_task(job.call_tool("slow"))
+            await asyncio.wait_for(started.wait(), 5)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            for _ in range(100):
+                if state["cancelled"]:
+                    break
+                await asyncio.sleep(0.01)
+            # A sessão segue utilizável pelos outros jobs.
+            assert (await client.call_tool("work", {"name": "x", "steps": 1})).data == {"name": "x"}
+
+    asyncio.run(scenario())
+    assert state["cancelled"]
+    assert app.JobClient._by_request == {}
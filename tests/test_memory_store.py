@@ -0,0 +1,93 @@
+import time
+import asyncio
+import threading
+
+import pytest
+
+from core_agents.memory_manager.store import AsyncMemoryStore, InMemoryBackend, MemoryBackend
+
+
+def test_incomplete_backend_fails_at_construction():
+    class ReadOnly(MemoryBackend):
+        def get(self, ids=None, where=None, limit=None, offset=None, include=("metadatas",)):
+            return {"ids": []}
+
+    with pytest.raises(TypeError):
+        ReadOnly()
+
+
+def test_round_trip_and_where_filters():
+    async def scenario():
+        store = AsyncMemoryStore(InMemoryBackend())
+        await store.upsert(["a", "b"], [[1.0, 0.0], [0.0, 1.0]], [{"agent_name": "A"}, {"agent_name": "B"}], ["x", "y"])
+        await store.update(["b"], [{"agent_name": "A", "extra": None}])
+        found = await store.get(where={"agent_name": "A"}, include=["metadatas"])
+        nearest = await store.query(query_embeddings=[[0.9, 0.1]], n_results=1)
+        await store.delete(["a"])
+        count = await store.count()
+        store.shutdown()
+        return found, nearest, count
+
+    found, nearest, count = asyncio.run(scenario())
+    assert sorted(found["ids"]) == ["a", "b"]
+    assert {"agent_name": "A"} in found["metadatas"]
+    assert nearest["ids"] == [["a"]]
+    assert count == 1
+
+
+def test_writes_run_in_order_on_one_thread_while_reads_run_in_parallel():
+    order, write_threads, active_reads, peak = [], set(), [0], [0]
+    lock = threading.Lock()
+
+    def write(i):
+        write_threads.add(threading.get_ident())
+        time.sleep(0.001)
+        order.append(i)
+
+    def read():
+        with lock:
+            active_reads[0] += 1
+            peak[0] = max(peak[0], active_reads[0])
+        time.sleep(0.05)
+        with lock:
+            active_reads[0] -= 1
+
+    async def scenario():
+        store = AsyncMemoryStore(InMemoryBackend(), max_readers=4)
+        await asyncio.gather(*(store.run_write(write, i) for i in range(20)), *(store.run_read(read) for _ in range(4)))
+        store.shutdown()
+
+    asyncio.run(scenario())
+    assert order == list(range(20))
+    assert len(write_threads) == 1
+    assert peak[0] > 1
+
+
+def test_pending_operations_are_bounded_and_errors_propagate():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+
+    def broken():
+        raise KeyError("x")
+
+    async def scenario():
+        store = AsyncMemoryStore(InMemoryBackend(), max_readers=8, max_pending_reads=2)
+        await asyncio.gather(*(store.run_read(slow) for _ in range(6)))
+        with pytest.raises(KeyError):
+            await store.run_write(broken)
+        # A thread de escrita continua disponível depois de um erro.
+        await store.upsert(["a"], [[1.0]], [{}], ["doc"])
+        count = await store.count()
+        store.shutdown()
+        return count
+
+    assert asyncio.run(scenario()) == 1
+    assert peak[0] <= 2
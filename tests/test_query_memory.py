@@ -0,0 +1,68 @@
+import uuid
+import asyncio
+
+from core_agents.memory_manager.ingest import entry_to_metadata, metadata_to_entry
+
+
+class _Ctx:
+    async def log(self, message, level="info", **kwargs):
+        pass
+
+
+def _entry(entry_id, agent, timestamp, entry_type="NOTE", tags=(), references=None, content="nota"):
+    return {
+        "entry_id": entry_id, "agent_name": agent, "entry_type": entry_type, "timestamp": timestamp,
+        "content": content, "context": {"origem": "teste", "itens": [1, 2]}, "tags": list(tags),
+        "utility_score": 0.0, "references_entry_id": references,
+    }
+
+
+def test_metadata_round_trip():
+    entry = _entry("e1", "A", "2024-01-01T00:00:00+00:00", tags=["x", "y"])
+    metadata = entry_to_metadata(entry)
+
+    assert all(isinstance(v, (str, int, float, bool, type(None))) for v in metadata.values())
+    assert metadata["tag_x"] is True and metadata["tag_y"] is True
+    assert metadata["timestamp_epoch"] == 1704067200.0
+    assert metadata_to_entry(metadata) == entry
+    # Campos corrompidos voltam com o valor padrão em vez de quebrar a leitura.
+    assert metadata_to_entry({**metadata, "tags": "[", "context": "{"})["tags"] == []
+
+
+def test_exact_queries_filter_and_paginate():
+    from core_agents.memory_manager import main
+
+    agent = f"Agente-{uuid.uuid4().hex[:8]}"
+    entries = [
+        _entry(f"{agent}-plan", agent, "2024-01-01T00:00:00", entry_type="PLAN", tags=["org"]),
+        _entry(f"{agent}-s1", agent, "2024-01-02T00:00:00", entry_type="SUMMARY", references=f"{agent}-plan"),
+        _entry(f"{agent}-s2", agent, "2024-01-03T00:00:00", entry_type="SUMMARY", references=f"{agent}-other"),
+        _entry(f"{agent}-n", agent, "2024-01-04T00:00:00", tags=["org"]),
+    ]
+    main.memory_store.backend.upsert(
+        [e["entry_id"] for e in entries], [[1.0, 0.0]] * len(entries),
+        [entry_to_metadata(e) for e in entries], [e["content"] for e in entries],
+    )
+    query = main.query_memory.fn
+
+    async def ids(**filters):
+        result = await query("", _Ctx(), agent_name=agent, top_k=10, **filters)
+        assert result["status"] == "success" and result["mode"] == "exact"
+        return sorted(r["entry_id"] for r in result["results"])
+
+    async def scenario():
+        assert await ids(references_entry_id=f"{agent}-plan") == [f"{agent}-s1"]
+        assert await ids(references_entry_ids=[f"{agent}-plan", f"{agent}-other"]) == [f"{agent}-s1", f"{agent}-s2"]
+        assert await ids(tag="org") == [f"{agent}-n", f"{agent}-plan"]
+        assert await ids(since="2024-01-02T00:00:00Z", until="2024-01-03T00:00:00+00:00") == [f"{agent}-s1", f"{agent}-s2"]
+        first = await query("", _Ctx(), agent_name=agent, top_k=3)
+        second = await query("", _Ctx(), agent_name=agent, top_k=3, offset=3)
+        assert len(first["results"]) == 3 and len(second["results"]) == 1
+        assert first["results"][0]["context"] == {"origem": "teste", "itens": [1, 2]}
+
+        invalid = await query("", _Ctx(), since="ontem")
+        assert invalid["status"] == "error" and invalid["results"] == []
+        unfiltered = await query("  ", _Ctx())
+        assert unfiltered["status"] == "error"
+
+    asyncio.run(scenario())
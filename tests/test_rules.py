@@ -0,0 +1,113 @@
+import json
+import time
+
+import pytest
+
+from agents.file_organizer.records import ItemRecord
+from agents.file_organizer.rules import RULES, RuleEngine, RuleError
+
+NOW = time.time()
+
+
+def _file(name, size=10, age_days=0.0):
+    return ItemRecord(path=f"/dados/{name}", type="file", size=size, mtime=NOW - age_days * 86400)
+
+
+def _engine(tmp_path, user_rules=None, builtin=RULES):
+    rules_file = tmp_path / "rules.json"
+    if user_rules is not None:
+        rules_file.write_text(json.dumps(user_rules), encoding="utf-8")
+    return RuleEngine(builtin_rules=builtin, rule_paths=[rules_file], reload_interval=0)
+
+
+def _classify(engine, names):
+    categorized, remaining = engine.classify_batch([_file(n) for n in names], now=NOW)
+    return {path.rsplit("/", 1)[1]: category for path, category in categorized.items()}, [i.name for i in remaining]
+
+
+def test_compound_extensions_match_the_longest_suffix(tmp_path):
+    engine = _engine(tmp_path, builtin={
+        "Tarballs": {"extensions": [".tar.gz"]},
+        "Gzip": {"extensions": [".gz"]},
+    })
+    categorized, remaining = _classify(engine, ["a.tar.gz", "B.TAR.GZ", "x.v2.tar.gz", "log.gz", "tar.gz", "c.bar.gz", "semext"])
+
+    assert categorized == {
+        "a.tar.gz": "Tarballs", "B.TAR.GZ": "Tarballs", "x.v2.tar.gz": "Tarballs",
+        "log.gz": "Gzip", "tar.gz": "Gzip", "c.bar.gz": "Gzip",
+    }
+    assert remaining == ["semext"]
+
+
+def test_user_rules_take_precedence(tmp_path):
+    engine = _engine(tmp_path, {"rules": [
+        {"category": "Capturas", "glob": "Screenshot*"},
+        {"category": "Meus PDFs", "extensions": [".pdf"]},
+        {"category": "Grandes", "extensions": [".mp4"], "min_size": 1000},
+    ]})
+    items = [_file("Screenshot 1.png"), _file("foto.png"), _file("a.pdf"), _file("big.mp4", size=5000), _file("small.mp4")]
+    categorized, _ = engine.classify_batch(items, now=NOW)
+
+    assert [categorized[i.path] for i in items] == ["Capturas", "Imagens", "Meus PDFs", "Grandes", "Vídeos"]
+
+
+def test_content_rules_only_run_on_the_content_pass(tmp_path):
+    engine = _engine(tmp_path, {"rules": [
+        {"category": "Finanças", "content_types": ["pdf"], "text_regex": "fatura|invoice"},
+        {"category": "Notas", "extensions": [".txt"], "text_regex": "^TODO"},
+    ]})
+    scan, fatura, notes, plain, unknown, opaque = (
+        _file("scan"), _file("fatura"), _file("lista.txt"), _file("a.txt"), _file("blob"), _file("sem_features"))
+
+    # Na passada por nome, só a tabela de extensões resolve.
+    categorized, remaining = engine.classify_batch([scan, fatura, notes, plain], now=NOW)
+    assert categorized == {notes.path: "Documentos", plain.path: "Documentos"}
+    assert remaining == [scan, fatura]
+
+    features = {
+        scan.path: {"content_type": "pdf", "excerpt": "relatório anual"},
+        fatura.path: {"content_type": "pdf", "excerpt": "Invoice #42"},
+        notes.path: {"content_type": "txt", "excerpt": "TODO: comprar pão"},
+        plain.path: {"content_type": "txt", "excerpt": "nada aqui"},
+        unknown.path: {"content_type": "desconhecido", "excerpt": ""},
+    }
+    categorized, remaining = engine.classify_by_content([scan, fatura, notes, plain, unknown, opaque], features, now=NOW)
+    assert categorized == {scan.path: "Documentos", fatura.path: "Finanças", notes.path: "Notas"}
+    assert remaining == [plain, unknown, opaque]
+
+
+def test_rules_reload_when_the_file_changes(tmp_path):
+    engine = _engine(tmp_path, {"rules": [{"category": "A", "extensions": [".xyz"]}]})
+    assert _classify(engine, ["f.xyz"])[0] == {"f.xyz": "A"}
+
+    (tmp_path / "rules.json").write_text(json.dumps({"rules": [{"category": "B", "extensions": [".xyz"]}]}) + " ")
+    assert engine.reload_if_changed(force=True)
+    assert _classify(engine, ["f.xyz"])[0] == {"f.xyz": "B"}
+
+
+def test_invalid_user_rules_fall_back_to_builtin(tmp_path, capsys):
+    engine = _engine(tmp_path, {"rules": [{"category": "Sem critério"}]})
+    assert _classify(engine, ["a.pdf"])[0] == {"a.pdf": "Documentos"}
+    assert "inválidas" in capsys.readouterr().out
+    with pytest.raises(RuleError):
+        RuleEngine(builtin_rules={"X": {"regex": "("}}, rule_paths=[])
+
+
+@pytest.mark.parametrize("bad_rules", [
+    {"rules": [{"category": "Grandes", "min_size": "10MB"}]},
+    {"rules": [{"category": "Velhos", "extensions": [".log"], "older_than_days": True}]},
+    {"rules": ["*.pdf"]},
+    {"rules": [{"category": "X", "extensions": [3]}]},
+    {"Grandes": [".mp4"]},
+])
+def test_malformed_rules_are_rejected_at_load(tmp_path, capsys, bad_rules):
+    engine = _engine(tmp_path, bad_rules)
+    assert "inválidas" in capsys.readouterr().out
+    assert _classify(engine, ["a.pdf", "b.mp4"])[0] == {"a.pdf": "Documentos", "b.mp4": "Vídeos"}
+
+    (tmp_path / "rules.json").write_text(json.dumps({"rules": [{"category": "Grandes", "min_size": 100}]}))
+    assert engine.reload_if_changed(force=True)
+    (tmp_path / "rules.json").write_text(json.dumps(bad_rules) + " ")
+    assert not engine.reload_if_changed(force=True)
+    categorized, _ = engine.classify_batch([_file("big.mp4", size=500)], now=NOW)
+    assert list(categorized.values()) == ["Grandes"]
@@ -0,0 +1,107 @@
+import os
+import time
+import shutil
+
+from agents.file_organizer.scanner import SAMPLE_SIZE, ScanIndex, scan_directory
+
+
+def _age(root):
+    # O índice ignora pastas modificadas há menos de 2 s.
+    past = time.time() - 3600
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            os.utime(os.path.join(dirpath, name), (past, past))
+    os.utime(root, (past, past))
+
+
+def _tree(tmp_path):
+    root = tmp_path / "downloads"
+    (root / "big").mkdir(parents=True)
+    for i in range(50):
+        (root / "big" / f"f{i}.txt").write_text("x")
+    (root / "nested" / "inner").mkdir(parents=True)
+    (root / "nested" / "inner" / "a.pdf").write_text("x")
+    (root / "report.pdf").write_text("x")
+    _age(root)
+    return root
+
+
+def test_non_recursive_samples_without_stat_or_indexing(tmp_path):
+    root = _tree(tmp_path)
+    index = ScanIndex(tmp_path / "index.sqlite3")
+    items, stats = scan_directory(str(root), index=index)
+
+    by_name = {os.path.basename(item.path): item for item in items}
+    assert set(by_name) == {"big", "nested", "report.pdf"}
+    assert len(by_name["big"].sample_contents) == SAMPLE_SIZE
+    assert by_name["nested"].sample_contents == ("inner",)
+    # Só as entradas da raiz são stat'adas e só a raiz entra no índice.
+    assert stats.restat == 3
+    assert index.directories(str(root.resolve())) == [str(root.resolve())]
+
+
+def test_recursive_scan_reuses_index(tmp_path):
+    root = _tree(tmp_path)
+    index = ScanIndex(tmp_path / "index.sqlite3")
+    first, _ = scan_directory(str(root), recursive=True, index=index)
+    second, stats = scan_directory(str(root), recursive=True, index=index)
+    assert sorted(i.path for i in first) == sorted(i.path for i in second)
+    assert stats.restat == 0 and stats.dirs_read == 0
+
+
+def test_index_persists_and_saves_only_changed_directories(tmp_path):
+    root = _tree(tmp_path)
+    resolved = str(root.resolve())
+    scan_directory(str(root), recursive=True, index=ScanIndex(tmp_path / "index.sqlite3"))
+
+    reopened = ScanIndex(tmp_path / "index.sqlite3")
+    _, stats = scan_directory(str(root), recursive=True, index=reopened)
+    assert stats.dirs_read == 0 and stats.dirs_cached == 4
+
+    (root / "big" / "novo.txt").write_text("x")
+    os.utime(root / "big", (time.time() - 7200, time.time() - 7200))
+    writes = []
+    reopened._connection().set_trace_callback(writes.append)
+    _, stats = scan_directory(str(root), recursive=True, index=reopened)
+    assert stats.dirs_read == 1
+    inserts = [w for w in writes if w.startswith("INSERT")]
+    assert len(inserts) == 1 and os.path.join(resolved, "big") in inserts[0]
+
+
+def test_directories_do_not_match_sibling_name_prefixes(tmp_path):
+    root = _tree(tmp_path)
+    sibling = tmp_path / "downloads2"
+    sibling.mkdir()
+    _age(sibling)
+    index = ScanIndex(tmp_path / "index.sqlite3")
+    scan_directory(str(root), recursive=True, index=index)
+    scan_directory(str(sibling), index=index)
+    index.save()
+
+    assert str(sibling.resolve()) not in index.directories(str(root.resolve()))
+    assert index.directories(str(sibling.resolve())) == [str(sibling.resolve())]
+
+
+def test_deleted_folders_are_pruned_in_every_mode(tmp_path):
+    root = _tree(tmp_path)
+    index = ScanIndex(tmp_path / "index.sqlite3")
+    scan_directory(str(root), recursive=True, index=index)
+    resolved = str(root.resolve())
+    assert os.path.join(resolved, "nested", "inner") in index.directories(resolved)
+
+    shutil.rmtree(root / "nested")
+    scan_directory(str(root), index=index)
+    records = index.directories(resolved)
+    assert not any(p.startswith(os.path.join(resolved, "nested")) for p in records)
+    # Pastas existentes que não foram listadas continuam no índice.
+    assert os.path.join(resolved, "big") in records
+
+
+def test_bounded_depth_prunes_deleted_subfolders(tmp_path):
+    root = _tree(tmp_path)
+    index = ScanIndex(tmp_path / "index.sqlite3")
+    scan_directory(str(root), recursive=True, index=index)
+    shutil.rmtree(root / "nested" / "inner")
+    _age(root)
+    scan_directory(str(root), recursive=True, max_depth=1, index=index)
+    assert os.path.join(str(root.resolve()), "nested", "inner") not in index.directories(str(root.resolve()))
@@ -0,0 +1,123 @@
+import uuid
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from core_agents.memory_manager.ingest import entry_to_metadata
+from core_agents.memory_manager.scores import ScoreAggregator
+
+
+class FakeScores:
+    """flush_fn em memória: registra cada lote e ignora ids desconhecidos."""
+
+    def __init__(self, scores, fail=0):
+        self.scores = dict(scores)
+        self.batches = []
+        self.fail = fail
+
+    async def __call__(self, deltas):
+        self.batches.append(dict(deltas))
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("backend indisponível")
+        await asyncio.sleep(0.01)
+        new_scores = {}
+        for entry_id, delta in deltas.items():
+            if entry_id in self.scores:
+                self.scores[entry_id] += delta
+                new_scores[entry_id] = self.scores[entry_id]
+        return new_scores
+
+
+def test_queued_votes_are_summed_into_one_flush():
+    backend = FakeScores({"a": 1.0, "b": 0.0})
+
+    async def scenario():
+        aggregator = ScoreAggregator(backend, interval=60)
+        for _ in range(10):
+            aggregator.add("a", 0.5)
+        aggregator.add("b", -1.0)
+        assert aggregator.pending("a") == 5.0
+        assert await aggregator.flush() == {"a": 6.0, "b": -1.0}
+        assert await aggregator.flush() == {}
+        return aggregator
+
+    aggregator = asyncio.run(scenario())
+    assert backend.batches == [{"a": 5.0, "b": -1.0}]
+    assert aggregator.flushes == 1
+
+
+def test_submit_returns_new_score_and_batches_concurrent_votes():
+    backend = FakeScores({"a": 0.0})
+
+    async def scenario():
+        aggregator = ScoreAggregator(backend, interval=60)
+        return await asyncio.gather(*(aggregator.submit("a", 1.0) for _ in range(20)))
+
+    results = asyncio.run(scenario())
+    assert backend.scores["a"] == 20.0
+    assert max(results) == 20.0
+    # Todos foram gravados, em bem menos lotes que votos.
+    assert len(backend.batches) < 20
+    assert sum(sum(batch.values()) for batch in backend.batches) == 20.0
+
+
+def test_submit_reports_unknown_entries():
+    backend = FakeScores({"a": 0.0})
+
+    async def scenario():
+        aggregator = ScoreAggregator(backend, interval=60)
+        aggregator.add("ghost-queued", 1.0)
+        result = await aggregator.submit("ghost", 1.0)
+        return aggregator, result
+
+    aggregator, result = asyncio.run(scenario())
+    assert result is None
+    assert aggregator.discarded == 1
+
+
+def test_failed_flush_fails_waiters_and_requeues_background_votes():
+    backend = FakeScores({"a": 0.0}, fail=1)
+
+    async def scenario():
+        aggregator = ScoreAggregator(backend, interval=60)
+        aggregator.add("a", 2.0)
+        with pytest.raises(RuntimeError):
+            await aggregator.submit("a", 1.0)
+        # Só o voto enfileirado volta ao buffer; o do chamador que recebeu o erro não.
+        assert aggregator.pending("a") == 2.0
+        assert await aggregator.flush() == {"a": 2.0}
+
+    asyncio.run(scenario())
+
+
+def _entry(entry_id):
+    return {
+        "entry_id": entry_id, "agent_name": "Tester", "entry_type": "NOTE",
+        "timestamp": datetime.now(timezone.utc).isoformat(), "content": "nota", "context": {},
+        "tags": [], "utility_score": 1.0, "references_entry_id": None,
+    }
+
+
+def test_update_entry_score_keeps_the_success_contract():
+    from core_agents.memory_manager import main
+
+    entry_id = str(uuid.uuid4())
+    main.memory_store.backend.upsert([entry_id], [[0.0] * 8], [entry_to_metadata(_entry(entry_id))], ["nota"])
+
+    async def scenario():
+        update = main.update_entry_score.fn
+        results = await asyncio.gather(update(entry_id, 0.5, None), update(entry_id, 0.5, None))
+        missing = await update("nao-existe", 1.0, None)
+        queued = await update(entry_id, 3.0, None, wait=False)
+        await main.score_aggregator.flush()
+        return results, missing, queued
+
+    results, missing, queued = asyncio.run(scenario())
+    assert all(r["status"] == "success" for r in results)
+    assert max(r["new_score"] for r in results) == 2.0
+    assert missing == {"status": "error", "message": "Entrada não encontrada."}
+    assert queued == {"status": "queued", "pending_delta": 3.0}
+    stored = main.memory_store.backend.get(ids=[entry_id], include=["metadatas"])
+    assert stored["metadatas"][0]["utility_score"] == 5.0
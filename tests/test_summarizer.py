@@ -0,0 +1,61 @@
+import json
+import asyncio
+from types import SimpleNamespace
+
+from agents.summarizer import main as summarizer
+
+
+class _Ctx:
+    async def log(self, message, level="info", **kwargs):
+        pass
+
+
+def _plan(entry_id, timestamp):
+    return {"entry_id": entry_id, "agent_name": "FileOrganizer", "timestamp": timestamp, "content": entry_id}
+
+
+def test_pick_timestamp_compares_instants_not_strings():
+    posts = [_plan("a", "2024-01-01T10:00:00+02:00"), _plan("b", "2024-01-01T09:00:00"),
+             _plan("c", "2024-01-01T08:30:00Z"), _plan("d", "ontem")]
+
+    assert summarizer._pick_timestamp(posts, max) == "2024-01-01T09:00:00"
+    assert summarizer._pick_timestamp(posts, min) == "2024-01-01T10:00:00+02:00"
+    assert summarizer._pick_timestamp([_plan("d", "ontem")], max) is None
+
+
+def _run(monkeypatch, tmp_path, plans, failing=()):
+    state_path = tmp_path / "state.json"
+    monkeypatch.setattr(summarizer, "SUMMARIZER_STATE_PATH", state_path)
+
+    async def fake_summarize(text):
+        if text in failing:
+            raise RuntimeError("modelo indisponível")
+        return f"resumo de {text}"
+
+    async def fake_call_tool(ctx, name, arguments=None):
+        if name == "get_feed_page":
+            return SimpleNamespace(data={"items": plans, "next_cursor": None})
+        if name == "query_memory":
+            return SimpleNamespace(data={"results": []})
+        return SimpleNamespace(data={"results": [{"status": "success"} for _ in arguments["entries"]]})
+
+    monkeypatch.setattr(summarizer, "_summarize", fake_summarize)
+    monkeypatch.setattr(summarizer, "call_tool", fake_call_tool)
+    result = asyncio.run(summarizer.process_latest_posts.fn(_Ctx()))
+    return result, json.loads(state_path.read_text())["watermark"]
+
+
+def test_watermark_advances_to_the_latest_instant(monkeypatch, tmp_path):
+    plans = [_plan("a", "2024-01-01T10:00:00+02:00"), _plan("b", "2024-01-01T09:00:00")]
+    result, watermark = _run(monkeypatch, tmp_path, plans)
+    assert result["status"] == "success" and result["summarized"] == 2
+    assert watermark == "2024-01-01T09:00:00"
+
+
+def test_watermark_stops_at_the_earliest_failed_plan(monkeypatch, tmp_path):
+    plans = [_plan("a", "2024-01-01T10:00:00+02:00"), _plan("b", "2024-01-01T09:00:00"),
+             _plan("c", "2024-01-01T12:00:00Z")]
+    result, watermark = _run(monkeypatch, tmp_path, plans, failing={"a", "b"})
+    assert result["status"] == "partial" and result["failed"] == 2
+    # "a" (08:00 UTC) é anterior a "b" (09:00 UTC), embora "10:00" > "09:00" como texto.
+    assert watermark == "2024-01-01T10:00:00+02:00"
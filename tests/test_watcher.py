@@ -0,0 +1,39 @@
+import os
+import threading
+
+from agents.file_organizer import watcher
+from agents.file_organizer.watcher import LiveDirectoryIndex
+
+
+def test_concurrent_watch_of_the_same_root_schedules_once(tmp_path, monkeypatch):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "f.txt").write_text("x")
+    scheduled = []
+
+    class CountingHandler(watcher._EventHandler):
+        def __init__(self, index, root):
+            scheduled.append(root)
+            super().__init__(index, root)
+
+    monkeypatch.setattr(watcher, "_EventHandler", CountingHandler)
+    index = LiveDirectoryIndex()
+    barrier = threading.Barrier(8)
+    results = []
+
+    def watch():
+        barrier.wait()
+        results.append(index.watch(str(tmp_path)))
+
+    threads = [threading.Thread(target=watch) for _ in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert scheduled == [str(tmp_path.resolve())]
+        assert {r["directories"] for r in results} == {3}
+        assert index.watched_roots() == [str(tmp_path.resolve())]
+        assert sorted(os.path.basename(i.path) for i in index.snapshot(str(tmp_path))) == ["a", "b"]
+    finally:
+        index.stop()
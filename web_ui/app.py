@@ -1,29 +1,75 @@
 # web_ui/app.py (VERSÃO SIMPLIFICADA E FOCADA)
 
+import os
 import json
+import asyncio
+import itertools
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastmcp import FastMCP, Client, Context
+from fastmcp import FastMCP, Client
 from fastmcp.client.logging import LogMessage
-from hivemind_core.agent_loader import load_agents_from_directory
+from mcp.types import CancelledNotification, CancelledNotificationParams, ClientNotification
+from hivemind_core.agent_registry import AgentRegistry, HOT_RELOAD
+from hivemind_core.streams import stream_broker, MessageStream
+from hivemind_core.dispatch import dispatcher
+from hivemind_core.telemetry import metrics, recent_spans
+from hivemind_core.telemetry_middleware import TelemetryMiddleware
+from hivemind_core.log_routing import RequestLogMiddleware, request_token
+
+# Ferramentas executadas periodicamente: (ferramenta, intervalo em segundos; 0 desativa).
+SCHEDULED_TOOLS = [
+    ("process_latest_posts", float(os.getenv("SUMMARIZER_INTERVAL_SECONDS", "0"))),
+    ("compact_memory", float(os.getenv("HIVEMIND_COMPACT_INTERVAL_SECONDS", "0"))),
+]
+
+async def _run_tool_periodically(client: Client, tool_name: str, interval: float):
+    while True:
+        try:
+            result_object = await client.call_tool(tool_name)
+            print(f"{tool_name} (agendado): {result_object.data}")
+        except Exception as e:
+            print(f"Erro na execução agendada de '{tool_name}': {e}")
+        await asyncio.sleep(interval)
 
 # --- Lógica de Inicialização (Lifespan) ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(" HIVE MIND STARTUP ".center(50, "="))
     print("Carregando todos os agentes...")
-    await load_agents_from_directory(hub_mcp)
-    tools = await hub_mcp.get_tools()
-    print(f"Agentes carregados. {len(tools)} ferramentas disponíveis no hub.")
-    print("=" * 50)
-    yield
+    registry = AgentRegistry(hub_mcp)
+    app.state.agent_registry = registry
+    tool_count = await registry.load_all()
+    print(f"Agentes carregados. {tool_count} ferramentas disponíveis no hub.")
+    if HOT_RELOAD:
+        registry.start_watching()
+    # Chamadas entre ferramentas do hub vão direto para a função, sem passar por um Client.
+    dispatcher.bind(hub_mcp)
+    # Um único Client de longa duração atende /feed e as tarefas agendadas; a sessão MCP
+    # em memória aceita chamadas concorrentes.
+    async with Client(hub_mcp) as client:
+        app.state.mcp_client = client
+        scheduled_tasks = []
+        for tool_name, interval in SCHEDULED_TOOLS:
+            if interval > 0:
+                scheduled_tasks.append(asyncio.create_task(_run_tool_periodically(client, tool_name, interval)))
+                print(f"'{tool_name}' agendado a cada {interval:g}s.")
+        print("=" * 50)
+        yield
+        for task in scheduled_tasks:
+            task.cancel()
+    registry.stop()
     print("HIVE MIND SHUTDOWN".center(50, "="))
 
 hub_mcp = FastMCP(name="HiveMindHub")
+# Span raiz de cada chamada de ferramenta vinda de um Client (WebSocket, /feed, agendadas).
+hub_mcp.add_middleware(TelemetryMiddleware())
+# Logs marcados com o progressToken do pedido: o WebSocket os separa por job numa sessão só.
+hub_mcp.add_middleware(RequestLogMiddleware())
 app = FastAPI(lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="web_ui/static"), name="static")
@@ -37,64 +83,226 @@ async def get_index_page(request: Request):
 async def get_feed_page(request: Request):
     feed_items = []
     try:
-        async with Client(hub_mcp) as client:
-            result_object = await client.call_tool("get_feed", {"top_k": 50})
-            if result_object and result_object.data:
-                feed_items = result_object.data
+        result_object = await request.app.state.mcp_client.call_tool("get_feed", {"top_k": 50})
+        if result_object and result_object.data:
+            feed_items = result_object.data
     except Exception as e:
         print(f"Erro ao buscar feed: {e}")
     return templates.TemplateResponse("feed.html", {"feed_items": feed_items, "request": request})
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Métricas do hub no formato de texto do Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/traces")
+async def get_traces(limit: int = 200, trace_id: str | None = None):
+    """Spans terminados mais recentes; com `trace_id`, apenas os de um trace."""
+    return {"spans": recent_spans(limit, trace_id)}
+
+# Envia uma mensagem JSON ao navegador; todas as mensagens de um job levam o seu `job_id`.
+SendFn = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class JobError(Exception):
+    """Erro de validação de um job, mostrado ao usuário como mensagem `error`."""
+
+class JobClient:
+    """Visão de um job sobre o Client da conexão.
+
+    Cada chamada tem um handler de progresso próprio. O hub (RequestLogMiddleware) anuncia o
+    id do pedido na primeira notificação de progresso; a partir daí o pedido fica registrado
+    em `_by_request` e os logs marcados com o mesmo id chegam em `log`. Se o job for
+    cancelado, o hub recebe `notifications/cancelled` e interrompe a ferramenta.
+    """
+
+    # (Client, id do pedido) -> job, para os pedidos em andamento de todas as conexões.
+    _by_request: Dict[Tuple[Client, Any], "JobClient"] = {}
+
+    def __init__(self, client: Client, send: SendFn, job_id: str):
+        self.client = client
+        self.send = send
+        self.job_id = job_id
+
+    @classmethod
+    def for_log(cls, client: Client, message: LogMessage) -> "JobClient | None":
+        request_id = request_token(message.logger)
+        return cls._by_request.get((client, request_id)) if request_id is not None else None
+
+    async def progress(self, progress: float, total: float | None, message: str | None):
+        await self.send({"type": "progress", "job_id": self.job_id, "progress": progress, "total": total, "message": message})
+
+    async def log(self, message: LogMessage):
+        await self.send({"type": "log", "job_id": self.job_id, "level": message.level, "message": message.data})
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any] | None = None):
+        announced: List[Any] = []
+
+        async def on_progress(progress: float, total: float | None, message: str | None):
+            request_id = request_token(message) if total is None else None
+            if request_id is not None:
+                announced.append(request_id)
+                JobClient._by_request[(self.client, request_id)] = self
+                return
+            await self.progress(progress, total, message)
+
+        call = asyncio.ensure_future(self.client.call_tool(name, arguments, progress_handler=on_progress))
+        try:
+            # Protegida do cancelamento do job: o pedido precisa seguir registrado até avisarmos o hub.
+            return await asyncio.shield(call)
+        except asyncio.CancelledError:
+            call.cancel()
+            for request_id in announced:
+                await self.client.session.send_notification(ClientNotification(CancelledNotification(
+                    method="notifications/cancelled",
+                    params=CancelledNotificationParams(requestId=request_id, reason="Job cancelado."),
+                )))
+            raise
+        finally:
+            for request_id in announced:
+                JobClient._by_request.pop((self.client, request_id), None)
+
+async def _forward_stream(send: SendFn, stream: MessageStream, job_id: str):
+    """Repassa as mensagens do stream ao navegador; se o envio falhar, libera o produtor."""
+    try:
+        async for message in stream:
+            await send({**message, "job_id": job_id})
+    except Exception:
+        stream.abort()
+        raise
+
+async def _job_generate_plan(client: JobClient, send: SendFn, job_id: str, payload: Dict[str, Any]):
+    directory = payload.get("directory")
+    goal = payload.get("goal")
+    if not (directory and Path(directory).is_dir()):
+        raise JobError("Caminho do diretório é inválido.")
+
+    await send({"type": "log", "job_id": job_id, "level": "debug", "message": f"Chamando 'generate_organization_plan' com diretório: {directory}"})
+
+    arguments = {"directory_path": directory, "user_goal": goal}
+    if not payload.get("stream"):
+        result_object = await client.call_tool("generate_organization_plan", arguments)
+        await send({"type": "plan_result", "job_id": job_id, "data": result_object.data})
+        return
+
+    # Modo streaming: os passos chegam em mensagens `plan_chunk` enquanto a ferramenta roda,
+    # e o resultado final vira um `plan_summary` sem a lista completa de passos.
+    stream_id, stream = stream_broker.open()
+    forwarder = asyncio.create_task(_forward_stream(send, stream, job_id))
+    try:
+        result_object = await client.call_tool("generate_organization_plan", {**arguments, "stream_id": stream_id})
+        await stream.finish()
+        await forwarder
+    finally:
+        stream_broker.close(stream_id)
+        if not forwarder.done():
+            forwarder.cancel()
+    await send({"type": "plan_summary", "job_id": job_id, "data": result_object.data})
+
+async def _job_execute_plan(client: JobClient, send: SendFn, job_id: str, payload: Dict[str, Any]):
+    plan = payload.get("plan")
+    if not (plan and plan.get("steps")):
+        raise JobError("Plano inválido ou vazio.")
+    result_object = await client.call_tool("execute_plan", {"plan": plan})
+    await send({"type": "execution_result", "job_id": job_id, "data": result_object.data})
+
+async def _job_process_feed(client: JobClient, send: SendFn, job_id: str, payload: Dict[str, Any]):
+    result_object = await client.call_tool("process_latest_posts")
+    summary = result_object.data or {}
+    await send({"type": "log", "job_id": job_id, "level": "info", "message": f"SummarizerAgent processou o feed ({summary.get('summarized', 0)} novos resumos). Atualize a página do feed para ver os resultados."})
+
+# Ações do WebSocket que viram jobs.
+JOB_HANDLERS = {
+    "generate_plan": _job_generate_plan,
+    "execute_plan": _job_execute_plan,
+    "process_feed": _job_process_feed,
+}
+# Máximo de jobs simultâneos por conexão WebSocket.
+WS_MAX_JOBS = int(os.getenv("HIVEMIND_WS_MAX_JOBS", "4"))
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
+    """Cada ação vira um job com id próprio, executado como tarefa asyncio.
+
+    Mensagens do navegador: `{"action": ..., "job_id": opcional, ...}` inicia um job e
+    `{"action": "cancel", "job_id": ...}` cancela um job em andamento. Respostas, logs e
+    progresso de cada job levam o `job_id`; o fim é sinalizado por `job_finished` com
+    status `completed`, `failed` ou `cancelled`. Ao desconectar, os jobs da sessão são cancelados.
+    """
     await websocket.accept()
-    # CORREÇÃO: O log_handler recebe um único objeto `LogMessage`, não dois argumentos.
-    # A assinatura da função foi corrigida.
-    async def log_handler(message: LogMessage):
-        await websocket.send_json({"type": "log", "level": message.level, "message": message.data})
+    send_lock = asyncio.Lock()
+    jobs: Dict[str, asyncio.Task] = {}
+    job_counter = itertools.count(1)
 
-    # Este contexto é usado para chamadas do lado do servidor que não passam pelo Client.
-    ctx = Context(hub_mcp)
+    async def send(message: Dict[str, Any]):
+        # Vários jobs escrevem no mesmo socket: um envio por vez.
+        async with send_lock:
+            await websocket.send_json(message)
 
-    try:
-        while True:
-            data = await websocket.receive_text()
-            payload = json.loads(data)
-            action = payload.get("action")
-
-            # CORREÇÃO 2: O contexto (ctx) é passado diretamente para o call_tool.
-            async with Client(hub_mcp, log_handler=log_handler) as client:
-                if action == "generate_plan":
-                    directory = payload.get("directory")
-                    goal = payload.get("goal")
-                    if not (directory and Path(directory).is_dir()):
-                        await websocket.send_json({"type": "error", "message": "Caminho do diretório é inválido."})
-                        continue
-                    
-                    # Log para depuração - CORREÇÃO:
-                    # A chamada direta a log_handler causava um TypeError. Agora enviamos a mensagem JSON diretamente.
-                    await websocket.send_json({"type": "log", "level": "debug", "message": f"Chamando 'generate_organization_plan' com diretório: {directory}"})
-                    
-                    # CORREÇÃO: Os argumentos da ferramenta devem ser passados como um dicionário
-                    # no segundo argumento de `call_tool`, não como keyword arguments.
-                    result_object = await client.call_tool(
-                        "generate_organization_plan",
-                        {
-                            "directory_path": directory,
-                            "user_goal": goal
-                        }
-                    )
-                    await websocket.send_json({"type": "plan_result", "data": result_object.data})
-
-                elif action == "process_feed":
-                    # O 'ctx' é injetado automaticamente pelo framework.
-                    # Esta ferramenta não recebe outros argumentos, então a chamada é correta.
-                    await client.call_tool("process_latest_posts") 
-                    await websocket.send_json({"type": "log", "level": "info", "message": "SummarizerAgent processou o feed. Atualize a página do feed para ver os resultados."})
-                else:
-                    await websocket.send_json({"type": "error", "message": f"Ação desconhecida: {action}"})
-    
-    except WebSocketDisconnect:
-        print("Cliente desconectado.")
-    except Exception as e:
-        print(f"Erro no websocket: {e}") 
\ No newline at end of file
+    async def route_log(message: LogMessage):
+        job = JobClient.for_log(client, message)
+        if job is not None:
+            await job.log(message)
+
+    async def run_job(job_id: str, action: str, payload: Dict[str, Any]):
+        status = "completed"
+        try:
+            await JOB_HANDLERS[action](JobClient(client, send, job_id), send, job_id, payload)
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except JobError as e:
+            status = "failed"
+            await send({"type": "error", "job_id": job_id, "message": str(e)})
+        except Exception as e:
+            status = "failed"
+            print(f"Erro no job {job_id} ({action}): {e}")
+            await send({"type": "error", "job_id": job_id, "message": f"Falha em '{action}': {e}"})
+        finally:
+            jobs.pop(job_id, None)
+            try:
+                await send({"type": "job_finished", "job_id": job_id, "action": action, "status": status})
+            except Exception:
+                pass  # Conexão já encerrada.
+
+    # Uma sessão MCP por conexão, compartilhada pelos jobs; logs e progresso são separados
+    # pelo id do pedido de cada chamada (ver JobClient).
+    async with Client(hub_mcp, log_handler=route_log) as client:
+        try:
+            while True:
+                data = await websocket.receive_text()
+                payload = json.loads(data)
+                action = payload.get("action")
+
+                if action == "cancel":
+                    task = jobs.get(payload.get("job_id"))
+                    if task is None:
+                        await send({"type": "error", "job_id": payload.get("job_id"), "message": "Job não encontrado ou já encerrado."})
+                    else:
+                        task.cancel()
+                    continue
+
+                if action not in JOB_HANDLERS:
+                    await send({"type": "error", "message": f"Ação desconhecida: {action}"})
+                    continue
+
+                job_id = str(payload.get("job_id") or f"job-{next(job_counter)}")
+                if job_id in jobs:
+                    await send({"type": "job_rejected", "job_id": job_id, "message": "Já existe um job em andamento com esse id."})
+                    continue
+                if len(jobs) >= WS_MAX_JOBS:
+                    await send({"type": "job_rejected", "job_id": job_id, "message": f"Limite de {WS_MAX_JOBS} jobs simultâneos atingido."})
+                    continue
+                jobs[job_id] = asyncio.create_task(run_job(job_id, action, payload))
+                await send({"type": "job_started", "job_id": job_id, "action": action})
+
+        except WebSocketDisconnect:
+            print("Cliente desconectado.")
+        except Exception as e:
+            print(f"Erro no websocket: {e}")
+        finally:
+            pending = list(jobs.values())
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                print(f"{len(pending)} job(s) cancelado(s) ao encerrar a conexão.")
@@ -7,13 +7,13 @@ document.addEventListener('DOMContentLoaded', () => {
     const goalInput = document.getElementById('goalInput');
     const resultContainer = document.getElementById('result-container');
 
-    const setFormDisabled = (disabled) => {
-        generatePlanBtn.disabled = disabled;
-        summarizeBtn.disabled = disabled;
-        directoryInput.disabled = disabled;
-        goalInput.disabled = disabled;
-        generatePlanBtn.textContent = disabled ? 'Gerando...' : 'Gerar Plano';
-    };
+    // Cada ação enviada ao servidor é um job; vários podem rodar ao mesmo tempo.
+    // jobs[job_id] = { panel, plan } — o job de execução aponta para o painel do plano.
+    const jobs = {};
+    // Painel de cada plano -> job de geração; continua disponível para executar o plano depois que o job termina.
+    const planPanels = new Map();
+    let jobSeq = 0;
+    const newJobId = (prefix) => `${prefix}-${Date.now().toString(36)}-${++jobSeq}`;
 
     ws.onopen = () => console.log('WebSocket conectado.');
     ws.onclose = () => console.log('WebSocket desconectado.');
@@ -22,56 +22,170 @@ document.addEventListener('DOMContentLoaded', () => {
     ws.onmessage = (event) => {
         const msg = JSON.parse(event.data);
         console.log('Mensagem recebida:', msg);
+        const job = jobs[msg.job_id];
+        const panel = job ? job.panel : null;
 
-        if (msg.type === 'plan_result') {
-            setFormDisabled(false);
+        if (msg.type === 'job_started') {
+            if (panel) panel.querySelector('.job-status').textContent = 'em andamento';
+        } else if (msg.type === 'job_rejected') {
+            if (panel) {
+                panel.querySelector('.job-status').textContent = 'recusado';
+                panel.querySelector('.plan-objective').innerHTML = `<span style="color: #ff6b6b;">${msg.message}</span>`;
+                panel.querySelector('.cancelJobBtn').remove();
+            } else {
+                alert(msg.message);
+            }
+            delete jobs[msg.job_id];
+        } else if (msg.type === 'job_finished') {
+            if (panel) {
+                const statusEl = panel.querySelector('.job-status');
+                if (statusEl && statusEl.dataset.job === msg.job_id) statusEl.textContent = jobStatusLabel(msg.status);
+                const cancelBtn = panel.querySelector(`.cancelJobBtn[data-job="${msg.job_id}"]`);
+                if (cancelBtn) cancelBtn.remove();
+                if (msg.status === 'cancelled') appendLog(panel, 'warning', 'Job cancelado.');
+                const executeBtn = panel.querySelector('.executePlanBtn');
+                if (executeBtn && msg.status !== 'completed') executeBtn.disabled = false;
+            }
+            delete jobs[msg.job_id];
+        } else if (msg.type === 'plan_chunk' && panel) {
+            // Passos chegam em blocos enquanto o agente ainda trabalha.
+            job.plan.steps.push(...msg.steps);
+            panel.querySelector('.plan-steps').insertAdjacentHTML('beforeend', msg.steps.map(renderStep).join(''));
+            panel.querySelector('.plan-objective').textContent = `${job.plan.steps.length} passos recebidos até agora...`;
+        } else if (msg.type === 'plan_summary' && panel) {
+            const data = msg.data;
+            if (data.status === 'plan_streamed' && data.plan) {
+                finishPlan(job, { ...data.plan, steps: job.plan.steps });
+            } else {
+                showPanelError(panel, data.message || 'Não foi possível gerar o plano.');
+            }
+        } else if (msg.type === 'plan_result' && panel) {
             const data = msg.data;
             if (data.status === 'plan_generated' && data.plan) {
-                displayPlan(data.plan);
+                panel.querySelector('.plan-steps').innerHTML = (data.plan.steps || []).map(renderStep).join('');
+                finishPlan(job, data.plan);
             } else {
-                resultContainer.innerHTML = `<div class="plan-container" style="color: #ff6b6b;"><strong>Erro:</strong> ${data.message || 'Não foi possível gerar o plano.'}</div>`;
+                showPanelError(panel, data.message || 'Não foi possível gerar o plano.');
             }
-        } else if (msg.type === 'log') {
-            const logPanel = document.querySelector('.log-panel');
-            if(logPanel) {
-                const logEntry = document.createElement('div');
-                logEntry.className = `log-message ${msg.level}`;
-                logEntry.textContent = `[${msg.level.toUpperCase()}] ${msg.message}`;
-                logPanel.appendChild(logEntry);
-                logPanel.scrollTop = logPanel.scrollHeight;
+        } else if (msg.type === 'progress' && panel) {
+            const progressEl = panel.querySelector('.execution-progress');
+            if (progressEl) {
+                const total = msg.total ? ` / ${msg.total}` : '';
+                progressEl.textContent = `${msg.progress}${total} itens movidos. ${msg.message || ''}`;
+            }
+        } else if (msg.type === 'execution_result' && panel) {
+            const data = msg.data;
+            const executeBtn = panel.querySelector('.executePlanBtn');
+            const progressEl = panel.querySelector('.execution-progress');
+            if (data.status === 'conflict') {
+                const conflicts = data.conflicts.map(c => `<div class="plan-step"><code>${c.from}</code> → <code>${c.to}</code>: ${c.reason}</div>`).join('');
+                progressEl.innerHTML = `<strong style="color: #ff6b6b;">Execução abortada, nada foi movido. Conflitos:</strong>${conflicts}`;
+                if (executeBtn) executeBtn.disabled = false;
+            } else if (data.status === 'error') {
+                progressEl.innerHTML = `<strong style="color: #ff6b6b;">Erro:</strong> ${data.message}`;
+                if (executeBtn) executeBtn.disabled = false;
+            } else {
+                progressEl.innerHTML = `<strong>Execução ${data.status}:</strong> ${data.renamed} renomeados, ${data.copied} copiados, ${data.failures.length} falhas em ${data.elapsed_seconds}s. Journal: <code>${data.journal_id}</code>`;
             }
+        } else if (msg.type === 'log') {
+            if (panel) appendLog(panel, msg.level, msg.message);
+            else console.log(`[${msg.level.toUpperCase()}] ${msg.message}`);
         } else if (msg.type === 'error') {
-            setFormDisabled(false);
-            resultContainer.innerHTML = `<div class="plan-container" style="color: #ff6b6b;"><strong>Erro no Servidor:</strong> ${msg.message}</div>`;
+            if (panel) {
+                showPanelError(panel, msg.message);
+            } else {
+                resultContainer.insertAdjacentHTML('afterbegin', `<div class="plan-container" style="color: #ff6b6b;"><strong>Erro no Servidor:</strong> ${msg.message}</div>`);
+            }
         }
     };
 
-    function displayPlan(plan) {
-        let stepsHtml = '';
-        if (plan.steps && plan.steps.length > 0) {
-            stepsHtml = plan.steps.map(step => {
-                const fromPath = step.from ? `<code>${step.from}</code>` : '';
-                const toPath = step.to ? `<strong> → </strong><code>${step.to}</code>` : `<code>${step.path}</code>`;
-                return `<div class="plan-step"><span class="action">${step.action}</span>: ${fromPath}${toPath}</div>`;
-            }).join('');
+    function jobStatusLabel(status) {
+        return { completed: 'concluído', failed: 'falhou', cancelled: 'cancelado' }[status] || status;
+    }
+
+    function renderStep(step) {
+        const fromPath = step.from ? `<code>${step.from}</code>` : '';
+        const toPath = step.to ? `<strong> → </strong><code>${step.to}</code>` : `<code>${step.path}</code>`;
+        return `<div class="plan-step"><span class="action">${step.action}</span>: ${fromPath}${toPath}</div>`;
+    }
+
+    function appendLog(panel, level, message) {
+        const logPanel = panel.querySelector('.log-panel');
+        const logEntry = document.createElement('div');
+        logEntry.className = `log-message ${level}`;
+        logEntry.textContent = `[${level.toUpperCase()}] ${message}`;
+        logPanel.appendChild(logEntry);
+        logPanel.scrollTop = logPanel.scrollHeight;
+    }
+
+    function showPanelError(panel, message) {
+        panel.querySelector('.plan-title').textContent = 'Falha';
+        panel.querySelector('.plan-objective').innerHTML = `<span style="color: #ff6b6b;"><strong>Erro:</strong> ${message}</span>`;
+    }
+
+    function finishPlan(job, plan) {
+        job.plan = plan;
+        const panel = job.panel;
+        panel.querySelector('.plan-title').textContent = 'Plano de Organização Sugerido';
+        panel.querySelector('.plan-objective').innerHTML = `<strong>Objetivo:</strong> ${plan.objective}`;
+        const actionsEl = panel.querySelector('.plan-actions');
+        if (plan.steps.length > 0) {
+            actionsEl.innerHTML = `
+                <button class="executePlanBtn" style="margin-top: 10px;">Executar Plano</button>
+                <div class="execution-progress"></div>`;
         } else {
-            stepsHtml = '<p>Nenhuma ação necessária para este plano.</p>';
+            actionsEl.innerHTML = '<p>Nenhuma ação necessária para este plano.</p>';
         }
+    }
 
-        resultContainer.innerHTML = `
+    function createJobPanel(jobId, title, description) {
+        const panel = document.createElement('div');
+        panel.innerHTML = `
             <div class="plan-container">
-                <h3>Plano de Organização Sugerido</h3>
-                <p><strong>Objetivo:</strong> ${plan.objective}</p>
+                <h3><span class="plan-title">${title}</span> <small>(<span class="job-status" data-job="${jobId}">enviado</span>)</small>
+                    <button class="cancelJobBtn" data-job="${jobId}" style="float: right;">Cancelar</button></h3>
+                <p class="plan-objective">${description}</p>
                 <hr>
-                ${stepsHtml}
+                <div class="plan-steps"></div>
+                <div class="plan-actions"></div>
             </div>
             <div class="plan-container">
                 <h3>Logs do Agente</h3>
-                <div class="log-panel"></div>
-            </div>
-        `;
+                <div class="log-panel">
+                   <div class="log-message info">[INFO] Solicitação enviada ao agente...</div>
+                </div>
+            </div>`;
+        resultContainer.prepend(panel);
+        return panel;
+    }
+
+    function startJob(jobId, panel, message) {
+        if (!jobs[jobId]) jobs[jobId] = { panel, plan: { steps: [] } };
+        ws.send(JSON.stringify({ ...message, job_id: jobId }));
     }
 
+    resultContainer.addEventListener('click', (event) => {
+        const target = event.target;
+        if (target.classList.contains('cancelJobBtn')) {
+            target.disabled = true;
+            ws.send(JSON.stringify({ action: 'cancel', job_id: target.dataset.job }));
+            return;
+        }
+        if (!target.classList.contains('executePlanBtn')) return;
+        const entry = planPanels.get(target.closest('.job-panel'));
+        if (!entry) return;
+        if (!confirm('Os arquivos serão movidos de verdade. Deseja continuar?')) return;
+        target.disabled = true;
+        const jobId = newJobId('exec');
+        const panel = entry.panel;
+        const statusEl = panel.querySelector('.job-status');
+        statusEl.dataset.job = jobId;
+        statusEl.textContent = 'executando';
+        panel.querySelector('.execution-progress').textContent = 'Iniciando execução...';
+        startJob(jobId, panel, { action: 'execute_plan', plan: entry.plan });
+        jobs[jobId].plan = entry.plan;
+    });
+
     generatePlanBtn.addEventListener('click', () => {
         const directory = directoryInput.value.trim();
         const goal = goalInput.value.trim();
@@ -79,20 +193,16 @@ document.addEventListener('DOMContentLoaded', () => {
             alert('Por favor, preencha o diretório e o objetivo.');
             return;
         }
-        setFormDisabled(true);
-        resultContainer.innerHTML = `
-            <div class="plan-container">
-                <h3>Gerando Plano...</h3>
-                <p>O agente está analisando o diretório. Logs aparecerão abaixo.</p>
-                <div class="log-panel">
-                   <div class="log-message info">[INFO] Solicitação enviada ao agente...</div>
-                </div>
-            </div>`;
-        ws.send(JSON.stringify({ action: 'generate_plan', directory, goal }));
+        const jobId = newJobId('plan');
+        const panel = createJobPanel(jobId, 'Gerando Plano...', `O agente está analisando <code>${directory}</code>. Os passos aparecerão abaixo assim que ficarem prontos.`);
+        panel.classList.add('job-panel');
+        startJob(jobId, panel, { action: 'generate_plan', directory, goal, stream: true });
+        planPanels.set(panel, jobs[jobId]);
     });
 
     summarizeBtn.addEventListener('click', () => {
-        alert('Enviando solicitação para o SummarizerAgent. Ele irá processar as últimas entradas do feed em segundo plano. Verifique a página do feed para ver o resultado.');
-        ws.send(JSON.stringify({ action: 'process_feed' }));
+        const jobId = newJobId('feed');
+        const panel = createJobPanel(jobId, 'Agente Resumidor', 'Processando as últimas entradas do feed. Verifique a página do feed para ver o resultado.');
+        startJob(jobId, panel, { action: 'process_feed' });
     });
-});
\ No newline at end of file
+});